@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Shared file walker for the NocturneSwap build tools
+Lazily walks a tree with os.scandir, honouring .gitignore files and exclude globs
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Never worth descending into, whatever the .gitignore files say (gitignore syntax)
+DEFAULT_EXCLUDES = ['.git/', 'node_modules/', '__pycache__/']
+
+# A NUL byte in the first block marks a file as binary, as git does
+BINARY_SNIFF_BYTES = 8000
+
+class WalkedFile(NamedTuple):
+    """A file found by FileWalker, with the stat fields the tools use"""
+    path: str
+    relative: str
+    size: int
+    mtime_ns: int
+
+def translate_gitignore_glob(glob: str) -> str:
+    """Regex source for one gitignore glob: '*' and '?' stay within a path segment, '**' spans segments"""
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        char = glob[i]
+        if char == '*':
+            if glob.startswith('**', i):
+                i += 2
+                if i < n and glob[i] == '/':
+                    parts.append('(?:.*/)?')
+                    i += 1
+                else:
+                    parts.append('.*')
+                continue
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = i + 1
+            if end < n and glob[end] == '!':
+                end += 1
+            if end < n and glob[end] == ']':
+                end += 1
+            end = glob.find(']', end)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = glob[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f'(?!/)[{body}]')
+                i = end
+        elif char == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(glob[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return ''.join(parts)
+
+class IgnoreRules:
+    """The rules of one .gitignore (or exclude list), matched against paths relative to its directory"""
+    
+    def __init__(self, base: str, lines: Iterable[str]):
+        # Directory the rules belong to, relative to the walk root ("" or "dir/sub/")
+        self.base = base
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+            directory_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # Without an inner slash a pattern matches at any depth
+            if '/' in line:
+                line = line.lstrip('/')
+            else:
+                line = '**/' + line
+            pattern = re.compile(f'(?:{translate_gitignore_glob(line)})\\Z', re.DOTALL)
+            self.rules.append((pattern, negated, directory_only))
+    
+    @classmethod
+    def load(cls, path: str, base: str) -> 'IgnoreRules':
+        """Read a .gitignore file, treating an unreadable one as empty"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(base, f.readlines())
+        except OSError:
+            return cls(base, [])
+    
+    def match(self, relative: str, is_dir: bool) -> Optional[bool]:
+        """True/False when the last matching rule ignores/re-includes the path, None when no rule matches"""
+        if not relative.startswith(self.base):
+            return None
+        local = relative[len(self.base):]
+        result = None
+        for pattern, negated, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if pattern.match(local):
+                result = not negated
+        return result
+
+class FileWalker:
+    """Walk a tree lazily in os.walk order (sorted, files before subdirectories), yielding WalkedFile entries.
+    
+    Directories excluded by .gitignore files at or below the root or by the exclude globs (gitignore
+    syntax, relative to the root) are never entered. Symlinked directories are not followed.
+    When `include` name globs are given, other files are passed over before they are stat'ed or
+    opened. Files over max_size bytes, and binary files when skip_binary is set, are passed over
+    and listed in `skipped`.
+    """
+    
+    def __init__(self, root, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True,
+                 max_size: Optional[int] = None, skip_binary: bool = False,
+                 include: Optional[Iterable[str]] = None):
+        self.root = os.fspath(root)
+        self.excludes = IgnoreRules("", excludes)
+        self.use_gitignore = use_gitignore
+        self.max_size = max_size
+        self.skip_binary = skip_binary
+        # One regex for all include globs; an empty list matches no file
+        self.include = None
+        if include is not None:
+            self.include = re.compile('|'.join(fnmatch.translate(glob) for glob in include) or '(?!)')
+        self.skipped: List[str] = []
+    
+    @staticmethod
+    def is_ignored(rules: List[IgnoreRules], relative: str, is_dir: bool) -> bool:
+        """Deeper rule sets override shallower ones, and later rules override earlier ones"""
+        ignored = False
+        for rule_set in rules:
+            result = rule_set.match(relative, is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+    
+    @staticmethod
+    def is_binary(path: str) -> bool:
+        """Sniff the start of a file for NUL bytes"""
+        try:
+            with open(path, 'rb') as f:
+                return b'\0' in f.read(BINARY_SNIFF_BYTES)
+        except OSError:
+            return False
+    
+    def __iter__(self) -> Iterator[WalkedFile]:
+        pending = [(self.root, "", [self.excludes])]
+        while pending:
+            directory, relative, rules = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            
+            if self.use_gitignore and any(entry.name == '.gitignore' for entry in entries):
+                rules = rules + [IgnoreRules.load(os.path.join(directory, '.gitignore'), relative)]
+            
+            subdirectories = []
+            for entry in entries:
+                entry_relative = relative + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.is_ignored(rules, entry_relative, True):
+                            subdirectories.append((entry.path, entry_relative + '/', rules))
+                        continue
+                    if self.include is not None and not self.include.match(entry.name):
+                        continue
+                    if not entry.is_file() or self.is_ignored(rules, entry_relative, False):
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self.max_size is not None and stat.st_size > self.max_size:
+                    self.skipped.append(entry_relative)
+                    continue
+                if self.skip_binary and self.is_binary(entry.path):
+                    self.skipped.append(entry_relative)
+                    continue
+                yield WalkedFile(entry.path, entry_relative, stat.st_size, stat.st_mtime_ns)
+            
+            # Popped in sorted order once this directory's files are done
+            pending.extend(reversed(subdirectories))
@@ -6,9 +6,43 @@ Creates optimized version without requiring npm
 
 import os
 import sys
+import re
 import shutil
 import json
+import hashlib
+import argparse
 from pathlib import Path
+from urllib.parse import urlparse
+
+from css_minifier import CSSMinifier, MinifyError, split_selectors
+
+STYLESHEET_LINK = '<link href="./static/css/main.css" rel="stylesheet">'
+# main.css loads without blocking render; the noscript copy covers browsers without JS
+ASYNC_STYLESHEET = '''<style>{critical_css}</style>
+    <link rel="preload" href="./static/css/main.css" as="style">
+    <link href="./static/css/main.css" rel="stylesheet" media="print" onload="this.media='all'">
+    <noscript><link href="./static/css/main.css" rel="stylesheet"></noscript>'''
+
+# Selectors are critical when every class, id and tag they name is on the first screen
+CRITICAL_GROUPING_RULES = ('@media', '@supports')
+CRITICAL_ALWAYS = {'html', 'body'}
+COMPONENT_DEFINITION = re.compile(r'^[ \t]*(?:const|function)\s+([A-Z]\w*)\b', re.MULTILINE)
+ROOT_COMPONENT = re.compile(r'render\(\s*<([A-Z]\w*)')
+JSX_COMPONENT = re.compile(r'<([A-Z]\w*)')
+ROUTE_ELEMENT = re.compile(r'<Route\b(?:[^<>]|<[^<>]*>)*?/>')
+ROUTE_PATH = re.compile(r'\bpath=["\']([^"\']*)["\']')
+MARKUP_WORD = re.compile(r'-?[_a-zA-Z][\w-]*')
+
+# Third-party scripts the production page loads from unpkg: (vendored name, CDN URL)
+CDN_SCRIPTS = [
+    ("react", "https://unpkg.com/react@18/umd/react.production.min.js"),
+    ("react-dom", "https://unpkg.com/react-dom@18/umd/react-dom.production.min.js"),
+    ("react-router-dom", "https://unpkg.com/react-router-dom@6/dist/umd/react-router-dom.production.min.js"),
+    ("solana-web3", "https://unpkg.com/@solana/web3.js@latest/lib/index.iife.js"),
+]
+# Same name.<hash>.ext pattern serve.py marks as immutable
+FINGERPRINT_LENGTH = 10
+PRELOAD_HINT = '<link rel="preload" href="{href}" as="script">'
 
 def create_build_directory():
     """Create build directory structure"""
@@ -23,8 +57,147 @@ def create_build_directory():
     
     return build_dir
 
-def create_production_html(build_dir):
-    """Create production HTML file"""
+def find_first_screen_markup(js_content):
+    """Source of the components rendered on first load: the root component and, through it,
+    every component outside a <Route> plus the landing route's element"""
+    definitions = [(match.start(), match.group(1)) for match in COMPONENT_DEFINITION.finditer(js_content)]
+    bodies = {}
+    for index, (start, name) in enumerate(definitions):
+        end = definitions[index + 1][0] if index + 1 < len(definitions) else len(js_content)
+        bodies.setdefault(name, js_content[start:end])
+    
+    def landing_routes_only(match):
+        path = ROUTE_PATH.search(match.group(0))
+        return match.group(0) if path is None or path.group(1) in ("/", "") else ""
+    
+    root = ROOT_COMPONENT.search(js_content)
+    pending = [root.group(1)] if root else []
+    rendered, markup = set(), []
+    while pending:
+        name = pending.pop()
+        if name in rendered or name not in bodies:
+            continue
+        rendered.add(name)
+        body = ROUTE_ELEMENT.sub(landing_routes_only, bodies[name])
+        markup.append(body)
+        pending.extend(JSX_COMPONENT.findall(body))
+    return "\n".join(markup)
+
+def parse_css_blocks(css_content):
+    """Split a stylesheet into top-level (prelude, body) pairs; statements such as @import have no body"""
+    css_content = re.sub(r'/\*.*?\*/', '', css_content, flags=re.DOTALL)
+    blocks = []
+    depth = 0
+    start = body_start = 0
+    prelude = ""
+    index = 0
+    while index < len(css_content):
+        char = css_content[index]
+        if char in '"\'':
+            index = css_content.find(char, index + 1)
+            if index == -1:
+                break
+        elif char == '{':
+            if depth == 0:
+                prelude = css_content[start:index].strip()
+                body_start = index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css_content[body_start:index]))
+                start = index + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css_content[start:index].strip(), None))
+            start = index + 1
+        index += 1
+    return blocks
+
+def selector_is_critical(selector, words):
+    """Whether every class, id and type selector in `selector` appears in the first-screen markup"""
+    selector = re.sub(r'::?[\w-]+\([^()]*\)', '', selector)
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    for name in re.findall(r'[.#](-?[_a-zA-Z][\w-]*)', selector):
+        if name not in words:
+            return False
+    for tag in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', re.sub(r'[.#]-?[_a-zA-Z][\w-]*', '', selector)):
+        if tag.lower() not in words and tag.lower() not in CRITICAL_ALWAYS:
+            return False
+    return True
+
+def select_critical_rules(blocks, words):
+    """Keep the rules first-screen markup can match, plus @font-face and top-level statements"""
+    rules = []
+    for prelude, body in blocks:
+        if body is None:
+            rules.append(f"{prelude};")
+        elif prelude.startswith(CRITICAL_GROUPING_RULES):
+            inner = select_critical_rules(parse_css_blocks(body), words)
+            if inner:
+                rules.append(f"{' '.join(prelude.split())}{{{''.join(inner)}}}")
+        elif prelude.startswith('@font-face'):
+            rules.append(f"@font-face{{{' '.join(body.split())}}}")
+        elif not prelude.startswith('@'):
+            selectors = [selector.strip() for selector in split_selectors(prelude) if selector_is_critical(selector.strip(), words)]
+            if selectors:
+                rules.append(f"{','.join(' '.join(selector.split()) for selector in selectors)}{{{' '.join(body.split())}}}")
+    return rules
+
+def extract_critical_css(css_content, html_content, js_content):
+    """Work out the CSS needed to paint the first screen of the production page, minified"""
+    markup = html_content + find_first_screen_markup(js_content)
+    words = set(MARKUP_WORD.findall(markup))
+    words |= {word.lower() for word in words}
+    blocks = parse_css_blocks(css_content)
+    rules = select_critical_rules(blocks, words)
+    
+    # Keyframes used by the inlined rules
+    critical_css = "".join(rules)
+    for prelude, body in blocks:
+        keyframes = re.match(r'@(?:-\w+-)?keyframes\s+([\w-]+)', prelude)
+        if keyframes and re.search(r'\b%s\b' % re.escape(keyframes.group(1)), critical_css):
+            rules.append(f"{prelude}{{{' '.join(body.split())}}}")
+    try:
+        return CSSMinifier("".join(rules)).minify()
+    except MinifyError:
+        return "".join(rules)
+
+def find_vendored_file(vendor_dir, url):
+    """Local copy of a CDN file, mirrored as <package>@<version>/<path> or stored under its bare file name"""
+    path = urlparse(url).path.lstrip("/")
+    for candidate in (vendor_dir / path, vendor_dir / Path(path).name):
+        if candidate.is_file():
+            return candidate
+    return None
+
+def vendor_cdn_scripts(build_dir, vendor_dir):
+    """Copy the CDN scripts from a local cache into static/js under content-hashed names.
+    Returns CDN URL -> local URL, or None when a script is missing from the cache"""
+    vendored = {}
+    missing = []
+    for name, url in CDN_SCRIPTS:
+        source = find_vendored_file(vendor_dir, url)
+        if source is None:
+            missing.append(url)
+            continue
+        data = source.read_bytes()
+        file_name = f"{name}.{hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]}.js"
+        with open(build_dir / "static" / "js" / file_name, "wb") as f:
+            f.write(data)
+        vendored[url] = f"./static/js/{file_name}"
+        print(f"  ✅ {url} -> static/js/{file_name} ({len(data)} bytes)")
+    
+    if missing:
+        print(f"❌ Error: {len(missing)} script(s) not found in {vendor_dir}:")
+        for url in missing:
+            path = urlparse(url).path.lstrip("/")
+            print(f"   {url}")
+            print(f"     expected {vendor_dir / path} or {vendor_dir / Path(path).name}")
+        return None
+    return vendored
+
+def create_production_html(build_dir, vendored=None):
+    """Create production HTML file, loading vendored copies of the CDN scripts when given"""
     html_content = '''<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -47,6 +220,28 @@ def create_production_html(build_dir):
 </body>
 </html>'''
     
+    # Serve third-party scripts from our own origin and start fetching them from <head>
+    if vendored:
+        for url, href in vendored.items():
+            html_content = html_content.replace(f'<script src="{url}"></script>', f'<script src="{href}"></script>')
+        hints = "\n    ".join(PRELOAD_HINT.format(href=href) for href in vendored.values())
+        html_content = html_content.replace("</head>", f"    {hints}\n</head>")
+    
+    # Inline the first screen's CSS and load main.css without blocking render
+    css_path = build_dir / "static" / "css" / "main.css"
+    js_path = build_dir / "static" / "js" / "main.js"
+    if css_path.exists():
+        with open(css_path, "r") as f:
+            css_content = f.read()
+        js_content = ""
+        if js_path.exists():
+            with open(js_path, "r") as f:
+                js_content = f.read()
+        critical_css = extract_critical_css(css_content, html_content, js_content)
+        if critical_css:
+            html_content = html_content.replace(STYLESHEET_LINK, ASYNC_STYLESHEET.format(critical_css=critical_css))
+            print(f"🎯 Inlined {len(critical_css)} bytes of critical CSS ({len(css_content)} bytes in main.css)")
+    
     with open(build_dir / "index.html", "w") as f:
         f.write(html_content)
 
@@ -124,7 +319,18 @@ def create_manifest(build_dir):
     with open(build_dir / "manifest.json", "w") as f:
         json.dump(manifest, f, indent=2)
 
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="NocturneSwap production build")
+    parser.add_argument("--vendor-dir", type=Path, metavar="DIR",
+                        help="self-host React, ReactDOM, React Router and @solana/web3.js from local copies in DIR "
+                             "(unpkg paths such as react@18/umd/react.production.min.js, or bare file names) "
+                             "instead of loading them from unpkg")
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
+    
     # Get the current working directory (should be project root)
     project_root = Path.cwd()
     
@@ -133,6 +339,9 @@ def main():
         print("❌ Error: Please run this script from the project root directory")
         print("   Expected to find: frontend/dev.html")
         sys.exit(1)
+    if args.vendor_dir and not args.vendor_dir.is_dir():
+        print(f"❌ Error: vendor directory not found: {args.vendor_dir}")
+        sys.exit(1)
     
     print("🌙 NocturneSwap Production Build")
     print("=" * 40)
@@ -141,13 +350,20 @@ def main():
     
     build_dir = create_build_directory()
     
-    print("📄 Creating production HTML...")
-    create_production_html(build_dir)
-    
     print("🎨 Extracting and optimizing CSS...")
     print("📜 Extracting and optimizing JavaScript...")
     create_build_files(build_dir)
     
+    vendored = None
+    if args.vendor_dir:
+        print(f"📦 Vendoring CDN scripts from {args.vendor_dir}...")
+        vendored = vendor_cdn_scripts(build_dir, args.vendor_dir)
+        if vendored is None:
+            sys.exit(1)
+    
+    print("📄 Creating production HTML...")
+    create_production_html(build_dir, vendored)
+    
     print("📱 Creating manifest...")
     create_manifest(build_dir)
     
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Tokenizer-based CSS minifier shared by the NocturneSwap build tools
+Parses a stylesheet into rules, merges and dedupes them, and can drop selectors that never match
+"""
+
+import fnmatch
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+class MinifyError(ValueError):
+    """Raised when a source file cannot be minified safely"""
+
+CSS_TOKEN = re.compile(r'''
+    (?P<comment>/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<url>url\(\s*(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^)'"]*?)\s*\))
+  | (?P<space>\s+)
+  | (?P<punct>[{};])
+  | (?P<word>(?:(?!url\()[^\s{};'"/])+|/)
+''', re.VERBOSE | re.DOTALL | re.IGNORECASE)
+CSS_HEX_COLOR = re.compile(r'#([0-9a-fA-F]{3,8})(?![\w-])')
+CSS_DECIMAL = re.compile(r'(?<![\w.])(\d*)\.(\d+)(?![\d.])')
+CSS_ZERO_UNIT = re.compile(r'(?<![\w.#-])0(?:\.0+)?(?:px|em|rem|ex|ch|vh|vw|vmin|vmax|cm|mm|in|pt|pc)(?![\w%-])', re.IGNORECASE)
+CSS_IMPORTANT = re.compile(r'\s*!\s*important$', re.IGNORECASE)
+CSS_VENDOR = re.compile(r'-(?:webkit|moz|ms|o)-', re.IGNORECASE)
+CSS_SPACE_BEFORE = {"selector": ',>+~)', "value": ',)', "prelude": ',):'}
+CSS_SPACE_AFTER = {"selector": ',>+~(', "value": ',(', "prelude": ',(:'}
+CSS_NO_ZERO_UNITS = frozenset(['flex', 'flex-basis'])
+
+# Families a shorthand (or legacy alias) resets beyond its own, e.g. font resets line-height; '*' is every property
+CSS_SHORTHAND_RESETS = {
+    'all': {'*'},
+    'font': {'line'},
+    'inset': {'top', 'right', 'bottom', 'left'},
+    'gap': {'row', 'column', 'grid'},
+    'grid': {'row', 'column', 'gap'},
+    'columns': {'column'},
+    'place': {'align', 'justify'},
+    'word': {'overflow'},
+    'page': {'break'},
+}
+
+# Unused selector elimination
+CSS_GROUPING_RULE = re.compile(r'@(?:media|supports|layer|container|document|-moz-document)\b', re.IGNORECASE)
+CSS_FUNCTIONAL_PSEUDO = re.compile(r'::?[\w-]+\([^()]*\)')
+CSS_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+CSS_CLASS_OR_ID = re.compile(r'([.#])(-?[_a-zA-Z][\w-]*)')
+CSS_TYPE_SELECTOR = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)')
+CSS_ALWAYS_PRESENT_TAGS = frozenset(['html', 'head', 'body'])
+
+class CSSBlock:
+    """A rule or at-rule with a prelude and a list of child items"""
+    
+    def __init__(self, prelude: str):
+        self.prelude = prelude
+        self.children: List = []
+    
+    @property
+    def is_style_rule(self) -> bool:
+        return not self.prelude.startswith('@')
+    
+    @property
+    def is_keyframes(self) -> bool:
+        return re.match(r'@(?:-\w+-)?keyframes\b', self.prelude, re.IGNORECASE) is not None
+
+class CSSDeclaration:
+    """A single property: value declaration"""
+    
+    def __init__(self, prop: str, value: str, important: bool):
+        self.prop = prop
+        self.value = value
+        self.important = important
+    
+    def __str__(self) -> str:
+        return f"{self.prop}:{self.value}{'!important' if self.important else ''}"
+
+class SelectorFilter:
+    """Decides whether a selector could match anything the shipped HTML and JS can produce"""
+    
+    def __init__(self, words: Set[str], safelist: List[str]):
+        self.words = words
+        self.tags = {word.lower() for word in words} | CSS_ALWAYS_PRESENT_TAGS
+        # 'theme-' + name and `theme-${name}` build class names at runtime
+        self.prefixes = tuple(word for word in words if word.endswith('-') and len(word) > 2)
+        self.safelist = safelist
+    
+    def can_match(self, selector: str) -> bool:
+        if '\\' in selector:
+            return True
+        # :not()/:is()/:has() arguments and attribute values never make a selector required
+        while True:
+            stripped = CSS_FUNCTIONAL_PSEUDO.sub('', selector)
+            if stripped == selector:
+                break
+            selector = stripped
+        selector = CSS_ATTRIBUTE.sub('', selector)
+        for _, name in CSS_CLASS_OR_ID.findall(selector):
+            if not self.is_used(name):
+                return False
+        for tag in CSS_TYPE_SELECTOR.findall(CSS_CLASS_OR_ID.sub('', selector)):
+            if tag.lower() not in self.tags:
+                return False
+        return True
+    
+    def is_used(self, name: str) -> bool:
+        return (name in self.words or name.startswith(self.prefixes)
+                or any(fnmatch.fnmatchcase(name, pattern) for pattern in self.safelist))
+
+class CSSMinifier:
+    """Streaming CSS tokenizer and minifier with structural optimizations"""
+    
+    def __init__(self, source: str, selector_filter: Optional[SelectorFilter] = None):
+        self.source = source
+        self.selector_filter = selector_filter
+        self.tokens = (
+            (match.lastgroup, match.group())
+            for match in CSS_TOKEN.finditer(source)
+        )
+    
+    def minify(self) -> str:
+        """Parse the stylesheet in one pass, optimize the tree and serialize it"""
+        items = self.parse_items(top_level=True)
+        if self.selector_filter:
+            self.purge(items)
+        self.optimize(items, merge_rules=True)
+        return self.serialize(items, top_level=True)
+    
+    def parse_items(self, top_level: bool = False) -> List:
+        """Consume tokens until the end of the current block"""
+        items = []
+        prelude: List[Tuple[str, str]] = []
+        
+        for kind, text in self.tokens:
+            if kind == 'comment':
+                # A comment still separates the tokens around it
+                kind, text = 'space', ' '
+            if kind == 'space' and prelude and prelude[-1][0] == 'space':
+                continue
+            if kind == 'punct' and text == '{':
+                block = CSSBlock(self.squash(prelude, self.prelude_context(prelude)))
+                block.children = self.parse_items()
+                items.append(block)
+                prelude = []
+            elif kind == 'punct' and text == ';':
+                self.add_statement(items, prelude)
+                prelude = []
+            elif kind == 'punct' and text == '}':
+                if top_level:
+                    raise MinifyError("unexpected '}'")
+                self.add_statement(items, prelude)
+                return items
+            else:
+                prelude.append((kind, text))
+        
+        if not top_level:
+            raise MinifyError("unterminated block")
+        self.add_statement(items, prelude)
+        return items
+    
+    def add_statement(self, items: List, tokens: List[Tuple[str, str]]) -> None:
+        """Turn the tokens before a ';' or '}' into a declaration or at-statement"""
+        while tokens and tokens[0][0] == 'space':
+            tokens = tokens[1:]
+        if not tokens:
+            return
+        if tokens[0][1].startswith('@'):
+            items.append(self.squash(tokens, "prelude"))
+            return
+        
+        for index, (kind, text) in enumerate(tokens):
+            if kind == 'word' and ':' in text:
+                head, _, tail = text.partition(':')
+                prop_tokens = tokens[:index] + [('word', head)]
+                value_tokens = ([('word', tail)] if tail else []) + tokens[index + 1:]
+                break
+        else:
+            raise MinifyError(f"malformed declaration: {''.join(t for _, t in tokens)[:40]}")
+        
+        prop = ''.join(text for _, text in prop_tokens).strip()
+        if prop.startswith('--'):
+            # Custom properties are arbitrary token streams; only collapse whitespace
+            value = ''.join(' ' if kind == 'space' else text for kind, text in value_tokens)
+            items.append(CSSDeclaration(prop, value.strip(), False))
+            return
+        
+        value = self.squash(value_tokens, "value", prop.lower())
+        important = bool(CSS_IMPORTANT.search(value))
+        if important:
+            value = CSS_IMPORTANT.sub('', value)
+        items.append(CSSDeclaration(prop.lower() if not prop.startswith('*') else prop, value, important))
+    
+    @staticmethod
+    def prelude_context(tokens: List[Tuple[str, str]]) -> str:
+        """At-rule preludes and selectors follow different whitespace rules"""
+        for kind, text in tokens:
+            if kind != 'space':
+                return "prelude" if text.startswith('@') else "selector"
+        return "selector"
+    
+    def squash(self, tokens: List[Tuple[str, str]], context: str, prop: str = '') -> str:
+        """Join tokens, dropping whitespace that does not separate anything"""
+        parts: List[str] = []
+        depth = 0
+        for index, (kind, text) in enumerate(tokens):
+            if kind == 'space':
+                if not parts or index + 1 == len(tokens):
+                    continue
+                prev = parts[-1][-1]
+                nxt = tokens[index + 1][1][0]
+                if prev in CSS_SPACE_AFTER[context] or nxt in CSS_SPACE_BEFORE[context] or nxt == '!':
+                    continue
+                parts.append(' ')
+                continue
+            if kind == 'url':
+                text = 'url(' + text[4:-1].strip() + ')'
+            elif kind == 'word' and context == "value":
+                if depth == 0 and '(' not in text and prop not in CSS_NO_ZERO_UNITS:
+                    text = CSS_ZERO_UNIT.sub('0', text)
+                text = CSS_DECIMAL.sub(self.shorten_number, text)
+                text = CSS_HEX_COLOR.sub(self.shorten_color, text)
+                depth += text.count('(') - text.count(')')
+            parts.append(text)
+        return ''.join(parts).strip()
+    
+    @staticmethod
+    def shorten_number(match: re.Match) -> str:
+        """0.50 -> .5, 1.0 -> 1, 0.0 -> 0"""
+        whole = match.group(1).lstrip('0')
+        fraction = match.group(2).rstrip('0')
+        if fraction:
+            return f"{whole}.{fraction}"
+        return whole or '0'
+    
+    @staticmethod
+    def shorten_color(match: re.Match) -> str:
+        """#AABBCC -> #abc, #aabbccdd -> #abcd"""
+        digits = match.group(1).lower()
+        if len(digits) in (6, 8) and all(digits[i] == digits[i + 1] for i in range(0, len(digits), 2)):
+            digits = digits[::2]
+        return '#' + digits
+    
+    def purge(self, items: List) -> None:
+        """Drop selectors that cannot match; rules left without selectors disappear in optimize()"""
+        for item in items:
+            if not isinstance(item, CSSBlock):
+                continue
+            if item.is_style_rule:
+                selectors = [selector for selector in split_selectors(item.prelude)
+                             if self.selector_filter.can_match(selector)]
+                if not selectors:
+                    item.children = []
+                item.prelude = ','.join(selectors)
+            elif CSS_GROUPING_RULE.match(item.prelude):
+                self.purge(item.children)
+    
+    def optimize(self, items: List, merge_rules: bool) -> None:
+        """Apply structural optimizations to the items of one block, in place"""
+        for item in items:
+            if isinstance(item, CSSBlock):
+                self.optimize(item.children, merge_rules=not item.is_keyframes)
+                if item.is_style_rule:
+                    item.children = self.dedupe_declarations(item.children)
+        
+        # Drop empty rules
+        items[:] = [item for item in items if not (isinstance(item, CSSBlock) and not item.children)]
+        
+        if merge_rules:
+            self.merge_duplicate_selectors(items)
+            self.merge_identical_rules(items)
+    
+    @staticmethod
+    def dedupe_declarations(children: List) -> List:
+        """Remove declarations that an identical later declaration repeats.
+        
+        Differing values of one property are all kept: earlier ones are fallbacks for
+        browsers that do not understand the later ones (100vh before 100dvh).
+        """
+        result: List = []
+        last_index: Dict[str, int] = {}
+        for child in children:
+            if isinstance(child, CSSDeclaration):
+                key = str(child)
+                index = last_index.get(key)
+                if index is not None:
+                    result[index] = None
+                last_index[key] = len(result)
+            result.append(child)
+        return [child for child in result if child is not None]
+    
+    def merge_duplicate_selectors(self, items: List) -> None:
+        """Fold rules with an identical selector into the first occurrence when nothing in between conflicts"""
+        first_seen: Dict[str, int] = {}
+        index = 0
+        while index < len(items):
+            item = items[index]
+            if not (isinstance(item, CSSBlock) and item.is_style_rule):
+                index += 1
+                continue
+            earlier_index = first_seen.get(item.prelude)
+            if earlier_index is not None and self.can_move_up(items, earlier_index, index):
+                earlier = items[earlier_index]
+                earlier.children = self.dedupe_declarations(earlier.children + item.children)
+                del items[index]
+                continue
+            first_seen[item.prelude] = index
+            index += 1
+    
+    def can_move_up(self, items: List, target: int, source: int) -> bool:
+        """Whether items[source] can move to items[target] without changing the cascade"""
+        families = self.property_families(items[source])
+        for between in items[target + 1:source]:
+            if isinstance(between, str):
+                return False
+            others = self.property_families(between)
+            if families & others or '*' in families or '*' in others:
+                return False
+        return True
+    
+    def property_families(self, item) -> Set[str]:
+        """Families touched by a block (margin-top -> margin), widened by what its shorthands reset"""
+        families: Set[str] = set()
+        if isinstance(item, CSSDeclaration):
+            family = CSS_VENDOR.sub('', item.prop).lstrip('-').split('-')[0]
+            families.add(family)
+            families |= CSS_SHORTHAND_RESETS.get(family, set())
+        elif isinstance(item, CSSBlock):
+            for child in item.children:
+                families |= self.property_families(child)
+        return families
+    
+    def merge_identical_rules(self, items: List) -> None:
+        """a{x}b{x} -> a,b{x} for adjacent rules"""
+        index = 1
+        while index < len(items):
+            prev, item = items[index - 1], items[index]
+            if (isinstance(prev, CSSBlock) and isinstance(item, CSSBlock)
+                    and prev.is_style_rule and item.is_style_rule
+                    and not CSS_VENDOR.search(prev.prelude + item.prelude)
+                    and all(isinstance(child, CSSDeclaration) for child in prev.children + item.children)
+                    and self.serialize(prev.children) == self.serialize(item.children)):
+                prev.prelude = f"{prev.prelude},{item.prelude}"
+                del items[index]
+                continue
+            index += 1
+    
+    def serialize(self, items: List, top_level: bool = False) -> str:
+        """Render items back to CSS text"""
+        parts = []
+        for item in items:
+            if isinstance(item, CSSBlock):
+                parts.append(f"{item.prelude}{{{self.serialize(item.children)}}}")
+            else:
+                parts.append(f"{item};")
+        content = ''.join(parts)
+        if not top_level and content.endswith(';'):
+            content = content[:-1]
+        return content
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on top-level commas"""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
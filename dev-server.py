@@ -4,22 +4,20 @@ NocturneSwap Development Server
 Android Codespaces Compatible
 """
 
-import http.server
-import socketserver
+import argparse
 import os
 import webbrowser
 from pathlib import Path
 
-class NocturneDevServer(http.server.SimpleHTTPRequestHandler):
+from serve import NocturneStaticHandler, add_server_arguments, create_server
+
+class NocturneDevServer(NocturneStaticHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
     
-    def end_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Cache-Control', 'no-cache')
-        super().end_headers()
+    def cache_control(self, immutable):
+        # Always revalidate during development, even fingerprinted files
+        return 'no-cache'
     
     def do_GET(self):
         # Serve the dev.html file for the root path
@@ -28,8 +26,14 @@ class NocturneDevServer(http.server.SimpleHTTPRequestHandler):
         return super().do_GET()
 
 def main():
+    parser = argparse.ArgumentParser(description="NocturneSwap development server")
+    parser.add_argument("--directory", default=str(Path(__file__).parent / 'frontend'),
+                        help="directory to serve (default: %(default)s)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    
     # Change to frontend directory
-    frontend_dir = Path(__file__).parent / 'frontend'
+    frontend_dir = Path(args.directory)
     os.chdir(frontend_dir)
     
     PORT = 3000
@@ -40,11 +44,13 @@ def main():
     print(f"📁 Serving from: {os.getcwd()}")
     print(f"🌐 Open: http://localhost:{PORT}")
     print("📱 Android Codespaces Compatible")
+    if args.production:
+        print("📦 Production mode: serving precompressed assets")
     print("🔄 Press Ctrl+C to stop")
     print("=" * 40)
     
     try:
-        with socketserver.TCPServer(("", PORT), NocturneDevServer) as httpd:
+        with create_server(PORT, NocturneDevServer, args) as httpd:
             httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n👋 Server stopped")
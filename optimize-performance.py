@@ -10,22 +10,1144 @@ import json
 import re
 import gzip
 import shutil
+import hashlib
+import argparse
+import base64
+import time
+import posixpath
+import fnmatch
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Tuple
+from urllib.parse import quote
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from asset_walker import DEFAULT_EXCLUDES, FileWalker
+from css_minifier import CSSMinifier, MinifyError, SelectorFilter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+CACHE_FILE = ".optimizer-cache.json"
+CACHE_VERSION = 1
+MANIFEST_FILE = "optimization-manifest.json"
+DEFAULT_SETTINGS = {
+    "encodings": ["gzip", "br"],
+    "gzip_level": 9,
+    "brotli_quality": 11,
+    "zstd_level": 19,
+    "fingerprint": True,
+    "bundle": True,
+    "entry": None,
+    "prune_unreachable": True,
+    "purge_css": True,
+    "css_safelist": [],
+    "jpeg_quality": 85,
+    "webp": False,
+    "webp_quality": 80,
+    "svg_precision": 3,
+    "inline_limit": 4096,
+    "svg_sprite": False
+}
+
+def encode_gzip(data: bytes, settings: Dict) -> bytes:
+    """gzip with a fixed mtime so identical inputs give identical outputs"""
+    return gzip.compress(data, compresslevel=settings["gzip_level"], mtime=0)
+
+def encode_brotli(data: bytes, settings: Dict) -> bytes:
+    return brotli.compress(data, quality=settings["brotli_quality"])
+
+def encode_zstd(data: bytes, settings: Dict) -> bytes:
+    return zstandard.ZstdCompressor(level=settings["zstd_level"]).compress(data)
+
+# Content-Encoding token -> (file suffix, encoder, required module, pip package)
+ENCODERS = {
+    "gzip": ('.gz', encode_gzip, gzip, None),
+    "br": ('.br', encode_brotli, brotli, "brotli"),
+    "zstd": ('.zst', encode_zstd, zstandard, "zstandard"),
+}
+COMPRESSED_SUFFIXES = [suffix for suffix, _, _, _ in ENCODERS.values()]
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg'}
+IMAGE_EXTENSIONS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg']
+
+# Raster images also get a name.ext.webp sibling offered through <picture>
+WEBP_SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Ancillary chunks that never affect how the image is rendered
+PNG_METADATA_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+
+# Images up to inline_limit bytes are embedded in the HTML/CSS that uses them
+DATA_URI_TYPES = {
+    '.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif', '.svg': 'image/svg+xml', '.webp': 'image/webp'
+}
+# SVG stays readable in a data URI; only characters that break HTML/CSS/URL parsing are escaped
+DATA_URI_SVG_SAFE = " !$'()*+,-./:;=?@_~"
+CSS_URL_REFERENCE = re.compile(r'''url\(\s*(["']?)([^"'()\s]+)\1\s*\)''', re.IGNORECASE)
+# Small SVGs used as <img> in pages can instead become symbols of one sprite sheet
+SPRITE_FILE = "sprites/icons.svg"
+IMAGE_SOURCE = re.compile(r'''<img\b[^>]*?\ssrc\s*=\s*["']?([^"'\s>]+)''', re.IGNORECASE)
+SVG_ROOT = re.compile(r'^\s*<svg\b([^>]*)>(.*)</svg>\s*$', re.DOTALL)
+SVG_ID_REFERENCE = re.compile(r'(\bid="|url\(#|href="#)([^")]+)')
+SVG_ROOT_ONLY_ATTRIBUTES = frozenset(['xmlns', 'width', 'height', 'x', 'y', 'version', 'baseProfile', 'id', 'viewBox'])
+
+# Fingerprinted outputs are renamed to name.<hash>.ext; entry points keep stable names
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_EXTENSIONS = {'.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'}
+STABLE_NAMES = {'sw.js', 'favicon.ico'}
+FINGERPRINTED_NAME = re.compile(r'^(.*)\.([0-9a-f]{%d})(\.[^./]+)$' % FINGERPRINT_LENGTH)
+ASSET_REFERENCE = re.compile(
+    r'(["\'`(])([^"\'`()\s<>,]+?\.(?:js|css|png|jpe?g|gif|svg|webp))([?#][^"\'`()\s<>]*)?(?=["\'`)\s])'
+)
+
+# Same order build.sh uses to pick the page it deploys
+ENTRY_CANDIDATES = [
+    "index.html", "index-professional.html", "index-stable.html",
+    "index-wallet.html", "index-simple.html", "dev.html"
+]
+SOURCE_REFERENCE = re.compile(
+    r'(["\'`(=])\s*([^"\'`()\s<>=]+?\.(?:html?|css|m?js|json|png|jpe?g|gif|svg|webp|ico|woff2?|ttf|otf|mp3|ogg|wav|mp4|webm))'
+    r'(?:[?#][^"\'`()\s<>]*)?\s*(?=["\'`)\s>])',
+    re.IGNORECASE
+)
+MODULE_SPECIFIER = re.compile(r'(?:\bfrom|\bimport|\brequire\s*\()\s*\(?\s*(["\'])(\.{1,2}/[^"\'\n]+)\1')
+MODULE_SUFFIXES = ['', '.js', '.jsx', '.ts', '.tsx', '/index.js']
+TRACED_EXTENSIONS = {'.html', '.htm', '.css', '.js', '.mjs', '.json'}
+
+# Adjacent classic <script src> tags in an HTML entry are concatenated into bundles/<page>.js
+BUNDLE_DIR = "bundles"
+SCRIPT_TAG = re.compile(r'<script\b([^>]*)>\s*</script>', re.IGNORECASE)
+SCRIPT_SRC = re.compile(r'\s*\bsrc\s*=\s*(["\']?)([^"\'\s>]+)\1', re.IGNORECASE)
+CLASSIC_SCRIPT_ATTRS = re.compile(r'\s*(?:type\s*=\s*(["\']?)(?:text|application)/javascript\1)?\s*', re.IGNORECASE)
+HTML_GAP = re.compile(r'(?:\s|<!--.*?-->)*', re.DOTALL)
+ARRAY_REFERENCE = re.compile(r'([\[,])(\s*)(["\'])([^"\'\s]+?\.js)\3(?=\s*[,\]])')
+
+class BuildCache:
+    """Persistent content-hash cache mapping source files to their optimized outputs"""
+    
+    def __init__(self, cache_path: Path, settings: Dict):
+        self.cache_path = cache_path
+        self.fingerprint = self.compute_fingerprint(settings)
+        self.entries: Dict[str, Dict] = {}
+        self.seen: Set[str] = set()
+    
+    @staticmethod
+    def compute_fingerprint(settings: Dict) -> str:
+        """Hash the optimizer settings together with the optimizer's own source"""
+        hasher = hashlib.sha256()
+        hasher.update(f"v{CACHE_VERSION}".encode())
+        hasher.update(json.dumps(settings, sort_keys=True).encode())
+        hasher.update(Path(__file__).read_bytes())
+        hasher.update(Path(__file__).with_name("css_minifier.py").read_bytes())
+        # Installing Pillow changes what image jobs produce
+        hasher.update(b"pillow" if Image is not None else b"")
+        return hasher.hexdigest()
+    
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Content hash of a source file"""
+        return hashlib.sha256(data).hexdigest()
+    
+    def load(self) -> None:
+        """Load cache entries from disk, ignoring unreadable caches"""
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️ Ignoring unreadable build cache: {e}")
+            self.entries = {}
+    
+    def save(self) -> None:
+        """Persist cache entries for sources seen in this run"""
+        data = {
+            "version": CACHE_VERSION,
+            "entries": {key: self.entries[key] for key in sorted(self.seen) if key in self.entries}
+        }
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    
+    def lookup(self, key: str, output_root: Path) -> Optional[str]:
+        """Return the cached content hash for a source whose outputs can still be reused"""
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if not entry or entry.get("settings") != self.fingerprint:
+            return None
+        derived = entry.get("derived", [])
+        if not all(key in self.entries for key in derived):
+            return None
+        outputs = entry.get("outputs", []) + [
+            output for key in derived for output in self.entries[key].get("outputs", [])
+        ]
+        if not all((output_root / output).exists() for output in outputs):
+            return None
+        return entry.get("hash")
+    
+    def touch(self, key: str) -> None:
+        """Keep a source's entry (and outputs, including derived ones) alive for this run"""
+        self.seen.add(key)
+        self.seen.update(self.entries.get(key, {}).get("derived", []))
+    
+    def record(self, key: str, digest: str, outputs: List[str], warning: Optional[str] = None) -> List[str]:
+        """Record the outputs produced for a source, returning previous outputs that were replaced"""
+        self.seen.add(key)
+        previous = self.entries.get(key, {}).get("outputs", [])
+        self.entries[key] = {
+            "hash": digest,
+            "settings": self.fingerprint,
+            "outputs": sorted(outputs)
+        }
+        if warning:
+            # Remembered so later stages know the output is the untouched source
+            self.entries[key]["warning"] = warning
+        return [output for output in previous if output not in outputs]
+    
+    def update_outputs(self, key: str, outputs: List[str]) -> None:
+        """Replace the outputs of a source after a later stage renamed or rewrote them"""
+        self.entries[key]["outputs"] = sorted(outputs)
+        self.entries[key].pop("compressed", None)
+    
+    def record_variants(self, key: str, variants: List[str]) -> None:
+        """Record the precompressed variants written for a source's current output"""
+        entry = self.entries[key]
+        primary = [output for output in entry.get("outputs", []) if Path(output).suffix not in COMPRESSED_SUFFIXES]
+        entry["outputs"] = sorted(primary + variants)
+        entry["compressed"] = True
+    
+    def prune(self, output_root: Path, keep: Iterable[str] = ()) -> List[str]:
+        """Drop entries of sources that no longer exist and delete every file under the output root
+        that no source seen in this run produced (so stale outputs go even without a cache)"""
+        for key in [k for k in self.entries if k not in self.seen]:
+            del self.entries[key]
+        live = set(keep)
+        for key in self.seen:
+            live.update(Path(output).as_posix() for output in self.entries.get(key, {}).get("outputs", []))
+        
+        removed = []
+        for output_file in sorted(output_root.rglob('*'), reverse=True):
+            relative = output_file.relative_to(output_root).as_posix()
+            if output_file.is_dir():
+                if not any(output_file.iterdir()):
+                    output_file.rmdir()
+            elif relative not in live:
+                output_file.unlink()
+                removed.append(relative)
+        return sorted(removed)
+    
+    @staticmethod
+    def remove_empty_dirs(directory: Path, output_root: Path) -> None:
+        """Remove empty directories up to (but excluding) the output root"""
+        while directory != output_root and directory.exists() and not any(directory.iterdir()):
+            directory.rmdir()
+            directory = directory.parent
+
+# Words of the shipped HTML/JS that unused selector elimination matches selectors against
+SOURCE_WORD = re.compile(r'-?[_a-zA-Z][\w-]*')
+
+def minify_css_content(content: str, used_words: Optional[List[str]] = None, safelist: List[str] = (),
+                       inline_assets: Optional[Dict[str, str]] = None) -> str:
+    """Minify a CSS stylesheet, dropping selectors none of `used_words` can match when given"""
+    selector_filter = SelectorFilter(set(used_words), list(safelist)) if used_words is not None else None
+    css = CSSMinifier(content, selector_filter).minify()
+    if inline_assets:
+        def inline(match: re.Match) -> str:
+            uri = lookup_url(inline_assets, match.group(2))
+            return f'url("{uri}")' if uri else match.group(0)
+        css = CSS_URL_REFERENCE.sub(inline, css)
+    return css
+
+def lookup_url(urls: Dict, url: str):
+    """Find a URL in a mapping keyed by the URLs a file may use, ignoring ./ and ../ detours"""
+    url = url.strip()
+    if not url:
+        return None
+    return urls.get(url) or urls.get(posixpath.normpath(url))
+
+def data_uri(logical: str, data: bytes) -> str:
+    """Embed an image in a data: URL"""
+    suffix = posixpath.splitext(logical)[1].lower()
+    if suffix == '.svg':
+        return f"data:{DATA_URI_TYPES[suffix]}," + quote(data.decode('utf-8'), safe=DATA_URI_SVG_SAFE)
+    return f"data:{DATA_URI_TYPES[suffix]};base64," + base64.b64encode(data).decode('ascii')
+
+JS_WORD = re.compile(r'[A-Za-z0-9_$\\\u0080-\uffff]+')
+JS_SPACE = re.compile(r'\s+')
+JS_STRINGS = {
+    "'": re.compile(r"'(?:[^'\\\n]|\\.)*'", re.DOTALL),
+    '"': re.compile(r'"(?:[^"\\\n]|\\.)*"', re.DOTALL),
+}
+JS_TEMPLATE_CHUNK = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*', re.DOTALL)
+JS_REGEX = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+JS_REGEX_KEYWORDS = frozenset([
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'
+])
+JS_EXPRESSION_END = frozenset(')]}\'"`')
+JS_DECLARATION_KEYWORDS = frozenset(['var', 'let', 'const'])
+JS_STATEMENT_START = frozenset('([{\'"`+-!~/')
+
+class JSMinifier:
+    """Single-pass JavaScript lexer that drops comments and redundant whitespace"""
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.output: List[str] = []
+        self.tokens: List[Tuple[str, str]] = []
+        self.last = ''          # last significant token
+        self.last_kind = ''     # word, string, regex, punct
+        self.pending = ''       # whitespace seen since the last token: '', ' ' or '\n'
+        self.template_braces: List[int] = []
+    
+    def minify(self) -> str:
+        """Lex the source once, emitting tokens with only the whitespace they need"""
+        src = self.source
+        n = len(src)
+        i = 0
+        
+        while i < n:
+            c = src[i]
+            
+            if c.isspace():
+                end = JS_SPACE.match(src, i).end()
+                self.add_whitespace('\n' in src[i:end])
+                i = end
+            elif c == '/' and src.startswith('//', i):
+                end = src.find('\n', i)
+                i = n if end == -1 else end
+            elif c == '/' and src.startswith('/*', i):
+                end = src.find('*/', i + 2)
+                if end == -1:
+                    raise MinifyError("unterminated block comment")
+                comment = src[i:end + 2]
+                if comment.startswith('/*!'):
+                    # Preserve license comments
+                    self.emit(comment, self.last_kind, self.last)
+                else:
+                    self.add_whitespace('\n' in comment)
+                i = end + 2
+            elif c == '/' and self.regex_allowed():
+                match = JS_REGEX.match(src, i)
+                if not match:
+                    raise MinifyError(f"unterminated regular expression at offset {i}")
+                self.emit(match.group(), 'regex')
+                i = match.end()
+            elif c in JS_STRINGS:
+                match = JS_STRINGS[c].match(src, i)
+                if not match:
+                    raise MinifyError(f"unterminated string literal at offset {i}")
+                self.emit(match.group(), 'string')
+                i = match.end()
+            elif c == '`':
+                i = self.scan_template(i, i + 1)
+            elif c == '}' and self.template_braces and self.template_braces[-1] == 0:
+                self.template_braces.pop()
+                i = self.scan_template(i, i + 1)
+            elif c == '<' and self.regex_allowed() and src[i + 1:i + 2].isalpha():
+                raise MinifyError("JSX syntax is not supported")
+            else:
+                match = JS_WORD.match(src, i)
+                if match:
+                    self.emit(match.group(), 'word')
+                    i = match.end()
+                    continue
+                if self.template_braces:
+                    if c == '{':
+                        self.template_braces[-1] += 1
+                    elif c == '}':
+                        self.template_braces[-1] -= 1
+                self.emit(c, 'punct')
+                i += 1
+        
+        if self.template_braces:
+            raise MinifyError("unterminated template literal")
+        return ''.join(self.output)
+    
+    def scan_template(self, start: int, body: int) -> int:
+        """Emit template literal text up to its closing backtick or the next ${"""
+        src = self.source
+        end = JS_TEMPLATE_CHUNK.match(src, body).end()
+        if src.startswith('${', end):
+            self.template_braces.append(0)
+            self.emit(src[start:end + 2], 'punct', '{')
+            return end + 2
+        if end >= len(src):
+            raise MinifyError(f"unterminated template literal at offset {start}")
+        self.emit(src[start:end + 1], 'string')
+        return end + 1
+    
+    def regex_allowed(self) -> bool:
+        """A slash starts a regex unless it follows something that ends an expression"""
+        if self.last_kind == 'punct':
+            return self.last not in (')', ']')
+        if self.last_kind == 'word':
+            return self.last in JS_REGEX_KEYWORDS
+        return not self.last_kind
+    
+    def add_whitespace(self, newline: bool) -> None:
+        """Remember whitespace between tokens, keeping the strongest kind"""
+        if newline:
+            self.pending = '\n'
+        elif not self.pending:
+            self.pending = ' '
+    
+    def emit(self, token: str, kind: str, last: Optional[str] = None) -> None:
+        """Append a token, inserting a separator only where one is required"""
+        if self.pending and self.output:
+            prev = self.output[-1][-1]
+            nxt = token[0]
+            if self.pending == '\n' and self.ends_expression(prev) and (is_js_word_char(nxt) or nxt in JS_STATEMENT_START):
+                # Keep line breaks that automatic semicolon insertion may depend on
+                self.output.append('\n')
+            elif self.needs_space(prev, nxt):
+                self.output.append(' ')
+        self.pending = ''
+        self.output.append(token)
+        self.tokens.append((token, kind))
+        self.last_kind = kind
+        self.last = token if last is None else last
+    
+    def ends_expression(self, prev: str) -> bool:
+        """Whether the previous token can end a statement"""
+        return is_js_word_char(prev) or prev in JS_EXPRESSION_END or prev in '+-' or self.last_kind == 'regex'
+    
+    def needs_space(self, prev: str, nxt: str) -> bool:
+        """Whether removing the space between two characters would change the tokens"""
+        if is_js_word_char(prev) and is_js_word_char(nxt):
+            return True
+        if prev == nxt and prev in '+-/':
+            return True
+        return nxt == '.' and self.last_kind == 'word' and self.last.isdigit()
+
+def is_js_word_char(char: str) -> bool:
+    """Identifier, keyword or number character"""
+    return char.isalnum() or char in '_$\\' or ord(char) > 127
+
+def minify_js_content(content: str) -> str:
+    """Minify a JavaScript source file"""
+    return JSMinifier(content).minify().strip()
+
+def js_tokens(content: str) -> List[Tuple[str, str]]:
+    """Lex a JavaScript source into (token, kind) pairs"""
+    lexer = JSMinifier(content)
+    lexer.minify()
+    return lexer.tokens
+
+def js_depth_change(token: str, kind: str) -> int:
+    """Bracket nesting change caused by a token (template literals count as braces)"""
+    if kind != 'punct' and not (kind == 'string' and token[0] == '}'):
+        return 0
+    return (token[-1] in '([{') - (token[0] in ')]}')
+
+def top_level_declarations(tokens: List[Tuple[str, str]]) -> Set[str]:
+    """Names a classic script declares in the global scope (may over-approximate)"""
+    names: Set[str] = set()
+    depth = 0
+    declaring = False   # inside a top-level var/let/const list
+    pattern = False     # inside a destructuring pattern of that list
+    for index, (token, kind) in enumerate(tokens):
+        prev = tokens[index - 1][0] if index else ''
+        starts_binding = declaring and (prev in JS_DECLARATION_KEYWORDS or prev == ',')
+        if depth == 0:
+            if token == ';':
+                declaring = False
+            elif kind == 'word' and token in JS_DECLARATION_KEYWORDS:
+                declaring = True
+            elif kind == 'word' and starts_binding:
+                names.add(token)
+            elif token in ('{', '[') and starts_binding:
+                pattern = True
+            elif kind == 'word' and token in ('class', 'function'):
+                nxt = tokens[index + 1:index + 3]
+                if nxt and nxt[0][0] == '*':
+                    nxt = nxt[1:]
+                if nxt and nxt[0][1] == 'word':
+                    names.add(nxt[0][0])
+        elif pattern and kind == 'word' and prev in ('{', '[', ',', ':', '...'):
+            names.add(token)
+        depth += js_depth_change(token, kind)
+        if depth == 0:
+            pattern = False
+    return names
+
+def js_imports(tokens: List[Tuple[str, str]]) -> Tuple[bool, List[str]]:
+    """Return whether a script uses ES module syntax, and the specifiers it imports or requires"""
+    is_module = False
+    specifiers = []
+    depth = 0
+    for index, (token, kind) in enumerate(tokens):
+        following = tokens[index + 1:index + 3]
+        prev = tokens[index - 1][0] if index else ''
+        if kind == 'word' and prev != '.':
+            if token in ('import', 'require') and len(following) == 2 and following[0][0] == '(' \
+                    and following[1][1] == 'string':
+                specifiers.append(following[1][0][1:-1])
+            elif token in ('import', 'export') and depth == 0 and following and following[0][0] not in ('(', '.'):
+                is_module = True
+                for offset, (later, later_kind) in enumerate(tokens[index + 1:index + 200], index + 1):
+                    if later_kind == 'string':
+                        if token == 'import' or tokens[offset - 1][0] == 'from':
+                            specifiers.append(later[1:-1])
+                        break
+                    if later in (';', '(', '='):
+                        break
+        depth += js_depth_change(token, kind)
+    return is_module, specifiers
+
+HTML_WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+HTML_VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+])
+# Whitespace next to these is rendered; next to anything else it can go
+HTML_INLINE_ELEMENTS = frozenset([
+    'a', 'abbr', 'audio', 'b', 'bdi', 'bdo', 'big', 'br', 'button', 'canvas', 'cite', 'code',
+    'data', 'del', 'dfn', 'em', 'font', 'i', 'iframe', 'img', 'input', 'ins', 'kbd', 'label',
+    'mark', 'meter', 'object', 'output', 'picture', 'progress', 'q', 's', 'samp', 'select',
+    'small', 'span', 'strike', 'strong', 'sub', 'sup', 'svg', 'text', 'textarea', 'textpath',
+    'time', 'tspan', 'tt', 'u', 'var', 'video', 'wbr'
+])
+HTML_PRESERVE_WHITESPACE = frozenset(['pre', 'textarea', 'listing', 'plaintext'])
+HTML_BOOLEAN_ATTRIBUTES = frozenset([
+    'allowfullscreen', 'async', 'autofocus', 'autoplay', 'checked', 'controls', 'default',
+    'defer', 'disabled', 'formnovalidate', 'inert', 'ismap', 'itemscope', 'loop', 'multiple',
+    'muted', 'nomodule', 'novalidate', 'open', 'playsinline', 'readonly', 'required',
+    'reversed', 'selected'
+])
+HTML_ATTRIBUTE = re.compile(r'''([^\s/>][^\s/=>]*)(?:\s*=\s*('[^']*'|"[^"]*"|[^\s>]*))?''')
+HTML_JS_TYPES = frozenset(['', 'text/javascript', 'application/javascript', 'module', 'text/ecmascript'])
+HTML_JSON_TYPES = frozenset(['application/json', 'application/ld+json', 'importmap'])
+HTML_P_CLOSERS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hgroup', 'hr',
+    'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul'
+])
+# End tag -> (start tags that may directly follow it, whether the parent's end tag may follow it)
+HTML_OPTIONAL_END_TAGS = {
+    'li': (frozenset(['li']), True),
+    'dt': (frozenset(['dt', 'dd']), False),
+    'dd': (frozenset(['dt', 'dd']), True),
+    'p': (HTML_P_CLOSERS, True),
+    'option': (frozenset(['option', 'optgroup']), True),
+    'optgroup': (frozenset(['optgroup']), True),
+    'tr': (frozenset(['tr']), True),
+    'td': (frozenset(['td', 'th']), True),
+    'th': (frozenset(['td', 'th']), True),
+    'thead': (frozenset(['tbody', 'tfoot']), False),
+    'tbody': (frozenset(['tbody', 'tfoot']), True),
+    'tfoot': (frozenset(), True),
+    'head': (frozenset(['body']), False),
+}
+# </p> must stay when the paragraph closes one of these
+HTML_TRANSPARENT_PARENTS = frozenset(['a', 'audio', 'del', 'ins', 'map', 'noscript', 'video'])
+# <img> attributes that mean nothing on the <svg> replacing a sprited icon
+HTML_IMAGE_ONLY_ATTRIBUTES = frozenset([
+    'src', 'alt', 'srcset', 'sizes', 'loading', 'decoding', 'crossorigin', 'referrerpolicy',
+    'fetchpriority', 'ismap', 'usemap'
+])
+
+class HTMLMinifier(HTMLParser):
+    """Event-driven HTML minifier that leaves whitespace-sensitive content alone"""
+    
+    def __init__(self, webp_images: Optional[Dict[str, str]] = None, inline_assets: Optional[Dict[str, str]] = None,
+                 sprite_icons: Optional[Dict[str, List[str]]] = None):
+        super().__init__(convert_charrefs=False)
+        # Image URLs as this page writes them -> WebP URL, data URI or [sprite URL, viewBox, width, height]
+        self.webp_images = webp_images or {}
+        self.inline_assets = inline_assets or {}
+        self.sprite_icons = sprite_icons or {}
+        self.output: List[str] = []
+        self.stack: List[str] = []
+        self.text: List[str] = []           # character data since the last tag
+        self.pending_end: Optional[str] = None
+        self.prev_inline = False
+        self.preserve = 0                   # depth inside <pre>/<textarea>
+        self.raw_tag: Optional[str] = None  # <script>/<style> whose body is being collected
+        self.raw_type = ''
+    
+    def minify(self, content: str) -> str:
+        self.feed(content)
+        self.close()
+        self.flush(None, None, inline=False)
+        return ''.join(self.output).strip()
+    
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.start_tag(tag, attrs, self_closing=False)
+    
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.start_tag(tag, attrs, self_closing=True)
+    
+    def start_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool) -> None:
+        self.flush('start', tag, inline=tag in HTML_INLINE_ELEMENTS)
+        end = '/>' if self_closing and tag not in HTML_VOID_ELEMENTS else '>'
+        attributes = self.raw_attributes(self.get_starttag_text())
+        markup = None
+        if tag == 'img' and 'picture' not in self.stack:
+            markup = self.rewrite_image(dict(attrs), attributes)
+        self.output.append(markup or f"<{tag}{self.format_attributes(attributes)}{end}")
+        self.prev_inline = tag in HTML_INLINE_ELEMENTS
+        if self_closing or tag in HTML_VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        if tag in HTML_PRESERVE_WHITESPACE:
+            self.preserve += 1
+        if tag in ('script', 'style'):
+            self.raw_tag = tag
+            self.raw_type = (dict(attrs).get('type') or '').strip().lower()
+    
+    def handle_endtag(self, tag: str) -> None:
+        if self.raw_tag == tag:
+            self.output.append(self.minify_raw(''.join(self.text)))
+            self.text = []
+            self.raw_tag = None
+        else:
+            self.flush('end', tag, inline=tag in HTML_INLINE_ELEMENTS)
+        if tag in self.stack:
+            while self.stack.pop() != tag:
+                pass
+        if tag in HTML_PRESERVE_WHITESPACE and self.preserve:
+            self.preserve -= 1
+        
+        if tag in HTML_OPTIONAL_END_TAGS or tag in ('body', 'html'):
+            # Decided once the next tag shows whether it can be left out
+            self.pending_end = tag
+        else:
+            self.output.append(f"</{tag}>")
+        self.prev_inline = tag in HTML_INLINE_ELEMENTS
+    
+    def handle_data(self, data: str) -> None:
+        if self.pending_end and not self.raw_tag and HTML_WHITESPACE.sub('', data):
+            self.emit_pending_end()
+        self.text.append(data)
+    
+    def handle_entityref(self, name: str) -> None:
+        self.handle_data(f"&{name};")
+    
+    def handle_charref(self, name: str) -> None:
+        self.handle_data(f"&#{name};")
+    
+    def handle_comment(self, data: str) -> None:
+        if data.startswith('[if') or data.endswith('<![endif]'):
+            # Conditional comments are markup for old IE
+            self.flush('comment', None, inline=False)
+            self.output.append(f"<!--{data}-->")
+    
+    def handle_decl(self, decl: str) -> None:
+        self.flush('decl', None, inline=False)
+        self.output.append(f"<!{'doctype html' if decl.lower() == 'doctype html' else decl}>")
+    
+    def handle_pi(self, data: str) -> None:
+        self.flush('pi', None, inline=False)
+        self.output.append(f"<?{data}>")
+    
+    def unknown_decl(self, data: str) -> None:
+        self.flush('decl', None, inline=False)
+        self.output.append(f"<![{data}]>")
+    
+    def flush(self, kind: Optional[str], tag: Optional[str], inline: bool) -> None:
+        """Resolve a pending optional end tag and the text before the next event"""
+        text = ''.join(self.text)
+        self.text = []
+        if self.pending_end:
+            if self.can_omit_end(self.pending_end, kind, tag):
+                self.pending_end = None
+                text = ''
+            else:
+                self.emit_pending_end()
+        if not text:
+            return
+        if self.preserve:
+            self.output.append(text)
+            self.prev_inline = True
+            return
+        text = HTML_WHITESPACE.sub(' ', text)
+        if not self.prev_inline:
+            text = text.lstrip(' ')
+        if not inline:
+            text = text.rstrip(' ')
+        if text:
+            self.output.append(text)
+            self.prev_inline = True
+    
+    def emit_pending_end(self) -> None:
+        self.output.append(f"</{self.pending_end}>")
+        self.pending_end = None
+    
+    def can_omit_end(self, end_tag: str, kind: Optional[str], tag: Optional[str]) -> bool:
+        """Whether an end tag may be left out given what follows it"""
+        if end_tag in ('body', 'html'):
+            return kind is None or kind == 'end' and tag == 'html'
+        followers, at_parent_end = HTML_OPTIONAL_END_TAGS[end_tag]
+        if kind == 'start':
+            return tag in followers
+        if kind == 'end' and at_parent_end:
+            return end_tag != 'p' or tag not in HTML_TRANSPARENT_PARENTS
+        return False
+    
+    def rewrite_image(self, attrs: Dict[str, Optional[str]], attributes: List[Tuple[str, Optional[str]]]) -> Optional[str]:
+        """Replace a plain <img> with a sprite reference, a data URI or a <picture> offering WebP"""
+        src = attrs.get('src') or ''
+        if 'srcset' in attrs:
+            return None
+        icon = lookup_url(self.sprite_icons, src)
+        if icon:
+            href, view_box, width, height = icon
+            kept = [(name, value) for name, value in attributes if name.lower() not in HTML_IMAGE_ONLY_ATTRIBUTES]
+            if not any(name.lower() in ('width', 'height') for name, _ in kept):
+                kept += [('width', width), ('height', height)]
+            alt = next((value for name, value in attributes if name.lower() == 'alt'), None)
+            kept += [('viewBox', view_box)] + ([('role', 'img'), ('aria-label', alt)] if alt else [('aria-hidden', 'true')])
+            return f'<svg{self.format_attributes(kept)}><use href="{href}"/></svg>'
+        uri = lookup_url(self.inline_assets, src)
+        if uri:
+            inlined = [(name, uri if name.lower() == 'src' else value) for name, value in attributes]
+            return f"<img{self.format_attributes(inlined)}>"
+        webp = lookup_url(self.webp_images, src)
+        if webp:
+            return f'<picture><source srcset="{webp}" type="image/webp"><img{self.format_attributes(attributes)}></picture>'
+        return None
+    
+    @staticmethod
+    def raw_attributes(start_tag: str) -> List[Tuple[str, Optional[str]]]:
+        """Attributes of a raw start tag with their values exactly as written"""
+        body = re.sub(r'^<[^\s/>]+', '', start_tag).rstrip('>').rstrip()
+        if body.endswith('/'):
+            body = body[:-1]
+        attributes = []
+        for match in HTML_ATTRIBUTE.finditer(body):
+            name, value = match.group(1), match.group(2)
+            if value and value[0] in '"\'':
+                value = value[1:-1]
+            attributes.append((name, value))
+        return attributes
+    
+    @staticmethod
+    def format_attributes(attributes: List[Tuple[str, Optional[str]]]) -> str:
+        """Serialize attributes with the shortest safe quoting, collapsing boolean ones"""
+        parts = []
+        for name, value in attributes:
+            if value is None or (name.lower() in HTML_BOOLEAN_ATTRIBUTES and value.lower() in ('', name.lower())):
+                parts.append(f" {name}")
+            elif '"' in value:
+                parts.append(f" {name}='{value}'")
+            else:
+                parts.append(f' {name}="{value}"')
+        return ''.join(parts)
+    
+    def minify_raw(self, body: str) -> str:
+        """Hand inline script and style bodies to the matching minifier"""
+        try:
+            if self.raw_tag == 'style' and self.raw_type in ('', 'text/css'):
+                return minify_css_content(body, inline_assets=self.inline_assets)
+            if self.raw_tag == 'script' and self.raw_type in HTML_JS_TYPES:
+                minified = minify_js_content(body)
+                # Never let the minified code close the element early
+                return body if '</script' in minified.lower() or '<!--' in minified else minified
+            if self.raw_tag == 'script' and self.raw_type in HTML_JSON_TYPES:
+                return json.dumps(json.loads(body), separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+        except (MinifyError, ValueError):
+            pass
+        # JSX, templates and anything unparseable are kept verbatim
+        return body
+
+def minify_html_content(content: str, webp_images: Optional[Dict[str, str]] = None,
+                        inline_assets: Optional[Dict[str, str]] = None,
+                        sprite_icons: Optional[Dict[str, List[str]]] = None) -> str:
+    """Minify an HTML document"""
+    return HTMLMinifier(webp_images, inline_assets, sprite_icons).minify(content)
+
+SVG_TOKEN = re.compile(r'''
+    (?P<comment><!--.*?-->)
+  | (?P<cdata><!\[CDATA\[.*?\]\]>)
+  | (?P<doctype><!(?i:doctype)[^\[>]*(?:\[.*?\]\s*)?>)
+  | (?P<pi><\?.*?\?>)
+  | (?P<end></[^\s>]+\s*>)
+  | (?P<start><[^\s/>!?][^\s/>]*(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*/?>)
+  | (?P<text>[^<]+)
+''', re.VERBOSE | re.DOTALL)
+SVG_START_TAG = re.compile(r'<([^\s/>]+)(.*?)\s*(/?)>$', re.DOTALL)
+SVG_ATTRIBUTE = re.compile(r'''([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+SVG_NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+SVG_PATH_COMMAND = re.compile(r'\s*([A-DF-Za-df-z])\s*')
+# Namespaces drawing editors add for their own bookkeeping
+SVG_EDITOR_PREFIXES = frozenset(['inkscape', 'sodipodi', 'sketch', 'serif'])
+SVG_DROPPED_ELEMENTS = frozenset(['metadata'])
+# Whitespace inside these is content
+SVG_TEXT_ELEMENTS = frozenset(['text', 'tspan', 'textPath', 'title', 'desc', 'style', 'script'])
+SVG_NUMERIC_ATTRIBUTES = frozenset([
+    'd', 'points', 'transform', 'gradientTransform', 'patternTransform', 'viewBox',
+    'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy',
+    'width', 'height', 'stroke-width'
+])
+
+def minify_svg_content(content: str, precision: int = 3) -> str:
+    """Strip comments, editor metadata and surplus numeric precision from an SVG document"""
+    output: List[str] = []
+    stack: List[str] = []
+    skip_depth = 0      # depth inside an element that is dropped with its children
+    pos = 0
+    while pos < len(content):
+        match = SVG_TOKEN.match(content, pos)
+        if not match:
+            raise MinifyError(f"unexpected markup at offset {pos}")
+        pos = match.end()
+        kind, token = match.lastgroup, match.group(0)
+        
+        if kind == 'start':
+            name, attributes, self_closing = SVG_START_TAG.match(token).groups()
+            if skip_depth or name in SVG_DROPPED_ELEMENTS or name.split(':')[0] in SVG_EDITOR_PREFIXES:
+                skip_depth += not self_closing
+                continue
+            output.append(f"<{name}{svg_attributes(attributes, precision)}{'/' if self_closing else ''}>")
+            if not self_closing:
+                stack.append(name)
+        elif kind == 'end':
+            if skip_depth:
+                skip_depth -= 1
+                continue
+            name = token[2:-1].strip()
+            if stack and stack[-1] == name:
+                stack.pop()
+            output.append(f"</{name}>")
+        elif skip_depth or kind == 'comment':
+            continue
+        elif kind == 'pi':
+            # The XML declaration only restates the UTF-8 default
+            if not token.startswith('<?xml '):
+                output.append(token)
+        elif kind == 'doctype':
+            # Only an internal subset (entity definitions) carries meaning
+            if '[' in token:
+                output.append(token)
+        elif kind == 'cdata' or any(name in SVG_TEXT_ELEMENTS for name in stack):
+            output.append(token)
+        elif token.strip():
+            output.append(token.strip())
+    if skip_depth or stack:
+        raise MinifyError("unbalanced SVG elements")
+    return ''.join(output)
+
+def svg_attributes(attributes: str, precision: int) -> str:
+    """Rewrite SVG attributes without editor namespaces and with numbers rounded to `precision` decimals"""
+    parts = []
+    for match in SVG_ATTRIBUTE.finditer(attributes):
+        name = match.group(1)
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        prefix, _, local = name.partition(':')
+        if prefix in SVG_EDITOR_PREFIXES or (prefix == 'xmlns' and local in SVG_EDITOR_PREFIXES):
+            continue
+        if name in SVG_NUMERIC_ATTRIBUTES:
+            value = SVG_NUMBER.sub(lambda number: round_svg_number(number.group(0), precision), value)
+            value = re.sub(r'\s*,\s*|\s+', ' ', value).strip()
+            if name in ('d', 'points'):
+                value = SVG_PATH_COMMAND.sub(r'\1', value).replace(' -', '-')
+        parts.append(format_svg_attribute(name, value))
+    return ''.join(parts)
+
+def format_svg_attribute(name: str, value: str) -> str:
+    quote = "'" if '"' in value else '"'
+    return f" {name}={quote}{value}{quote}"
+
+def round_svg_number(number: str, precision: int) -> str:
+    """Shortest spelling of a number rounded to `precision` decimals"""
+    if 'e' in number or 'E' in number:
+        return number
+    text = f"{round(float(number), precision):.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text == '-0':
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+def svg_symbol(content: str, symbol_id: str) -> Optional[Tuple[str, Dict[str, str], str, str, str]]:
+    """Turn a standalone SVG into a sprite <symbol>: (markup, namespace declarations, viewBox, width, height)"""
+    match = SVG_ROOT.match(content)
+    if not match:
+        return None
+    attributes = {
+        attribute.group(1): attribute.group(2) if attribute.group(2) is not None else attribute.group(3)
+        for attribute in SVG_ATTRIBUTE.finditer(match.group(1))
+    }
+    width, height = (re.sub(r'px$', '', attributes.get(name, '').strip()) for name in ('width', 'height'))
+    sized = all(re.fullmatch(r'\d*\.?\d+', size) for size in (width, height))
+    view_box = attributes.get('viewBox') or (f"0 0 {width} {height}" if sized else '')
+    box = re.split(r'[\s,]+', view_box.strip())
+    if len(box) != 4:
+        # Without a viewBox the symbol could not scale to the size the page gives it
+        return None
+    if not sized:
+        width, height = box[2], box[3]
+    
+    # Symbols share one document, so ids are made unique per icon
+    body = match.group(2)
+    ids = set(re.findall(r'\bid="([^"]+)"', body))
+    body = SVG_ID_REFERENCE.sub(
+        lambda reference: reference.group(1) + (
+            f"{symbol_id}-{reference.group(2)}" if reference.group(2) in ids else reference.group(2)
+        ),
+        body
+    )
+    namespaces = {name: value for name, value in attributes.items() if name.startswith('xmlns:')}
+    extra = ''.join(
+        format_svg_attribute(name, value) for name, value in attributes.items()
+        if name not in SVG_ROOT_ONLY_ATTRIBUTES and not name.startswith('xmlns:')
+    )
+    markup = f'<symbol id="{symbol_id}" viewBox="{view_box}"{extra}>{body}</symbol>'
+    return markup, namespaces, view_box, width, height
+
+MINIFIERS = {
+    "html": minify_html_content,
+    "css": minify_css_content,
+    "js": minify_js_content,
+}
+
+def compress_file(file_path: Path, settings: Dict) -> List[Path]:
+    """Write precompressed variants of an output file, keeping only those smaller than the original"""
+    if file_path.suffix not in COMPRESSIBLE_EXTENSIONS:
+        return []
+    
+    data = file_path.read_bytes()
+    variants = []
+    for encoding, (suffix, encoder, _, _) in ENCODERS.items():
+        variant_path = file_path.with_suffix(file_path.suffix + suffix)
+        compressed = encoder(data, settings) if encoding in settings["encodings"] else None
+        if compressed is not None and len(compressed) < len(data):
+            variant_path.write_bytes(compressed)
+            variants.append(variant_path)
+        elif variant_path.exists():
+            # Disabled or not worth it: drop variants left by earlier runs
+            variant_path.unlink()
+    return variants
+
+def recompress_png(data: bytes) -> bytes:
+    """Losslessly recompress a PNG: one IDAT at the highest zlib level, without text/time metadata"""
+    if not data.startswith(PNG_SIGNATURE):
+        raise MinifyError("not a PNG file")
+    chunks: List[Tuple[bytes, Optional[bytes]]] = []
+    image_data = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if chunk_type == b'IDAT':
+            if not image_data:
+                chunks.append((chunk_type, None))
+            image_data.append(body)
+        elif chunk_type not in PNG_METADATA_CHUNKS:
+            chunks.append((chunk_type, body))
+        if chunk_type == b'IEND':
+            break
+    if not image_data:
+        raise MinifyError("PNG has no image data")
+    try:
+        pixels = zlib.decompress(b''.join(image_data))
+    except zlib.error as e:
+        raise MinifyError(f"corrupt PNG image data: {e}")
+    
+    output = [PNG_SIGNATURE]
+    for chunk_type, body in chunks:
+        if body is None:
+            body = zlib.compress(pixels, 9)
+        output.append(struct.pack('>I', len(body)) + chunk_type + body + struct.pack('>I', zlib.crc32(chunk_type + body)))
+    return b''.join(output)
+
+def reencode_jpeg(data: bytes, quality: int) -> bytes:
+    """Re-encode a JPEG as an optimized progressive JPEG, keeping its colour profile and EXIF data"""
+    with Image.open(BytesIO(data)) as image:
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True, subsampling="keep",
+                   icc_profile=image.info.get("icc_profile"), exif=image.info.get("exif", b""))
+    return buffer.getvalue()
+
+def encode_webp(data: bytes, lossless: bool, settings: Dict) -> Optional[bytes]:
+    """WebP version of a still raster image, or None for animations"""
+    with Image.open(BytesIO(data)) as image:
+        if getattr(image, "is_animated", False):
+            return None
+        # WebP copies carry no EXIF, so bake the orientation into the pixels
+        upright = ImageOps.exif_transpose(image)
+        has_alpha = upright.mode in ('RGBA', 'LA', 'PA') or 'transparency' in upright.info
+        buffer = BytesIO()
+        upright.convert('RGBA' if has_alpha else 'RGB').save(
+            buffer, "WEBP", lossless=lossless, quality=100 if lossless else settings["webp_quality"],
+            method=6, icc_profile=image.info.get("icc_profile")
+        )
+    return buffer.getvalue()
+
+def optimize_image(source_file: Path, data: bytes, settings: Dict) -> Tuple[bytes, Optional[bytes], Optional[str]]:
+    """Optimize one image, returning (optimized bytes, WebP variant or None, warning)"""
+    suffix = source_file.suffix.lower()
+    optimized, warning = data, None
+    try:
+        if suffix == '.svg':
+            optimized = minify_svg_content(data.decode('utf-8'), settings["svg_precision"]).encode('utf-8')
+        elif suffix == '.png':
+            optimized = recompress_png(data)
+        elif suffix in ('.jpg', '.jpeg'):
+            if Image is None:
+                warning = "JPEG re-encoding needs Pillow (pip install Pillow)"
+            else:
+                optimized = reencode_jpeg(data, settings["jpeg_quality"])
+    except (MinifyError, UnicodeDecodeError, OSError) as e:
+        # Ship the source untouched rather than risk a broken image
+        optimized, warning = data, str(e)
+    if len(optimized) >= len(data):
+        optimized = data
+    
+    webp = None
+    if settings["webp"] and suffix in WEBP_SOURCE_EXTENSIONS and not warning:
+        try:
+            webp = encode_webp(data, suffix == '.png', settings)
+        except OSError:
+            webp = None
+        if webp is not None and len(webp) >= len(optimized):
+            webp = None
+    return optimized, webp, warning
+
+def process_asset(job: Dict) -> Dict:
+    """Minify or optimize a single asset (runs inside a worker process); compression comes later"""
+    source_file = Path(job["source"])
+    output_file = Path(job["output"])
+    result = {"key": job["key"], "name": source_file.name, "kind": job["kind"]}
+    
+    try:
+        data = source_file.read_bytes()
+        # Outputs that depend on other files (e.g. purged CSS) salt the hash with that context
+        result["digest"] = BuildCache.digest(data + job.get("salt", "").encode())
+        if result["digest"] == job.get("cached_digest"):
+            result["status"] = "cached"
+            return result
+        
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        minifier = MINIFIERS.get(job["kind"])
+        if minifier:
+            content = data.decode('utf-8')
+            try:
+                content = minifier(content, **job.get("options", {}))
+            except MinifyError as e:
+                # Ship the source untouched rather than risk broken output
+                result["warning"] = str(e)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:
+            optimized, webp, warning = optimize_image(source_file, data, job["settings"])
+            output_file.write_bytes(optimized)
+            if warning:
+                result["warning"] = warning
+            if webp is not None:
+                webp_file = output_file.with_name(output_file.name + '.webp')
+                webp_file.write_bytes(webp)
+                result["webp"] = str(webp_file)
+            result["savings"] = {
+                "original": len(data),
+                "optimized": len(optimized),
+                "webp": len(webp) if webp is not None else None
+            }
+        
+        result.update({
+            "status": "processed",
+            "outputs": [str(output_file)],
+            "metrics": {"files_processed": 1}
+        })
+    except Exception as e:
+        result.update({"status": "failed", "error": str(e)})
+    
+    return result
+
+def compress_output(job: Dict) -> Dict:
+    """Write the precompressed variants of one final output (runs inside a worker process)"""
+    result = {"key": job["key"]}
+    try:
+        result["variants"] = [str(variant) for variant in compress_file(Path(job["output"]), job["settings"])]
+    except Exception as e:
+        result["error"] = str(e)
+    return result
 
 class NocturneOptimizer:
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", use_cache: bool = True, jobs: int = 1,
+                 settings: Optional[Dict] = None, excludes: Optional[List[str]] = None):
         self.base_path = Path(base_path)
         self.frontend_path = self.base_path / "frontend"
         self.build_path = self.base_path / "build"
         self.optimized_path = self.base_path / "optimized"
         
+        # Source files under frontend/ by kind, from one walk that honours .gitignore and excludes
+        self.excludes = DEFAULT_EXCLUDES + list(excludes or [])
+        self.sources: Dict[str, List[Path]] = {}
+        self.source_size = 0
+        
+        # Optimizer settings (part of the build cache key)
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.settings["encodings"] = self.available_encodings(self.settings["encodings"])
+        if self.settings["webp"] and Image is None:
+            print("  ⚠️ WebP output unavailable (pip install Pillow)")
+            self.settings["webp"] = False
+        
+        # Incremental build state
+        self.use_cache = use_cache
+        self.build_cache = BuildCache(self.base_path / CACHE_FILE, self.settings)
+        
+        # Fingerprinted asset names: logical output path -> current output path
+        self.physical_names: Dict[str, str] = {}
+        self.fingerprints: Dict[str, str] = {}
+        
+        # Script bundles: bundle logical path -> member logical paths in load order
+        self.bundles: Dict[str, List[str]] = {}
+        self.script_cache: Dict[str, Optional[Dict]] = {}
+        
+        # Sources reachable from the entry page (None = ship everything)
+        self.entry: Optional[Path] = None
+        self.reachable: Optional[Set[Path]] = None
+        self.unreachable: List[str] = []
+        
+        # Minifier arguments for CSS when unused selectors are purged
+        self.css_purge_options: Dict = {}
+        
+        # Raster images with a smaller WebP variant: image logical path -> WebP logical path
+        self.webp_images: Dict[str, str] = {}
+        
+        # Small images embedded where they are used: logical path -> data URI
+        self.inline_assets: Dict[str, str] = {}
+        # SVG icons merged into the sprite sheet: logical path -> [symbol id, viewBox, width, height]
+        self.sprite_icons: Dict[str, List[str]] = {}
+        
+        # Worker processes for the asset pipeline (0 = one per CPU)
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        
         # Performance metrics
         self.metrics = {
             "original_size": 0,
             "optimized_size": 0,
             "compression_ratio": 0,
             "files_processed": 0,
+            "files_cached": 0,
+            "files_compressed": 0,
+            "files_removed": 0,
+            "files_bundled": 0,
+            "files_unreachable": 0,
+            "files_inlined": 0,
             "time_taken": 0
         }
         
@@ -36,38 +1158,71 @@ class NocturneOptimizer:
         """Run all optimization steps"""
         try:
             print("🚀 Starting performance optimization...")
+            start_time = time.perf_counter()
             
-            # Create optimized directory
-            if self.optimized_path.exists():
+            # Create optimized directory, reusing previous outputs when caching
+            if not self.use_cache and self.optimized_path.exists():
                 shutil.rmtree(self.optimized_path)
-            self.optimized_path.mkdir(parents=True)
+            self.optimized_path.mkdir(parents=True, exist_ok=True)
+            if self.use_cache:
+                self.build_cache.load()
+            
+            # Only files the deployed page can load are optimized
+            if self.settings["prune_unreachable"]:
+                print("🔍 Tracing assets reachable from the entry page...")
+                self.find_reachable()
+            
+            # Steps 1-4: Collect HTML, CSS, JavaScript and image jobs
+            self.collect_sources()
+            print("📄 Collecting HTML...")
+            jobs = self.minify_html()
+            print("🎨 Collecting CSS...")
+            jobs += self.minify_css()
+            print("⚡ Collecting JavaScript...")
+            jobs += self.minify_js()
+            print("🖼️ Collecting images...")
+            jobs += self.optimize_images()
+            if self.unreachable:
+                self.metrics["files_unreachable"] = len(self.unreachable)
+                print(f"✂️ Skipping {len(self.unreachable)} files the entry page never loads:")
+                for name in sorted(self.unreachable):
+                    print(f"  ✂️ {name}")
+            if self.settings["purge_css"]:
+                self.configure_css_purge(jobs)
             
-            # Step 1: Minify HTML
-            print("📄 Minifying HTML...")
-            self.minify_html()
+            # Step 5: Minify each file in a single job (compression waits for step 8); images go
+            # first so pages and stylesheets can embed, sprite or offer WebP variants of what they produced
+            print(f"📦 Processing {len(jobs)} files with {min(self.jobs, max(len(jobs), 1))} worker(s)...")
+            self.process_jobs([job for job in jobs if job["kind"] == "image"])
+            self.configure_image_references(jobs)
+            self.process_jobs([job for job in jobs if job["kind"] != "image"])
             
-            # Step 2: Minify CSS
-            print("🎨 Minifying CSS...")
-            self.minify_css()
+            # Step 6: Concatenate classic scripts into per-page bundles
+            if self.settings["bundle"]:
+                print("🧩 Bundling scripts...")
+                self.bundle_scripts()
             
-            # Step 3: Minify JavaScript
-            print("⚡ Minifying JavaScript...")
-            self.minify_js()
+            # Step 7: Fingerprint asset names and rewrite references
+            if self.settings["fingerprint"]:
+                print("🔖 Fingerprinting assets...")
+                self.fingerprint_assets()
             
-            # Step 4: Optimize images
-            print("🖼️ Optimizing images...")
-            self.optimize_images()
+            # Step 8: Precompress outputs once their final names and contents are settled
+            print("🗜️ Compressing outputs...")
+            self.compress_outputs()
             
-            # Step 5: Generate compressed files
-            print("📦 Generating compressed files...")
-            self.generate_compressed_files()
+            # Remove outputs of deleted sources and persist the cache
+            print("🧹 Pruning stale outputs...")
+            self.prune_stale_outputs()
+            self.build_cache.save()
             
-            # Step 6: Generate manifest
+            # Step 9: Generate manifest
             print("📋 Generating optimization manifest...")
             self.generate_manifest()
             
-            # Step 7: Calculate metrics
+            # Step 10: Calculate metrics
             self.calculate_metrics()
+            self.metrics["time_taken"] = round(time.perf_counter() - start_time, 3)
             
             print("\n✅ Performance optimization complete!")
             self.print_metrics()
@@ -78,187 +1233,724 @@ class NocturneOptimizer:
             print(f"❌ Optimization failed: {e}")
             return False
     
-    def minify_html(self) -> None:
-        """Minify HTML files"""
-        html_files = list(self.frontend_path.glob("*.html"))
+    def collect_sources(self) -> None:
+        """Walk frontend/ once, sorting files into pages (top level only), stylesheets, scripts and images"""
+        self.sources = {"html": [], "css": [], "js": [], "image": []}
+        self.source_size = 0
+        for walked in FileWalker(self.frontend_path, excludes=self.excludes):
+            self.source_size += walked.size
+            name = os.path.basename(walked.path)
+            if fnmatch.fnmatchcase(name, "*.html"):
+                if '/' not in walked.relative:
+                    self.sources["html"].append(Path(walked.path))
+            elif fnmatch.fnmatchcase(name, "*.css"):
+                self.sources["css"].append(Path(walked.path))
+            elif fnmatch.fnmatchcase(name, "*.js"):
+                self.sources["js"].append(Path(walked.path))
+            elif any(fnmatch.fnmatchcase(name, ext) for ext in IMAGE_EXTENSIONS):
+                self.sources["image"].append(Path(walked.path))
+    
+    def minify_html(self) -> List[Dict]:
+        """Queue HTML files for minification"""
+        html_files = self.select_sources(self.sources["html"])
+        return [self.make_job("html", html_file) for html_file in html_files]
+    
+    def minify_css(self) -> List[Dict]:
+        """Queue CSS files for minification"""
+        css_files = self.select_sources(self.sources["css"])
+        return [self.make_job("css", css_file) for css_file in css_files]
+    
+    def minify_js(self) -> List[Dict]:
+        """Queue JavaScript files for minification"""
+        js_files = self.select_sources(self.sources["js"])
+        return [self.make_job("js", js_file) for js_file in js_files]
+    
+    def optimize_images(self) -> List[Dict]:
+        """Queue image files for optimization"""
+        image_files = self.select_sources(self.sources["image"])
+        return [self.make_job("image", image_file) for image_file in image_files]
+    
+    def find_reachable(self) -> None:
+        """Walk <script>/<link> tags, CSS url()/@import and JS imports outward from the entry page"""
+        entry = self.settings["entry"]
+        candidates = [entry] if entry else ENTRY_CANDIDATES
+        self.entry = next((self.frontend_path / name for name in candidates if (self.frontend_path / name).is_file()), None)
+        if self.entry is None:
+            print(f"  ⚠️ No entry page found ({', '.join(candidates)}); optimizing every file")
+            return
         
-        for html_file in html_files:
-            try:
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Remove comments
-                content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
-                
-                # Remove extra whitespace
-                content = re.sub(r'\s+', ' ', content)
-                
-                # Remove whitespace around tags
-                content = re.sub(r'>\s+<', '><', content)
-                
-                # Remove leading/trailing whitespace
-                content = content.strip()
-                
-                # Save minified version
-                output_file = self.optimized_path / html_file.name
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                self.metrics["files_processed"] += 1
-                print(f"  ✅ Minified {html_file.name}")
-                
-            except Exception as e:
-                print(f"  ❌ Failed to minify {html_file.name}: {e}")
-    
-    def minify_css(self) -> None:
-        """Minify CSS files"""
-        css_files = list(self.frontend_path.glob("**/*.css"))
-        
-        for css_file in css_files:
-            try:
-                with open(css_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Remove comments
-                content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-                
-                # Remove extra whitespace
-                content = re.sub(r'\s+', ' ', content)
-                
-                # Remove whitespace around selectors and properties
-                content = re.sub(r'\s*{\s*', '{', content)
-                content = re.sub(r'\s*}\s*', '}', content)
-                content = re.sub(r'\s*:\s*', ':', content)
-                content = re.sub(r'\s*;\s*', ';', content)
-                
-                # Remove trailing semicolons
-                content = re.sub(r';}', '}', content)
-                
-                # Remove leading/trailing whitespace
-                content = content.strip()
-                
-                # Save minified version
-                output_dir = self.optimized_path / css_file.parent.relative_to(self.frontend_path)
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                output_file = output_dir / css_file.name
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                self.metrics["files_processed"] += 1
-                print(f"  ✅ Minified {css_file.name}")
-                
-            except Exception as e:
-                print(f"  ❌ Failed to minify {css_file.name}: {e}")
-    
-    def minify_js(self) -> None:
-        """Minify JavaScript files"""
-        js_files = list(self.frontend_path.glob("**/*.js"))
-        
-        for js_file in js_files:
-            try:
-                with open(js_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Remove single-line comments (but preserve URLs)
-                content = re.sub(r'//(?![/\*]).*$', '', content, flags=re.MULTILINE)
-                
-                # Remove multi-line comments
-                content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-                
-                # Remove extra whitespace
-                content = re.sub(r'\s+', ' ', content)
-                
-                # Remove whitespace around operators
-                content = re.sub(r'\s*([{}();,])\s*', r'\1', content)
-                
-                # Remove leading/trailing whitespace
-                content = content.strip()
-                
-                # Save minified version
-                output_dir = self.optimized_path / js_file.parent.relative_to(self.frontend_path)
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                output_file = output_dir / js_file.name
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                self.metrics["files_processed"] += 1
-                print(f"  ✅ Minified {js_file.name}")
-                
-            except Exception as e:
-                print(f"  ❌ Failed to minify {js_file.name}: {e}")
-    
-    def optimize_images(self) -> None:
-        """Optimize image files"""
-        image_files = []
-        for ext in ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg']:
-            image_files.extend(list(self.frontend_path.glob(f"**/{ext}")))
-        
-        for image_file in image_files:
-            try:
-                # For now, just copy images (would use image optimization library in production)
-                output_dir = self.optimized_path / image_file.parent.relative_to(self.frontend_path)
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                output_file = output_dir / image_file.name
-                shutil.copy2(image_file, output_file)
-                
-                self.metrics["files_processed"] += 1
-                print(f"  ✅ Optimized {image_file.name}")
-                
-            except Exception as e:
-                print(f"  ❌ Failed to optimize {image_file.name}: {e}")
-    
-    def generate_compressed_files(self) -> None:
-        """Generate gzipped versions of files"""
-        files_to_compress = []
-        
-        # Add all text files
-        for ext in ['*.html', '*.css', '*.js', '*.json', '*.svg']:
-            files_to_compress.extend(list(self.optimized_path.glob(f"**/{ext}")))
-        
-        for file_path in files_to_compress:
-            try:
-                # Generate gzipped version
-                gz_path = file_path.with_suffix(file_path.suffix + '.gz')
-                
-                with open(file_path, 'rb') as f_in:
-                    with gzip.open(gz_path, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-                
-                print(f"  ✅ Compressed {file_path.name}")
-                
-            except Exception as e:
-                print(f"  ❌ Failed to compress {file_path.name}: {e}")
+        frontend_root = self.frontend_path.resolve()
+        self.reachable = {self.entry.resolve()}
+        pending = [self.entry.resolve()]
+        while pending:
+            source_file = pending.pop()
+            if source_file.suffix not in TRACED_EXTENSIONS:
+                continue
+            content = source_file.read_text(encoding='utf-8', errors='replace')
+            references = [match.group(2) for match in SOURCE_REFERENCE.finditer(content)]
+            if source_file.suffix in ('.js', '.mjs'):
+                references += [match.group(2) for match in MODULE_SPECIFIER.finditer(content)]
+            for reference in references:
+                target = self.resolve_source(reference, source_file, frontend_root)
+                if target and target not in self.reachable:
+                    self.reachable.add(target)
+                    pending.append(target)
+        print(f"  ✅ {len(self.reachable)} file(s) reachable from {self.entry.relative_to(self.base_path)}")
+    
+    @staticmethod
+    def resolve_source(reference: str, referrer: Path, frontend_root: Path) -> Optional[Path]:
+        """Map a URL or import specifier to an existing source file under the frontend root"""
+        if ':' in reference or reference.startswith('//'):
+            return None
+        base = frontend_root if reference.startswith('/') else referrer.parent
+        target = Path(os.path.normpath(base / reference.lstrip('/')))
+        if frontend_root not in target.parents:
+            return None
+        for suffix in MODULE_SUFFIXES:
+            candidate = Path(str(target) + suffix)
+            if candidate.is_file():
+                return candidate
+        return None
+    
+    def select_sources(self, files) -> List[Path]:
+        """Keep the files the entry page can reach, remembering the ones left out"""
+        selected = []
+        for source_file in files:
+            if self.reachable is None or source_file.resolve() in self.reachable:
+                selected.append(source_file)
+            else:
+                self.unreachable.append(str(source_file.relative_to(self.frontend_path)))
+        return selected
+    
+    def configure_css_purge(self, jobs: List[Dict]) -> None:
+        """Collect the words of every shipped HTML/JS file so CSS jobs can drop selectors that never match"""
+        words: Set[str] = set()
+        sources = [job["source"] for job in jobs if job["kind"] in ("html", "js")]
+        for source in sources:
+            words.update(SOURCE_WORD.findall(Path(source).read_text(encoding='utf-8', errors='replace')))
+        used_words = sorted(words)
+        self.css_purge_options = {"used_words": used_words, "safelist": list(self.settings["css_safelist"])}
+        for job in jobs:
+            if job["kind"] == "css":
+                job.update(self.job_options("css", Path(job["source"])))
+        print(f"✂️ Purging unused CSS selectors against {len(used_words)} names from {len(sources)} HTML/JS files")
+    
+    def configure_image_references(self, jobs: List[Dict]) -> None:
+        """Once images are optimized, tell HTML/CSS jobs which ones to embed, sprite or offer as WebP"""
+        if self.settings["inline_limit"] > 0:
+            self.collect_inline_assets(jobs)
+        for job in jobs:
+            if job["kind"] in ("html", "css"):
+                job.update(self.job_options(job["kind"], Path(job["source"])))
+        if self.webp_images:
+            print(f"🖼️ Offering WebP variants of {len(self.webp_images)} image(s) through <picture>")
+    
+    def collect_inline_assets(self, jobs: List[Dict]) -> None:
+        """Pick the optimized images small enough to embed, merging those used as page icons into a sprite"""
+        small: Dict[str, bytes] = {}
+        for job in jobs:
+            entry = self.build_cache.entries.get(job["key"]) if job["kind"] == "image" else None
+            primary = self.primary_output(entry) if entry else None
+            if primary and Path(primary).suffix.lower() in DATA_URI_TYPES:
+                data = (self.optimized_path / primary).read_bytes()
+                if len(data) <= self.settings["inline_limit"]:
+                    small[self.logical_name(job["key"])] = data
+        if not small:
+            return
+        
+        if self.settings["svg_sprite"]:
+            icons = set()
+            for job in jobs:
+                if job["kind"] == "html":
+                    page = self.logical_name(job["key"])
+                    for match in IMAGE_SOURCE.finditer(Path(job["source"]).read_text(encoding='utf-8', errors='replace')):
+                        target = self.match_reference(match.group(1), page, small)
+                        if target and target.endswith('.svg'):
+                            icons.add(target)
+            if icons:
+                self.write_sprite({icon: small[icon] for icon in sorted(icons)})
+        
+        self.inline_assets = {logical: data_uri(logical, data) for logical, data in sorted(small.items())}
+        self.metrics["files_inlined"] = len(self.inline_assets)
+        print(f"📎 Embedding {len(self.inline_assets)} image(s) of at most {self.settings['inline_limit']} bytes as data URIs")
+    
+    def write_sprite(self, icons: Dict[str, bytes]) -> None:
+        """Merge SVG icons into one sprite sheet of <symbol>s, reusing the cached sheet when unchanged"""
+        symbols = []
+        namespaces: Dict[str, str] = {}
+        for logical, data in icons.items():
+            symbol_id = 'icon-' + re.sub(r'[^A-Za-z0-9_-]+', '-', posixpath.splitext(logical)[0]).strip('-')
+            symbol = svg_symbol(data.decode('utf-8', errors='replace'), symbol_id)
+            if symbol:
+                markup, icon_namespaces, view_box, width, height = symbol
+                symbols.append(markup)
+                namespaces.update(icon_namespaces)
+                self.sprite_icons[logical] = [symbol_id, view_box, width, height]
+        if not symbols:
+            return
+        
+        content = (f'<svg xmlns="http://www.w3.org/2000/svg"'
+                   f'{"".join(format_svg_attribute(name, value) for name, value in sorted(namespaces.items()))}>'
+                   f'{"".join(symbols)}</svg>')
+        key = self.source_key(SPRITE_FILE)
+        digest = BuildCache.digest(content.encode('utf-8'))
+        if self.build_cache.lookup(key, self.optimized_path) == digest:
+            return
+        output_file = self.optimized_path / SPRITE_FILE
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(content, encoding='utf-8')
+        self.record_outputs(key, digest, [SPRITE_FILE])
+        print(f"  ✅ Merged {', '.join(self.sprite_icons)} into {SPRITE_FILE}")
+    
+    def job_options(self, kind: str, source_file: Path) -> Dict:
+        """Extra minifier arguments for an HTML/CSS job, with a salt so its cached output follows them"""
+        options: Dict = {}
+        if kind == "css":
+            options.update(self.css_purge_options)
+        if self.inline_assets:
+            options["inline_assets"] = self.referrer_urls(source_file, self.inline_assets)
+        if kind == "html" and self.webp_images:
+            options["webp_images"] = self.referrer_urls(source_file, {
+                image: self.relative_url(source_file, webp) for image, webp in self.webp_images.items()
+            })
+        if kind == "html" and self.sprite_icons:
+            options["sprite_icons"] = self.referrer_urls(source_file, {
+                icon: [self.relative_url(source_file, f"{SPRITE_FILE}#{symbol_id}"), view_box, width, height]
+                for icon, (symbol_id, view_box, width, height) in self.sprite_icons.items()
+            })
+        if not options:
+            return {}
+        return {"options": options, "salt": hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()}
+    
+    def referrer_urls(self, source_file: Path, values: Dict[str, object]) -> Dict[str, object]:
+        """Key a mapping of logical paths by the relative and root-relative URLs a file may use for them"""
+        urls = {}
+        for logical, value in sorted(values.items()):
+            urls[self.relative_url(source_file, logical)] = value
+            urls['/' + logical] = value
+        return urls
+    
+    def relative_url(self, source_file: Path, logical: str) -> str:
+        """URL of a logical path relative to the file referring to it"""
+        referrer = self.logical_name(str(source_file.relative_to(self.base_path)))
+        return posixpath.relpath(logical, posixpath.dirname(referrer) or '.')
+    
+    def make_job(self, kind: str, source_file: Path) -> Dict:
+        """Describe the per-file work for a source asset"""
+        key = str(source_file.relative_to(self.base_path))
+        output_file = self.optimized_path / source_file.relative_to(self.frontend_path)
+        cached_digest = None
+        if self.use_cache:
+            cached_digest = self.build_cache.lookup(key, self.optimized_path)
+        
+        job = {
+            "kind": kind,
+            "key": key,
+            "source": str(source_file),
+            "output": str(output_file),
+            "settings": self.settings,
+            "cached_digest": cached_digest
+        }
+        if kind in ("html", "css"):
+            job.update(self.job_options(kind, source_file))
+        return job
+    
+    def process_jobs(self, jobs: List[Dict]) -> None:
+        """Run every asset job and fold its result in"""
+        for result in self.map_jobs(process_asset, jobs):
+            self.merge_result(result)
+    
+    def map_jobs(self, worker, jobs: List[Dict]) -> Iterator[Dict]:
+        """Run a worker function over jobs, in a worker pool when more than one job slot is configured"""
+        if self.jobs > 1 and len(jobs) > 1:
+            workers = min(self.jobs, len(jobs))
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(worker, jobs, chunksize=chunksize)
+        else:
+            for job in jobs:
+                yield worker(job)
+    
+    def merge_result(self, result: Dict) -> None:
+        """Fold a worker result into the build cache and metrics"""
+        verb, action = ("optimize", "Optimized") if result["kind"] == "image" else ("minify", "Minified")
+        
+        if result["status"] == "cached":
+            self.build_cache.touch(result["key"])
+            self.metrics["files_cached"] += 1
+        elif result["status"] == "processed":
+            outputs = [str(Path(output).relative_to(self.optimized_path)) for output in result["outputs"]]
+            self.record_outputs(result["key"], result["digest"], outputs, result.get("warning"))
+            entry = self.build_cache.entries[result["key"]]
+            if "savings" in result:
+                entry["savings"] = result["savings"]
+            if result.get("webp"):
+                # The WebP variant gets its own entry so later stages treat it like any other asset
+                webp_key = self.source_key(self.logical_name(result["key"]) + '.webp')
+                self.record_outputs(webp_key, result["digest"], [str(Path(result["webp"]).relative_to(self.optimized_path))])
+                entry["derived"] = [webp_key]
+            for metric, value in result["metrics"].items():
+                self.metrics[metric] = self.metrics.get(metric, 0) + value
+            if result.get("warning"):
+                print(f"  ⚠️ Copied {result['name']} un{action.lower()}: {result['warning']}")
+            else:
+                print(f"  ✅ {action} {result['name']}")
+        else:
+            self.build_cache.touch(result["key"])
+            print(f"  ❌ Failed to {verb} {result['name']}: {result['error']}")
+        
+        for derived in self.build_cache.entries.get(result["key"], {}).get("derived", []):
+            self.webp_images[self.logical_name(result["key"])] = self.logical_name(derived)
+    
+    def record_outputs(self, key: str, digest: str, outputs: List[str], warning: Optional[str] = None) -> None:
+        """Record a source's outputs, deleting the ones they replace"""
+        for replaced in self.build_cache.record(key, digest, outputs, warning):
+            # e.g. a fingerprinted name from the previous run
+            replaced_path = self.optimized_path / replaced
+            if replaced_path.exists():
+                replaced_path.unlink()
+    
+    def bundle_scripts(self) -> None:
+        """Concatenate runs of adjacent classic scripts in each HTML entry into one bundle per run"""
+        sources = {self.logical_name(key) for key in self.build_cache.seen}
+        pages = sorted((logical for logical in sources if logical.endswith('.html')),
+                       key=lambda page: (page != 'index.html', page))
+        
+        runs: Dict[Tuple, str] = {}
+        plans: Dict[str, Dict[str, str]] = {}
+        for page in pages:
+            plans[page] = {}
+            for run in self.plan_bundles(page, sources):
+                identity = tuple(run)
+                if identity not in runs:
+                    stem = posixpath.splitext(page)[0]
+                    name, suffix = f"{BUNDLE_DIR}/{stem}.js", 2
+                    while name in self.bundles:
+                        name, suffix = f"{BUNDLE_DIR}/{stem}-{suffix}.js", suffix + 1
+                    runs[identity] = name
+                    self.bundles[name] = [logical for logical, _ in run]
+                for logical, _ in run:
+                    plans[page][logical] = runs[identity]
+        signature = hashlib.sha256(json.dumps(
+            [plans, sorted(runs.items(), key=lambda item: item[1])], sort_keys=True
+        ).encode()).hexdigest()
+        
+        # Outputs rewritten or dropped under a different plan start again from their sources
+        for key in sorted(self.build_cache.seen):
+            if self.build_cache.entries.get(key, {}).get("bundle_plan") not in (None, signature):
+                self.reprocess(key)
+        
+        for run, name in runs.items():
+            self.write_bundle(name, list(run))
+        
+        # Point each page at its bundles, and precache lists (sw.js) at the first page's bundles
+        home_bundles: Dict[str, str] = {}
+        for page in pages:
+            if plans[page]:
+                self.rewrite_output(self.source_key(page), signature,
+                                    lambda content, page=page: self.bundle_script_tags(content, page, plans[page]))
+            for logical, name in plans[page].items():
+                home_bundles.setdefault(logical, name)
+        for logical in sorted(sources):
+            if logical.endswith('.js') and logical not in home_bundles:
+                self.rewrite_output(self.source_key(logical), signature,
+                                    lambda content, logical=logical: self.bundle_array_references(content, logical, home_bundles))
+        
+        # Bundled scripts that nothing else loads are no longer shipped on their own
+        referenced: Set[str] = set()
+        for logical in sources | set(self.bundles):
+            entry = self.build_cache.entries.get(self.source_key(logical))
+            primary = self.primary_output(entry) if entry else None
+            if logical in home_bundles or not primary or Path(primary).suffix not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            content = (self.optimized_path / primary).read_text(encoding='utf-8')
+            for match in ASSET_REFERENCE.finditer(content):
+                target = self.match_reference(match.group(2), logical, home_bundles)
+                if target:
+                    referenced.add(target)
+        dropped = sorted(set(home_bundles) - referenced)
+        for logical in dropped:
+            self.drop_outputs(self.source_key(logical), signature)
+        
+        self.metrics["files_bundled"] = len(home_bundles)
+        print(f"  ✅ Bundled {len(home_bundles)} scripts into {len(runs)} bundle(s), "
+              f"{len(dropped)} no longer shipped separately")
+    
+    def plan_bundles(self, page: str, sources: Set[str]) -> List[List[Tuple[str, bool]]]:
+        """Split a page's classic scripts into runs of (script, isolated) that can share one request"""
+        source = (self.frontend_path / page).read_text(encoding='utf-8')
+        tags = []
+        for match in SCRIPT_TAG.finditer(source):
+            src = self.classic_script_src(match.group(1))
+            any_src = SCRIPT_SRC.search(match.group(1))
+            tags.append((match, self.match_reference(src, page, sources) if src else None,
+                         self.match_reference(any_src.group(2), page, sources) if any_src else None))
+        
+        # Words used by the page and each of its scripts, to tell which globals are shared
+        page_words = set(JS_WORD.findall(SCRIPT_TAG.sub(' ', source)))
+        script_words = {
+            script: set(JS_WORD.findall((self.frontend_path / script).read_text(encoding='utf-8', errors='replace')))
+            for _, _, script in tags if script
+        }
+        loads = [script for _, _, script in tags if script]
+        
+        runs: List[List[Tuple[str, bool]]] = []
+        run: List[Tuple[str, bool]] = []
+        shared_names: Set[str] = set()
+        last_end = None
+        for match, logical, _ in tags:
+            info = self.script_info(logical) if logical and loads.count(logical) == 1 else None
+            isolated = False
+            if info:
+                others = page_words.union(*(words for script, words in script_words.items() if script != logical))
+                isolated = not (info["names"] & others)
+                if not isolated and info["strict"]:
+                    # Its "use strict" would either be lost or leak into the rest of the bundle
+                    info = None
+            contiguous = last_end is not None and HTML_GAP.fullmatch(source, last_end, match.start())
+            if not info or not contiguous or (not isolated and info["names"] & shared_names):
+                if len(run) > 1:
+                    runs.append(run)
+                run, shared_names = [], set()
+            if info:
+                run.append((logical, isolated))
+                if not isolated:
+                    shared_names |= info["names"]
+            last_end = match.end()
+        if len(run) > 1:
+            runs.append(run)
+        return runs
+    
+    def script_info(self, logical: str) -> Optional[Dict]:
+        """Minified content and global names of a script that may be bundled, or None if it must stay separate"""
+        if logical in self.script_cache:
+            return self.script_cache[logical]
+        
+        info = None
+        entry = self.build_cache.entries.get(self.source_key(logical), {})
+        if logical.endswith('.js') and "hash" in entry and not entry.get("warning"):
+            primary = self.primary_output(entry)
+            if primary:
+                content = (self.optimized_path / primary).read_text(encoding='utf-8')
+            else:
+                # Dropped after an earlier bundling run
+                content = minify_js_content((self.frontend_path / logical).read_text(encoding='utf-8'))
+            tokens = js_tokens(content)
+            is_module, specifiers = js_imports(tokens)
+            code = [(token, kind) for token, kind in tokens if not token.startswith('/*')]
+            if is_module or specifiers:
+                print(f"  ↪️ Leaving {logical} unbundled: it imports other modules")
+            else:
+                info = {
+                    "content": content,
+                    "names": top_level_declarations(tokens),
+                    "strict": bool(code) and code[0][1] == 'string' and code[0][0][0] in '\'"'
+                }
+        self.script_cache[logical] = info
+        return info
+    
+    def write_bundle(self, name: str, run: List[Tuple[str, bool]]) -> None:
+        """Write a bundle unless the cached one was built from the same member versions"""
+        key = self.source_key(name)
+        digest = BuildCache.digest(json.dumps([
+            [logical, self.build_cache.entries[self.source_key(logical)]["hash"], isolated]
+            for logical, isolated in run
+        ]).encode())
+        if self.build_cache.lookup(key, self.optimized_path) == digest:
+            return
+        
+        # Isolated scripts get their own function scope; the rest keep sharing the global scope
+        pieces = []
+        for logical, isolated in run:
+            content = self.script_info(logical)["content"]
+            pieces.append(f"(function(){{{content}\n}}).call(this)" if isolated else content)
+        output_file = self.optimized_path / name
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(';\n'.join(pieces) + ';\n', encoding='utf-8')
+        self.record_outputs(key, digest, [name])
+        print(f"  ✅ Bundled {', '.join(logical for logical, _ in run)} into {name}")
+    
+    def bundle_script_tags(self, content: str, page: str, members: Dict[str, str]) -> str:
+        """Replace a page's bundled script tags with one tag per bundle"""
+        emitted: Set[str] = set()
+        
+        def replace(match: re.Match) -> str:
+            src = self.classic_script_src(match.group(1))
+            target = self.match_reference(src, page, members) if src else None
+            if not target:
+                return match.group(0)
+            bundle = members[target]
+            if bundle in emitted:
+                return ''
+            emitted.add(bundle)
+            return f'<script src="{posixpath.relpath(bundle, posixpath.dirname(page) or ".")}"></script>'
+        
+        return SCRIPT_TAG.sub(replace, content)
+    
+    def bundle_array_references(self, content: str, referrer: str, home_bundles: Dict[str, str]) -> str:
+        """Replace bundled scripts in URL lists such as a precache manifest, listing each bundle once"""
+        known = {**home_bundles, **{name: name for name in self.bundles}}
+        emitted: Set[str] = set()
+        
+        def replace(match: re.Match) -> str:
+            separator, space, quote, reference = match.groups()
+            target = self.match_reference(reference, referrer, known)
+            if not target:
+                return match.group(0)
+            bundle = known[target]
+            if bundle in emitted:
+                return '' if separator == ',' else match.group(0)
+            emitted.add(bundle)
+            if target == bundle:
+                return match.group(0)
+            if reference.startswith('/'):
+                url = '/' + bundle
+            else:
+                url = posixpath.relpath(bundle, posixpath.dirname(referrer) or '.')
+            return f"{separator}{space}{quote}{url}{quote}"
+        
+        return ARRAY_REFERENCE.sub(replace, content)
+    
+    def rewrite_output(self, key: str, signature: str, transform) -> None:
+        """Apply a text transform to a source's output; its variants are recompressed later"""
+        entry = self.build_cache.entries.get(key)
+        primary = self.primary_output(entry) if entry else None
+        if not primary:
+            return
+        output_file = self.optimized_path / primary
+        content = output_file.read_text(encoding='utf-8')
+        rewritten = transform(content)
+        if rewritten != content:
+            output_file.write_text(rewritten, encoding='utf-8')
+            self.build_cache.update_outputs(key, [primary])
+        if rewritten != content or "bundle_plan" in entry:
+            entry["bundle_plan"] = signature
+    
+    def drop_outputs(self, key: str, signature: str) -> None:
+        """Delete a source's outputs while keeping its cache entry"""
+        entry = self.build_cache.entries[key]
+        for output in entry.get("outputs", []):
+            output_file = self.optimized_path / output
+            if output_file.exists():
+                output_file.unlink()
+            BuildCache.remove_empty_dirs(output_file.parent, self.optimized_path)
+        self.build_cache.update_outputs(key, [])
+        entry["bundle_plan"] = signature
+    
+    def reprocess(self, key: str) -> None:
+        """Rebuild a source's output from scratch, bypassing the cache"""
+        source_file = self.base_path / key
+        kind = {'.html': 'html', '.css': 'css', '.js': 'js'}.get(source_file.suffix, 'image')
+        job = self.make_job(kind, source_file)
+        job["cached_digest"] = None
+        self.merge_result(process_asset(job))
+    
+    @staticmethod
+    def classic_script_src(attributes: str) -> Optional[str]:
+        """The src of a plain, synchronous script tag (no async/defer/module/integrity...)"""
+        match = SCRIPT_SRC.search(attributes)
+        if not match:
+            return None
+        rest = attributes[:match.start()] + attributes[match.end():]
+        return match.group(2) if CLASSIC_SCRIPT_ATTRS.fullmatch(rest) else None
+    
+    def fingerprint_assets(self) -> None:
+        """Rename outputs to name.<hash>.ext and rewrite every reference to them"""
+        assets: Dict[str, str] = {}
+        for key in sorted(self.build_cache.seen):
+            entry = self.build_cache.entries.get(key)
+            primary = self.primary_output(entry) if entry else None
+            if primary:
+                logical = self.logical_name(key)
+                assets[logical] = key
+                self.physical_names[logical] = primary
+        
+        contents: Dict[str, Optional[str]] = {}
+        references: Dict[str, Set[str]] = {}
+        for logical in assets:
+            contents[logical] = None
+            references[logical] = set()
+            if Path(logical).suffix in COMPRESSIBLE_EXTENSIONS:
+                contents[logical] = (self.optimized_path / self.physical_names[logical]).read_text(encoding='utf-8')
+                for match in ASSET_REFERENCE.finditer(contents[logical]):
+                    target = self.resolve_reference(match.group(2), logical)
+                    if target and target != logical:
+                        references[logical].add(target)
+        
+        # Hash leaves first so a file's hash covers the hashed names it refers to
+        hashed = [logical for logical in assets if self.is_fingerprintable(logical)]
+        pending = {logical: references[logical] & set(hashed) for logical in hashed}
+        while pending:
+            ready = sorted(logical for logical, deps in pending.items() if not deps)
+            cycle_salt = None
+            if not ready:
+                # Reference cycle: hash the members together
+                ready = sorted(pending)
+                cycle_salt = hashlib.sha256(''.join(contents[l] or '' for l in ready).encode()).hexdigest()
+            for logical in ready:
+                del pending[logical]
+                self.write_fingerprinted(assets[logical], logical, contents[logical], cycle_salt)
+            for deps in pending.values():
+                deps.difference_update(ready)
+        
+        # Entry points (HTML, sw.js, ...) keep their names but get their references rewritten
+        for logical in assets:
+            if not self.is_fingerprintable(logical) and contents[logical] is not None:
+                self.write_fingerprinted(assets[logical], logical, contents[logical], None)
+        
+        self.fingerprints = {
+            logical: self.physical_names[logical] for logical in sorted(hashed)
+        }
+    
+    def write_fingerprinted(self, key: str, logical: str, content: Optional[str], cycle_salt: Optional[str]) -> None:
+        """Rewrite references in one output and rename it to its content hash"""
+        old_physical = self.physical_names[logical]
+        old_path = self.optimized_path / old_physical
+        if content is not None:
+            data = ASSET_REFERENCE.sub(lambda match: self.rewrite_reference(match, logical), content).encode('utf-8')
+        else:
+            data = old_path.read_bytes()
+        
+        new_physical = logical
+        if self.is_fingerprintable(logical):
+            digest = hashlib.sha256(data + (cycle_salt or '').encode()).hexdigest()[:FINGERPRINT_LENGTH]
+            stem, ext = posixpath.splitext(logical)
+            new_physical = f"{stem}.{digest}{ext}"
+        self.physical_names[logical] = new_physical
+        
+        new_path = self.optimized_path / new_physical
+        if new_physical == old_physical and (content is None or data == content.encode('utf-8')):
+            return
+        
+        new_path.write_bytes(data)
+        if new_physical != old_physical:
+            for stale in [old_path] + [old_path.with_suffix(old_path.suffix + suffix) for suffix in COMPRESSED_SUFFIXES]:
+                if stale.exists():
+                    stale.unlink()
+        self.build_cache.update_outputs(key, [new_physical])
+    
+    def rewrite_reference(self, match: re.Match, referrer: str) -> str:
+        """Point a reference at the fingerprinted name of its target"""
+        opener, reference, suffix = match.group(1), match.group(2), match.group(3) or ''
+        target = self.resolve_reference(reference, referrer)
+        if not target:
+            return match.group(0)
+        base = reference[:len(reference) - len(posixpath.basename(reference))]
+        return f"{opener}{base}{posixpath.basename(self.physical_names[target])}{suffix}"
+    
+    def resolve_reference(self, reference: str, referrer: str) -> Optional[str]:
+        """Map a URL found in an output to the logical path of a known asset"""
+        return self.match_reference(reference, referrer, self.physical_names)
+    
+    @staticmethod
+    def match_reference(reference: str, referrer: str, known) -> Optional[str]:
+        """Map a URL to the logical path it names among `known`, looking through fingerprinted names"""
+        if ':' in reference or reference.startswith('//'):
+            return None
+        base = '' if reference.startswith('/') else posixpath.dirname(referrer)
+        logical = posixpath.normpath(posixpath.join(base, reference.lstrip('/')))
+        if logical in known:
+            return logical
+        # Outputs from an earlier run already point at hashed names
+        unhashed = FINGERPRINTED_NAME.sub(r'\1\3', logical)
+        return unhashed if unhashed in known else None
+    
+    def logical_name(self, key: str) -> str:
+        """Path of a source (cache key) relative to the frontend root, as used in URLs"""
+        return posixpath.relpath(Path(key).as_posix(), self.frontend_path.relative_to(self.base_path).as_posix())
+    
+    def source_key(self, logical: str) -> str:
+        """Cache key of the source behind a logical path"""
+        return str(self.frontend_path.relative_to(self.base_path) / logical)
+    
+    @staticmethod
+    def is_fingerprintable(logical: str) -> bool:
+        path = Path(logical)
+        return path.suffix in FINGERPRINT_EXTENSIONS and path.name not in STABLE_NAMES
+    
+    @staticmethod
+    def primary_output(entry: Dict) -> Optional[str]:
+        """The output that is not a compressed variant"""
+        for output in entry.get("outputs", []):
+            if Path(output).suffix not in COMPRESSED_SUFFIXES:
+                return Path(output).as_posix()
+        return None
+    
+    def compress_outputs(self) -> None:
+        """Precompress every final output whose current content has no variants yet, in the worker pool"""
+        jobs = []
+        for key in sorted(self.build_cache.seen):
+            entry = self.build_cache.entries.get(key)
+            primary = self.primary_output(entry) if entry else None
+            if primary and Path(primary).suffix in COMPRESSIBLE_EXTENSIONS and not entry.get("compressed"):
+                jobs.append({"key": key, "output": str(self.optimized_path / primary), "settings": self.settings})
+        
+        for result in self.map_jobs(compress_output, jobs):
+            if "error" in result:
+                print(f"  ❌ Failed to compress {self.logical_name(result['key'])}: {result['error']}")
+                continue
+            variants = [str(Path(variant).relative_to(self.optimized_path)) for variant in result["variants"]]
+            self.build_cache.record_variants(result["key"], variants)
+            self.metrics["files_compressed"] += len(variants)
+        print(f"  ✅ Compressed {len(jobs)} output(s) with {min(self.jobs, max(len(jobs), 1))} worker(s)")
     
     def generate_manifest(self) -> None:
         """Generate optimization manifest"""
+        features = [
+            "html_minification",
+            "css_minification",
+            "js_minification",
+            "image_optimization"
+        ]
+        features += [f"{encoding}_compression" for encoding in self.settings["encodings"]]
+        if self.reachable is not None:
+            features.append("unreachable_file_pruning")
+        if self.settings["purge_css"]:
+            features.append("unused_css_removal")
+        if self.settings["bundle"]:
+            features.append("js_bundling")
+        if self.settings["webp"]:
+            features.append("webp_variants")
+        if self.settings["inline_limit"] > 0:
+            features.append("data_uri_inlining")
+        if self.settings["svg_sprite"]:
+            features.append("svg_sprite")
+        if self.settings["fingerprint"]:
+            features.append("asset_fingerprinting")
+        
         manifest = {
             "version": "1.0.0",
             "timestamp": self.get_timestamp(),
             "optimization_level": "production",
-            "features": [
-                "html_minification",
-                "css_minification",
-                "js_minification",
-                "image_optimization",
-                "gzip_compression"
-            ],
+            "features": features,
+            "entry": str(self.entry.relative_to(self.frontend_path)) if self.entry else None,
             "files": self.get_file_manifest(),
+            "unreachable": sorted(self.unreachable),
+            "bundles": self.bundles,
+            "inlined": sorted(self.inline_assets),
+            "sprites": {SPRITE_FILE: sorted(self.sprite_icons)} if self.sprite_icons else {},
+            "images": self.get_image_savings(),
+            "fingerprints": self.fingerprints,
             "metrics": self.metrics
         }
         
-        manifest_path = self.optimized_path / "optimization-manifest.json"
+        manifest_path = self.optimized_path / MANIFEST_FILE
         with open(manifest_path, 'w', encoding='utf-8') as f:
             json.dump(manifest, f, indent=2)
         
         print(f"  ✅ Generated optimization manifest")
     
+    def prune_stale_outputs(self) -> None:
+        """Delete outputs that this run did not produce: removed, unreachable or renamed sources"""
+        removed = self.build_cache.prune(self.optimized_path, keep=[MANIFEST_FILE])
+        self.metrics["files_removed"] = len(removed)
+        for output in removed:
+            print(f"  🗑️ Removed stale {output}")
+    
     def calculate_metrics(self) -> None:
         """Calculate optimization metrics"""
-        # Calculate original size
-        self.metrics["original_size"] = self.get_directory_size(self.frontend_path)
+        # Calculate original size (the files the walk saw)
+        self.metrics["original_size"] = self.source_size
         
         # Calculate optimized size
         self.metrics["optimized_size"] = self.get_directory_size(self.optimized_path)
@@ -282,14 +1974,41 @@ class NocturneOptimizer:
         """Get manifest of optimized files"""
         files = []
         for file_path in self.optimized_path.rglob('*'):
-            if file_path.is_file() and not file_path.name.endswith('.gz'):
+            if file_path.is_file() and file_path.suffix not in COMPRESSED_SUFFIXES:
+                encodings = {}
+                for encoding, (suffix, _, _, _) in ENCODERS.items():
+                    variant_path = file_path.with_suffix(file_path.suffix + suffix)
+                    if variant_path.exists():
+                        encodings[encoding] = variant_path.stat().st_size
                 files.append({
                     "path": str(file_path.relative_to(self.optimized_path)),
                     "size": file_path.stat().st_size,
-                    "compressed": file_path.with_suffix(file_path.suffix + '.gz').exists()
+                    "compressed": bool(encodings),
+                    "encodings": encodings
                 })
         return files
     
+    def get_image_savings(self) -> Dict[str, Dict]:
+        """Per-image byte counts before and after optimization"""
+        images = {}
+        for key in sorted(self.build_cache.seen):
+            savings = self.build_cache.entries.get(key, {}).get("savings")
+            if savings:
+                images[self.logical_name(key)] = {**savings, "saved": savings["original"] - savings["optimized"]}
+        return images
+    
+    def available_encodings(self, encodings: List[str]) -> List[str]:
+        """Drop encodings whose compression library is not installed"""
+        available = []
+        for encoding in encodings:
+            if encoding not in ENCODERS:
+                print(f"  ⚠️ Unknown encoding '{encoding}' ignored")
+            elif ENCODERS[encoding][2] is None:
+                print(f"  ⚠️ {encoding} compression unavailable (pip install {ENCODERS[encoding][3]})")
+            else:
+                available.append(encoding)
+        return available
+    
     def get_timestamp(self) -> str:
         """Get current timestamp"""
         from datetime import datetime
@@ -302,6 +2021,8 @@ class NocturneOptimizer:
         print(f"  📁 Optimized Size: {self.format_size(self.metrics['optimized_size'])}")
         print(f"  📉 Compression Ratio: {self.metrics['compression_ratio']:.1f}%")
         print(f"  📄 Files Processed: {self.metrics['files_processed']}")
+        print(f"  ♻️ Files Reused From Cache: {self.metrics['files_cached']}")
+        print(f"  ⏱️ Time Taken: {self.metrics['time_taken']:.2f}s")
         print(f"  💾 Space Saved: {self.format_size(self.metrics['original_size'] - self.metrics['optimized_size'])}")
     
     def format_size(self, bytes_size: int) -> str:
@@ -312,10 +2033,73 @@ class NocturneOptimizer:
             bytes_size /= 1024.0
         return f"{bytes_size:.1f} TB"
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="NocturneSwap performance optimizer")
+    parser.add_argument("--clean", action="store_true",
+                        help="ignore the build cache and rebuild every file")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="number of worker processes (0 = one per CPU, default: 1)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="skip frontend/ paths matching a gitignore-style glob (repeatable)")
+    parser.add_argument("--encodings", default=",".join(DEFAULT_SETTINGS["encodings"]),
+                        help="comma-separated precompressed encodings: gzip, br, zstd (default: %(default)s)")
+    parser.add_argument("--gzip-level", type=int, default=DEFAULT_SETTINGS["gzip_level"],
+                        help="gzip compression level 1-9 (default: %(default)s)")
+    parser.add_argument("--brotli-quality", type=int, default=DEFAULT_SETTINGS["brotli_quality"],
+                        help="brotli quality 0-11 (default: %(default)s)")
+    parser.add_argument("--no-fingerprint", action="store_true",
+                        help="keep original output names instead of name.<hash>.ext")
+    parser.add_argument("--entry", metavar="PAGE",
+                        help="entry HTML page relative to frontend/ (default: the page build.sh deploys)")
+    parser.add_argument("--all-files", action="store_true",
+                        help="optimize every file under frontend/, not only those reachable from the entry page")
+    parser.add_argument("--no-purge-css", action="store_true",
+                        help="keep CSS rules whose selectors never match the shipped HTML/JS")
+    parser.add_argument("--css-safelist", default="", metavar="PATTERNS",
+                        help="comma-separated class/id glob patterns to keep when purging CSS, e.g. 'is-*,theme-*'")
+    parser.add_argument("--no-bundle", action="store_true",
+                        help="ship each classic script separately instead of bundling them per page")
+    parser.add_argument("--jpeg-quality", type=int, default=DEFAULT_SETTINGS["jpeg_quality"],
+                        help="JPEG re-encoding quality 1-95, needs Pillow (default: %(default)s)")
+    parser.add_argument("--webp", action="store_true",
+                        help="also write name.ext.webp for PNG/JPEG images and offer it through <picture>, needs Pillow")
+    parser.add_argument("--webp-quality", type=int, default=DEFAULT_SETTINGS["webp_quality"],
+                        help="lossy WebP quality for JPEG sources 0-100 (default: %(default)s)")
+    parser.add_argument("--svg-precision", type=int, default=DEFAULT_SETTINGS["svg_precision"],
+                        help="decimal places kept in SVG coordinates (default: %(default)s)")
+    parser.add_argument("--inline-limit", type=int, default=DEFAULT_SETTINGS["inline_limit"], metavar="BYTES",
+                        help="embed optimized images up to this size as data URIs in HTML/CSS, 0 to disable (default: %(default)s)")
+    parser.add_argument("--svg-sprite", action="store_true",
+                        help="merge small SVGs used as <img> into one sprite sheet and reference them with <svg><use>")
+    parser.add_argument("--zstd-level", type=int, default=DEFAULT_SETTINGS["zstd_level"],
+                        help="zstd compression level 1-22 (default: %(default)s)")
+    return parser.parse_args(argv)
+
 def main():
     """Main optimization function"""
+    args = parse_args()
     try:
-        optimizer = NocturneOptimizer()
+        settings = {
+            "encodings": [encoding.strip() for encoding in args.encodings.split(",") if encoding.strip()],
+            "gzip_level": args.gzip_level,
+            "brotli_quality": args.brotli_quality,
+            "zstd_level": args.zstd_level,
+            "fingerprint": not args.no_fingerprint,
+            "bundle": not args.no_bundle,
+            "entry": args.entry,
+            "prune_unreachable": not args.all_files,
+            "purge_css": not args.no_purge_css,
+            "css_safelist": [pattern.strip() for pattern in args.css_safelist.split(",") if pattern.strip()],
+            "jpeg_quality": args.jpeg_quality,
+            "webp": args.webp,
+            "webp_quality": args.webp_quality,
+            "svg_precision": args.svg_precision,
+            "inline_limit": args.inline_limit,
+            "svg_sprite": args.svg_sprite
+        }
+        optimizer = NocturneOptimizer(use_cache=not args.clean, jobs=args.jobs, settings=settings,
+                                      excludes=args.exclude)
         success = optimizer.optimize_all()
         
         if success:
@@ -7,23 +7,648 @@ Comprehensive security assessment and audit preparation
 import os
 import re
 import json
+import bisect
+import fnmatch
 import hashlib
+import string
+import argparse
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
 from datetime import datetime
 
+from asset_walker import DEFAULT_EXCLUDES, FileWalker
+
+# Persistent findings cache, reused by later runs on unchanged files: a small per-file index,
+# and the cached findings themselves one file per line beside it
+CACHE_FILE = ".security-audit-cache.json"
+CACHE_FINDINGS_FILE = ".security-audit-cache.jsonl"
+CACHE_VERSION = 2
+
+# Reports written by the auditor; they and the cache are never scanned themselves
+REPORT_FILE = "security-audit-report.json"
+READABLE_REPORT_FILE = "SECURITY_AUDIT_REPORT.md"
+# Every finding, one JSON object per line, written as the audit produces it
+FINDINGS_FILE = "security-audit-findings.jsonl"
+
+# Build outputs and the auditor's own files (gitignore syntax, relative to the audited tree)
+AUDIT_EXCLUDES = DEFAULT_EXCLUDES + [
+    '/optimized/', '/build/', '/target/',
+    f'/{CACHE_FILE}', f'/{CACHE_FINDINGS_FILE}', f'/{REPORT_FILE}', f'/{READABLE_REPORT_FILE}', f'/{FINDINGS_FILE}',
+]
+
+# Only pathological files are skipped; anything over STREAM_CHUNK is scanned in windows, so the
+# limit bounds scan time rather than memory
+DEFAULT_MAX_FILE_SIZE = 64 * 1024 * 1024
+
+# Finding type, severity and recommendation shared by the pattern rules of each check
+RULE_CHECKS = {
+    "xss": ('XSS', 'HIGH', 'Use proper input sanitization and avoid dangerous DOM manipulation'),
+    "sensitive_data": ('SENSITIVE_DATA', 'HIGH', 'Move sensitive data to environment variables'),
+    "secure_communication": ('INSECURE_URL', 'MEDIUM', 'Use HTTPS URLs for external resources'),
+    "smart_contracts": ('DANGEROUS_PATTERN', 'MEDIUM', 'Use safer alternatives with proper error handling'),
+}
+
+# Pattern rules, compiled once by RuleEngine and matched in a single pass over each file.
+# Every match of a rule starts with its lower-case ASCII "literal", which is what the
+# engine's prefilter looks for; "ignore" lists substrings that clear a match.
+RULES = [
+    # XSS
+    {"id": "innerhtml-concat", "check": "xss", "literal": "innerhtml", "pattern": r'innerHTML\s*=.*\+',
+     "ignore_case": True, "description": "Potential XSS vulnerability: {match}"},  # Dangerous innerHTML usage
+    {"id": "document-write", "check": "xss", "literal": "document.write", "pattern": r'document\.write\s*\(',
+     "ignore_case": True, "description": "Potential XSS vulnerability: {match}"},  # Dangerous document.write
+    {"id": "eval", "check": "xss", "literal": "eval", "pattern": r'eval\s*\(',
+     "ignore_case": True, "description": "Potential XSS vulnerability: {match}"},  # Dangerous eval
+    {"id": "jquery-html-concat", "check": "xss", "literal": ".html", "pattern": r'\.html\s*\(.*\+',
+     "ignore_case": True, "description": "Potential XSS vulnerability: {match}"},  # jQuery HTML with concatenation
+    {"id": "vue-v-html", "check": "xss", "literal": "v-html", "pattern": r'v-html\s*=',
+     "ignore_case": True, "description": "Potential XSS vulnerability: {match}"},  # Vue.js v-html directive
+    
+    # Sensitive data
+    {"id": "hardcoded-password", "check": "sensitive_data", "literal": "password",
+     "pattern": r'password\s*[:=]\s*["\'][^"\']{1,}["\']', "ignore_case": True, "description": "Hardcoded password"},
+    {"id": "hardcoded-api-key", "check": "sensitive_data", "literal": "api",
+     "pattern": r'api[_-]?key\s*[:=]\s*["\'][^"\']{10,}["\']', "ignore_case": True, "description": "Hardcoded API key"},
+    {"id": "hardcoded-secret", "check": "sensitive_data", "literal": "secret",
+     "pattern": r'secret\s*[:=]\s*["\'][^"\']{10,}["\']', "ignore_case": True, "description": "Hardcoded secret"},
+    {"id": "hardcoded-private-key", "check": "sensitive_data", "literal": "private",
+     "pattern": r'private[_-]?key\s*[:=]\s*["\'][^"\']{20,}["\']', "ignore_case": True, "description": "Hardcoded private key"},
+    {"id": "hardcoded-token", "check": "sensitive_data", "literal": "token",
+     "pattern": r'token\s*[:=]\s*["\'][^"\']{20,}["\']', "ignore_case": True, "description": "Hardcoded token"},
+    
+    # Insecure communication (local development URLs are fine)
+    {"id": "insecure-http-url", "check": "secure_communication", "literal": "http://",
+     "pattern": r'http://[^\s"\'<>]+', "ignore": ['localhost', '127.0.0.1'], "description": "Insecure HTTP URL: {match}"},
+    
+    # Common Solana/Anchor pitfalls
+    {"id": "unwrap", "check": "smart_contracts", "literal": "unwrap()", "pattern": r'unwrap\(\)',
+     "description": "Use of unwrap() can cause panics"},
+    {"id": "expect", "check": "smart_contracts", "literal": "expect(", "pattern": r'expect\([^)]*\)',
+     "description": "Use of expect() can cause panics"},
+    {"id": "unchecked-data-borrow", "check": "smart_contracts", "literal": "to_account_info().try_borrow_mut_data()",
+     "pattern": r'to_account_info\(\)\.try_borrow_mut_data\(\)', "description": "Direct data borrowing without checks"},
+]
+
+# Markers counted in each file for the checks' compliance tests, matched by the same engine
+# as RULES (so they are counted correctly across the windows of a streamed file)
+MARKERS = [
+    {"id": "text-content", "check": "xss", "literal": "textcontent", "pattern": r'textContent'},
+    {"id": "inner-text", "check": "xss", "literal": "innertext", "pattern": r'innerText'},
+    {"id": "form", "check": "csrf", "literal": "<form", "pattern": r'<form[^>]*>', "ignore_case": True},
+    {"id": "csrf-token", "check": "csrf", "literal": "csrf", "pattern": r'csrf[_-]?token', "ignore_case": True},
+    {"id": "process-env", "check": "sensitive_data", "literal": "process.env", "pattern": r'process\.env'},
+    {"id": "https-url", "check": "secure_communication", "literal": "https://", "pattern": r'https://'},
+    {"id": "access-control", "check": "smart_contracts", "literal": "#[access_control(", "pattern": r'#\[access_control\('},
+    {"id": "checked-add", "check": "smart_contracts", "literal": "checked_add", "pattern": r'checked_add'},
+    {"id": "checked-sub", "check": "smart_contracts", "literal": "checked_sub", "pattern": r'checked_sub'},
+    {"id": "checked-mul", "check": "smart_contracts", "literal": "checked_mul", "pattern": r'checked_mul'},
+    {"id": "result-type", "check": "smart_contracts", "literal": "result<", "pattern": r'Result<'},
+    {"id": "error-type", "check": "smart_contracts", "literal": "error", "pattern": r'Error'},
+]
+
+# Files larger than one window are scanned as overlapping windows of STREAM_CHUNK characters
+# plus at least STREAM_OVERLAP characters of lookahead (through the end of the line). Matches are
+# reported by the window their start falls in, so they are exact as long as a match, and the text
+# its rule examines, fits in the overlap or ends with its line.
+STREAM_CHUNK = 4 * 1024 * 1024
+STREAM_OVERLAP = 256 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Lower-cases ASCII only, for content whose full lower-casing would shift offsets
+ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+class LineIndex:
+    """Start offsets of a text's lines, built on the first lookup and shared by every check"""
+    
+    def __init__(self, content: str, first_line: int = 1, first_column: int = 1):
+        self.content = content
+        # Where content starts in its file (a window of a streamed file may start mid-line)
+        self.first_line = first_line
+        self.first_column = first_column
+        self.starts: Optional[List[int]] = None
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """1-based (line, column) in the file of a character offset into content"""
+        if self.starts is None:
+            self.starts = [0] + [match.end() for match in re.finditer('\n', self.content)]
+        line = bisect.bisect_right(self.starts, offset)
+        column = offset - self.starts[line - 1] + 1
+        if line == 1:
+            column += self.first_column - 1
+        return line + self.first_line - 1, column
+
+def read_windows(path: str, chunk: int = STREAM_CHUNK, overlap: int = STREAM_OVERLAP) -> Iterator[Tuple[str, int]]:
+    """Yield (window, owned length) pairs covering a file, each window running `overlap` characters past what it owns"""
+    with open(path, 'r', encoding='utf-8') as f:
+        window = f.read(chunk + overlap)
+        while True:
+            # Finish the last line too (up to another overlap), so rules like `.*\+` see all of it
+            window += f.readline(overlap)
+            more = f.read(chunk)
+            if not more and len(window) <= chunk:
+                yield window, len(window)
+                return
+            yield window, chunk
+            window = window[chunk:] + more
+
+def hash_file(path: str) -> str:
+    """Content hash of a file, read in blocks"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class RuleEngine:
+    """Pattern rules and markers compiled once and matched in a single pass over each file"""
+    
+    def __init__(self, rules: List[Dict], markers: List[Dict]):
+        # Markers follow the rules, so an index at or past marker_start names a marker
+        self.rules = rules + markers
+        self.marker_start = len(rules)
+        self.patterns = []
+        for rule in self.rules:
+            literal = rule["literal"]
+            if not literal or not literal.isascii() or literal != literal.lower():
+                raise ValueError(f"Rule {rule['id']} needs a non-empty lower-case ASCII literal")
+            self.patterns.append(re.compile(rule["pattern"], re.IGNORECASE if rule.get("ignore_case") else 0))
+        self.scanners: Dict[Tuple[str, ...], Tuple[Optional[re.Pattern], Dict[str, List[int]]]] = {}
+    
+    def scanner(self, checks: List[str]) -> Tuple[Optional[re.Pattern], Dict[str, List[int]]]:
+        """Literal prefilter for the rules of some checks, built once per combination of checks"""
+        key = tuple(sorted(checks))
+        if key not in self.scanners:
+            by_literal: Dict[str, List[int]] = {}
+            for index, rule in enumerate(self.rules):
+                if rule["check"] in key:
+                    by_literal.setdefault(rule["literal"], []).append(index)
+            # Longest literals first, so a candidate reports the literal every other match there prefixes
+            literals = sorted(by_literal, key=len, reverse=True)
+            prefilter = re.compile('(?=(%s))' % '|'.join(map(re.escape, literals))) if literals else None
+            candidates = {
+                literal: sorted(index for other, indexes in by_literal.items() if literal.startswith(other) for index in indexes)
+                for literal in literals
+            }
+            self.scanners[key] = (prefilter, candidates)
+        return self.scanners[key]
+    
+    def scan(self, content: str, checks: List[str], end: Optional[int] = None,
+             next_start: Optional[Dict[int, int]] = None) -> Dict[int, List[re.Match]]:
+        """Non-overlapping matches of each rule (by index), the same ones re.finditer would find.
+        
+        Only matches starting before `end` are reported; `next_start` holds the offset each rule may
+        match again from, and is updated so a caller can carry it into the next window.
+        """
+        prefilter, candidates = self.scanner(checks)
+        matches: Dict[int, List[re.Match]] = {}
+        if prefilter is None:
+            return matches
+        if next_start is None:
+            next_start = {}
+        
+        lowered = content.lower()
+        if len(lowered) != len(content):
+            lowered = content.translate(ASCII_LOWERCASE)
+        
+        for candidate in prefilter.finditer(lowered):
+            position = candidate.start()
+            if end is not None and position >= end:
+                break
+            for index in candidates[candidate.group(1)]:
+                if position < next_start.get(index, 0):
+                    continue
+                match = self.patterns[index].match(content, position)
+                if match:
+                    matches.setdefault(index, []).append(match)
+                    next_start[index] = max(match.end(), position + 1)
+        return matches
+    
+    def findings(self, file: str, windows: Iterable[Tuple[str, int]], checks: List[str],
+                 max_per_rule: int = 0) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+        """Vulnerabilities reported by the pattern rules (per check, in rule order) and marker counts over a file's windows.
+        
+        With max_per_rule set, matches of a rule beyond that many are summed up in one last finding.
+        """
+        by_rule: Dict[int, List[Dict]] = {}
+        omitted: Dict[int, int] = {}
+        markers = {rule["id"]: 0 for rule in self.rules[self.marker_start:]}
+        next_start: Dict[int, int] = {}
+        line, column = 1, 1
+        for window, owned in windows:
+            lines = LineIndex(window, line, column)
+            for index, matches in self.scan(window, checks, owned, next_start).items():
+                rule = self.rules[index]
+                if index >= self.marker_start:
+                    markers[rule["id"]] += len(matches)
+                    continue
+                finding_type, severity, recommendation = RULE_CHECKS[rule["check"]]
+                listed = by_rule.setdefault(index, [])
+                for match in matches:
+                    text = match.group()
+                    if any(ignored in text for ignored in rule.get("ignore", [])):
+                        continue
+                    if max_per_rule and len(listed) >= max_per_rule:
+                        omitted[index] = omitted.get(index, 0) + 1
+                        continue
+                    line_number, column_number = lines.position(match.start())
+                    listed.append({
+                        'type': finding_type,
+                        'severity': severity,
+                        'rule': rule["id"],
+                        'file': file,
+                        'line': line_number,
+                        'column': column_number,
+                        'description': rule["description"].format(match=text),
+                        'recommendation': recommendation
+                    })
+            
+            # The next window starts where this one's owned text ends
+            newlines = window.count('\n', 0, owned)
+            if newlines:
+                line += newlines
+                column = owned - window.rfind('\n', 0, owned)
+            else:
+                column += owned
+            next_start = {index: start - owned for index, start in next_start.items()}
+        
+        for index, count in omitted.items():
+            finding_type, severity, recommendation = RULE_CHECKS[self.rules[index]["check"]]
+            by_rule[index].append({
+                'type': finding_type,
+                'severity': severity,
+                'rule': self.rules[index]["id"],
+                'file': file,
+                'description': f"{count} more matches of rule {self.rules[index]['id']} not listed",
+                'recommendation': recommendation
+            })
+        
+        findings: Dict[str, List[Dict]] = {check: [] for check in checks}
+        for index in sorted(by_rule):
+            findings[self.rules[index]["check"]].extend(by_rule[index])
+        return findings, markers
+
+RULE_ENGINE = RuleEngine(RULES, MARKERS)
+
+def check_xss_vulnerabilities(file: str, markers: Dict[str, int], vulnerabilities: List, compliant_items: List) -> None:
+    """Check for XSS protection (dangerous DOM manipulation is matched by RULES)"""
+    # Check for proper escaping
+    if markers['text-content'] or markers['inner-text']:
+        compliant_items.append({
+            'type': 'XSS_PROTECTION',
+            'file': file,
+            'description': 'Uses safe DOM text methods'
+        })
+
+def check_csrf_protection(file: str, markers: Dict[str, int], vulnerabilities: List, compliant_items: List) -> None:
+    """Check for CSRF protection measures"""
+    # Look for forms without CSRF protection
+    has_forms = markers['form'] > 0
+    csrf_tokens = markers['csrf-token']
+    
+    if has_forms and not csrf_tokens:
+        vulnerabilities.append({
+            'type': 'CSRF',
+            'severity': 'MEDIUM',
+            'file': file,
+            'description': 'Forms found without CSRF protection',
+            'recommendation': 'Implement CSRF tokens for all state-changing operations'
+        })
+    elif csrf_tokens:
+        compliant_items.append({
+            'type': 'CSRF_PROTECTION',
+            'file': file,
+            'description': 'CSRF protection implemented'
+        })
+
+def check_sensitive_data_exposure(file: str, markers: Dict[str, int], vulnerabilities: List, compliant_items: List) -> None:
+    """Check for safe handling of sensitive data (hardcoded secrets are matched by RULES)"""
+    # Check for environment variable usage (good practice)
+    if markers['process-env']:
+        compliant_items.append({
+            'type': 'ENV_VARS',
+            'file': file,
+            'description': 'Uses environment variables for configuration'
+        })
+
+def check_secure_communication(file: str, markers: Dict[str, int], vulnerabilities: List, compliant_items: List) -> None:
+    """Check for secure communication practices (insecure URLs are matched by RULES)"""
+    # Check for HTTPS usage (good practice)
+    https_count = markers['https-url']
+    if https_count > 0:
+        compliant_items.append({
+            'type': 'HTTPS_USAGE',
+            'file': file,
+            'description': f'Uses HTTPS for {https_count} external resources'
+        })
+
+def check_anchor_security_patterns(file: str, markers: Dict[str, int], vulnerabilities: List, compliant_items: List) -> None:
+    """Check for Anchor-specific security patterns (dangerous calls are matched by RULES)"""
+    
+    # Check for proper access controls
+    if markers['access-control']:
+        compliant_items.append({
+            'type': 'ACCESS_CONTROL',
+            'file': file,
+            'description': 'Implements access control checks'
+        })
+    
+    # Check for overflow protection
+    if markers['checked-add'] or markers['checked-sub'] or markers['checked-mul']:
+        compliant_items.append({
+            'type': 'OVERFLOW_PROTECTION',
+            'file': file,
+            'description': 'Uses checked arithmetic operations'
+        })
+    
+    # Check for proper error handling
+    if markers['result-type'] and markers['error-type']:
+        compliant_items.append({
+            'type': 'ERROR_HANDLING',
+            'file': file,
+            'description': 'Implements proper error handling'
+        })
+
+# Checks that look inside individual files: name -> (file name patterns, check)
+FILE_CHECKS = {
+    "xss": (['*.html', '*.js'], check_xss_vulnerabilities),
+    "csrf": (['*.html'], check_csrf_protection),
+    "sensitive_data": (['*.js', '*.html', '*.json', '*.env', '*.config', '*.py'], check_sensitive_data_exposure),
+    "secure_communication": (['*.js', '*.html', '*.json'], check_secure_communication),
+    "smart_contracts": (['*.rs'], check_anchor_security_patterns),
+}
+
+# Every name some check wants; the walker never opens (or sniffs) other files
+SCANNED_PATTERNS = sorted({pattern for patterns, _ in FILE_CHECKS.values() for pattern in patterns})
+
+# Report category of each file-level check
+CHECK_CATEGORIES = {
+    "xss": "frontend",
+    "csrf": "frontend",
+    "sensitive_data": "frontend",
+    "secure_communication": "frontend",
+    "smart_contracts": "smart_contracts",
+}
+
+# Score penalty of a vulnerability by severity
+SEVERITY_WEIGHTS = {'HIGH': 10, 'MEDIUM': 5, 'LOW': 2, 'INFO': 1}
+
+# SARIF result level by severity
+SARIF_LEVELS = {'HIGH': 'error', 'MEDIUM': 'warning', 'LOW': 'note', 'INFO': 'note'}
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+class FindingsSink:
+    """Writes findings to a JSONL file as they are produced, keeping only the tallies the report needs"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = None
+        # category -> {'vulnerabilities', 'compliant_items', 'penalty'}
+        self.categories: Dict[str, Dict[str, int]] = {}
+        self.severity_counts: Dict[str, int] = {}
+        self.type_counts: Dict[str, int] = {}
+        self.vulnerabilities = 0
+        self.compliant_items = 0
+    
+    def __enter__(self) -> 'FindingsSink':
+        self.file = open(self.path, 'w', encoding='utf-8')
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.file.close()
+        self.file = None
+    
+    def tally(self, category: str) -> Dict[str, int]:
+        """Running counts for a category"""
+        return self.categories.setdefault(category, {'vulnerabilities': 0, 'compliant_items': 0, 'penalty': 0})
+    
+    def write(self, kind: str, category: str, item: Dict) -> None:
+        self.file.write(json.dumps({'kind': kind, 'category': category, **item}) + '\n')
+    
+    def add_vulnerabilities(self, category: str, vulnerabilities: List[Dict]) -> None:
+        tally = self.tally(category)
+        for vulnerability in vulnerabilities:
+            self.write('vulnerability', category, vulnerability)
+            severity = vulnerability.get('severity', 'UNKNOWN')
+            vulnerability_type = vulnerability.get('type', '')
+            tally['vulnerabilities'] += 1
+            tally['penalty'] += SEVERITY_WEIGHTS.get(vulnerability.get('severity', 'LOW'), 2)
+            self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+            self.type_counts[vulnerability_type] = self.type_counts.get(vulnerability_type, 0) + 1
+            self.vulnerabilities += 1
+    
+    def add_compliant(self, category: str, compliant_items: List[Dict]) -> None:
+        tally = self.tally(category)
+        for item in compliant_items:
+            self.write('compliant', category, item)
+            tally['compliant_items'] += 1
+            self.compliant_items += 1
+
+def export_sarif(findings_path: Path, sarif_path: Path, base_path: Path, version: str) -> int:
+    """Convert the findings stream into a SARIF 2.1.0 log one result at a time, returning the result count"""
+    rules: Dict[str, Dict] = {}
+    count = 0
+    with open(findings_path, 'r', encoding='utf-8') as findings, open(sarif_path, 'w', encoding='utf-8') as sarif:
+        sarif.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", "runs": [{{"results": [')
+        for line in findings:
+            finding = json.loads(line)
+            if finding['kind'] != 'vulnerability':
+                continue
+            rule_id = finding.get('rule') or finding['type'].lower().replace('_', '-')
+            rules.setdefault(rule_id, {
+                'id': rule_id,
+                'shortDescription': {'text': finding['type']},
+                'help': {'text': finding.get('recommendation', '')},
+                'properties': {'category': finding['category']}
+            })
+            result = {
+                'ruleId': rule_id,
+                'level': SARIF_LEVELS.get(finding.get('severity'), 'note'),
+                'message': {'text': f"{finding['description']}. {finding.get('recommendation', '')}".strip()}
+            }
+            if finding.get('file'):
+                location = {'artifactLocation': {'uri': Path(finding['file']).as_posix(), 'uriBaseId': 'SRCROOT'}}
+                if finding.get('line'):
+                    location['region'] = {'startLine': finding['line'], 'startColumn': finding.get('column', 1)}
+                result['locations'] = [{'physicalLocation': location}]
+            sarif.write((', ' if count else '') + json.dumps(result))
+            count += 1
+        tool = {'driver': {'name': 'NocturneSwap Security Auditor', 'version': version, 'rules': list(rules.values())}}
+        base_uri = base_path.resolve().as_uri() + '/'
+        sarif.write(f'], "tool": {json.dumps(tool)}, '
+                    f'"originalUriBaseIds": {json.dumps({"SRCROOT": {"uri": base_uri}})}}}]}}\n')
+    return count
+
+class FindingsCache:
+    """Persistent per-file findings keyed on content hash and the rule fingerprint.
+    
+    The index keeps a small entry per file; each file's findings are one line of a JSONL sidecar,
+    read back only while that file is merged and copied into the sidecar this run writes.
+    """
+    
+    def __init__(self, cache_path: Path, findings_path: Path, max_findings_per_rule: int = 0):
+        self.cache_path = cache_path
+        self.findings_path = findings_path
+        self.fingerprint = self.compute_fingerprint(max_findings_per_rule)
+        self.entries: Dict[str, Dict] = {}
+        self.written: Set[str] = set()
+        # The previous run's sidecar (read by offset) and the one being written
+        self.previous = None
+        self.pending = None
+    
+    @staticmethod
+    def compute_fingerprint(max_findings_per_rule: int = 0) -> str:
+        """Hash the rule patterns and findings limit together with the auditor's own source"""
+        hasher = hashlib.sha256()
+        hasher.update(f"v{CACHE_VERSION}".encode())
+        rules = {
+            "checks": RULE_CHECKS,
+            "rules": RULES,
+            "markers": MARKERS,
+            "files": {check: patterns for check, (patterns, _) in FILE_CHECKS.items()},
+            "max_findings_per_rule": max_findings_per_rule,
+        }
+        hasher.update(json.dumps(rules, sort_keys=True).encode())
+        hasher.update(Path(__file__).read_bytes())
+        return hasher.hexdigest()
+    
+    def load(self) -> None:
+        """Load the cache index from disk, ignoring unreadable caches and ones whose sidecar changed"""
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION and self.findings_path.exists():
+                if self.findings_path.stat().st_size == data.get("findings_size"):
+                    self.previous = open(self.findings_path, 'rb')
+                    self.entries = data.get("entries", {})
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️ Ignoring unreadable audit cache: {e}")
+            self.entries = {}
+    
+    def save(self) -> None:
+        """Persist the sidecar written in this run and the index of the files it holds"""
+        pending_path = self.pending_path()
+        if self.pending is None:
+            self.pending = open(pending_path, 'wb')
+        findings_size = self.pending.tell()
+        self.pending.close()
+        self.pending = None
+        if self.previous is not None:
+            self.previous.close()
+            self.previous = None
+        os.replace(pending_path, self.findings_path)
+        
+        data = {
+            "version": CACHE_VERSION,
+            "findings_size": findings_size,
+            "entries": {key: self.entries[key] for key in sorted(self.written)}
+        }
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    
+    def pending_path(self) -> Path:
+        return self.findings_path.with_name(self.findings_path.name + '.tmp')
+    
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Return the entry for a file scanned under the current rules"""
+        entry = self.entries.get(key)
+        if not entry or entry.get("rules") != self.fingerprint:
+            return None
+        return entry
+    
+    def reuse(self, key: str) -> Dict:
+        """The cached findings of a file, carried over into this run's sidecar"""
+        self.previous.seek(self.entries[key]["offset"])
+        line = self.previous.readline()
+        self.append(key, line)
+        return json.loads(line)
+    
+    def record(self, key: str, digest: str, size: int, mtime_ns: int, checks: Dict) -> None:
+        """Record the findings of a freshly scanned file"""
+        self.entries[key] = {
+            "hash": digest,
+            "rules": self.fingerprint,
+            "size": size,
+            "mtime_ns": mtime_ns
+        }
+        self.append(key, json.dumps(checks).encode('utf-8') + b'\n')
+    
+    def append(self, key: str, line: bytes) -> None:
+        if self.pending is None:
+            self.pending = open(self.pending_path(), 'wb')
+        self.entries[key]["offset"] = self.pending.tell()
+        self.pending.write(line)
+        self.written.add(key)
+
+def scan_file(job: Dict) -> Dict:
+    """Read one file and run every check that applies to it (runs inside a worker process)"""
+    result = {"file": job["file"], "checks": {}}
+    try:
+        # Large files are hashed and scanned in blocks, never held whole in memory
+        streamed = job["size"] > STREAM_CHUNK
+        if streamed:
+            result["hash"] = hash_file(job["path"])
+        else:
+            with open(job["path"], 'rb') as f:
+                data = f.read()
+            result["hash"] = hashlib.sha256(data).hexdigest()
+        if result["hash"] == job.get("cached_hash"):
+            # Only the timestamp changed; the cached findings still apply
+            result["cached"] = True
+            return result
+        if streamed:
+            windows = read_windows(job["path"])
+        else:
+            # Same newline handling as reading in text mode
+            content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+            windows = [(content, len(content))]
+        rule_findings, markers = RULE_ENGINE.findings(job["file"], windows, job["checks"], job["max_findings"])
+        for check in job["checks"]:
+            vulnerabilities, compliant_items = rule_findings[check], []
+            FILE_CHECKS[check][1](job["file"], markers, vulnerabilities, compliant_items)
+            result["checks"][check] = {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
 class NocturneSecurityAuditor:
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", jobs: int = 0, use_cache: bool = True,
+                 excludes: Optional[List[str]] = None, max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                 sarif_path: Optional[str] = None, max_findings_per_rule: int = 0):
         self.base_path = Path(base_path)
+        
+        # Findings are streamed to FINDINGS_FILE; the report only keeps totals
+        self.sink = FindingsSink(self.base_path / FINDINGS_FILE)
+        self.sarif_path = Path(sarif_path) if sarif_path else None
+        
+        # What the scan walks past: ignored and excluded paths, oversized and binary files
+        self.excludes = AUDIT_EXCLUDES + list(excludes or [])
+        self.max_file_size = max_file_size
+        
+        # Findings listed per rule and file (0 = all of them)
+        self.max_findings_per_rule = max_findings_per_rule
+        
+        # Findings of unchanged files are reused from earlier runs
+        self.use_cache = use_cache
+        self.findings_cache = FindingsCache(self.base_path / CACHE_FILE, self.base_path / CACHE_FINDINGS_FILE,
+                                            max_findings_per_rule)
+        
+        # Worker processes for the file scan (0 = one per CPU)
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        
+        # Every file the scan walked (relative, sorted)
+        self.files: List[str] = []
         self.audit_results = {
             "timestamp": datetime.now().isoformat(),
             "version": "1.0.0",
             "overall_score": 0,
             "categories": {},
-            "vulnerabilities": [],
-            "recommendations": [],
-            "compliant_items": []
+            "summary": {},
+            "findings": FINDINGS_FILE,
+            "recommendations": []
         }
         
         print("🛡️ NocturneSwap Security Auditor")
@@ -34,25 +659,31 @@ class NocturneSecurityAuditor:
         try:
             print("🔍 Starting comprehensive security audit...")
             
-            # Frontend Security Audit
-            print("\n🌐 Auditing Frontend Security...")
-            self.audit_frontend_security()
-            
-            # Smart Contract Security Audit
-            print("\n⛓️ Auditing Smart Contract Security...")
-            self.audit_smart_contract_security()
-            
-            # Infrastructure Security Audit
-            print("\n🏗️ Auditing Infrastructure Security...")
-            self.audit_infrastructure_security()
-            
-            # Dependency Security Audit
-            print("\n📦 Auditing Dependencies...")
-            self.audit_dependencies()
-            
-            # Configuration Security Audit
-            print("\n⚙️ Auditing Configuration Security...")
-            self.audit_configuration_security()
+            # Each step streams its findings to the sink as it goes
+            with self.sink:
+                # One pass over the tree feeds every file-level check
+                print("\n📂 Scanning project files...")
+                self.scan_files()
+                
+                # Frontend Security Audit
+                print("\n🌐 Auditing Frontend Security...")
+                self.audit_frontend_security()
+                
+                # Smart Contract Security Audit
+                print("\n⛓️ Auditing Smart Contract Security...")
+                self.audit_smart_contract_security()
+                
+                # Infrastructure Security Audit
+                print("\n🏗️ Auditing Infrastructure Security...")
+                self.audit_infrastructure_security()
+                
+                # Dependency Security Audit
+                print("\n📦 Auditing Dependencies...")
+                self.audit_dependencies()
+                
+                # Configuration Security Audit
+                print("\n⚙️ Auditing Configuration Security...")
+                self.audit_configuration_security()
             
             # Generate final report
             self.generate_audit_report()
@@ -66,132 +697,95 @@ class NocturneSecurityAuditor:
             print(f"❌ Security audit failed: {e}")
             return {"error": str(e)}
     
-    def audit_frontend_security(self) -> None:
-        """Audit frontend security vulnerabilities"""
-        vulnerabilities = []
-        compliant_items = []
-        
-        # Check for XSS vulnerabilities
-        xss_results = self.check_xss_vulnerabilities()
-        vulnerabilities.extend(xss_results['vulnerabilities'])
-        compliant_items.extend(xss_results['compliant'])
-        
-        # Check for CSRF protection
-        csrf_results = self.check_csrf_protection()
-        vulnerabilities.extend(csrf_results['vulnerabilities'])
-        compliant_items.extend(csrf_results['compliant'])
+    def scan_files(self) -> None:
+        """Walk the tree once, reading each file once and running every check that applies to it"""
+        if self.use_cache:
+            self.findings_cache.load()
+        
+        jobs = []
+        # Walk order of the scanned files, and whether their cached findings apply as they are
+        plan: List[Tuple[str, bool]] = []
+        walker = FileWalker(self.base_path, excludes=self.excludes, max_size=self.max_file_size or None,
+                            skip_binary=True, include=SCANNED_PATTERNS)
+        for walked in walker:
+            self.files.append(walked.relative)
+            name = os.path.basename(walked.path)
+            checks = [
+                check for check, (patterns, _) in FILE_CHECKS.items()
+                if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+            ]
+            if not checks:
+                continue
+            
+            entry = self.findings_cache.lookup(walked.relative) if self.use_cache else None
+            if entry and entry.get("size") == walked.size and entry.get("mtime_ns") == walked.mtime_ns:
+                plan.append((walked.relative, True))
+                continue
+            plan.append((walked.relative, False))
+            jobs.append({
+                "path": walked.path,
+                "file": walked.relative,
+                "checks": checks,
+                "cached_hash": entry["hash"] if entry else None,
+                "size": walked.size,
+                "mtime_ns": walked.mtime_ns,
+                "max_findings": self.max_findings_per_rule
+            })
         
-        # Check for secure headers
-        header_results = self.check_security_headers()
-        vulnerabilities.extend(header_results['vulnerabilities'])
-        compliant_items.extend(header_results['compliant'])
-        
-        # Check for sensitive data exposure
-        data_results = self.check_sensitive_data_exposure()
-        vulnerabilities.extend(data_results['vulnerabilities'])
-        compliant_items.extend(data_results['compliant'])
-        
-        # Check for secure communication
-        comm_results = self.check_secure_communication()
-        vulnerabilities.extend(comm_results['vulnerabilities'])
-        compliant_items.extend(comm_results['compliant'])
-        
-        self.audit_results['categories']['frontend'] = {
-            'score': self.calculate_category_score(vulnerabilities, compliant_items),
-            'vulnerabilities': len(vulnerabilities),
-            'compliant_items': len(compliant_items)
-        }
+        if walker.skipped:
+            print(f"  ⏭️ Skipped {len(walker.skipped)} binary or oversized files")
+        workers = min(self.jobs, max(len(jobs), 1))
+        print(f"  📄 Scanning {len(jobs)} of {len(self.files)} files with {workers} worker(s)")
+        if workers > 1:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reused = self.merge_scan_results(plan, zip(jobs, executor.map(scan_file, jobs, chunksize=chunksize)))
+        else:
+            reused = self.merge_scan_results(plan, zip(jobs, map(scan_file, jobs)))
         
-        self.audit_results['vulnerabilities'].extend(vulnerabilities)
-        self.audit_results['compliant_items'].extend(compliant_items)
+        if self.use_cache:
+            print(f"  ♻️ Reused cached findings for {reused} unchanged files")
+        self.findings_cache.save()
     
-    def check_xss_vulnerabilities(self) -> Dict[str, List]:
-        """Check for XSS vulnerabilities"""
-        vulnerabilities = []
-        compliant_items = []
-        
-        # Scan HTML and JS files
-        html_files = list(self.base_path.glob("**/*.html"))
-        js_files = list(self.base_path.glob("**/*.js"))
-        
-        # XSS patterns to look for
-        xss_patterns = [
-            r'innerHTML\s*=.*\+',  # Dangerous innerHTML usage
-            r'document\.write\s*\(',  # Dangerous document.write
-            r'eval\s*\(',  # Dangerous eval
-            r'\.html\s*\(.*\+',  # jQuery HTML with concatenation
-            r'v-html\s*=',  # Vue.js v-html directive
-        ]
-        
-        all_files = html_files + js_files
-        
-        for file_path in all_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                for pattern in xss_patterns:
-                    matches = re.finditer(pattern, content, re.IGNORECASE)
-                    for match in matches:
-                        line_num = content[:match.start()].count('\n') + 1
-                        vulnerabilities.append({
-                            'type': 'XSS',
-                            'severity': 'HIGH',
-                            'file': str(file_path.relative_to(self.base_path)),
-                            'line': line_num,
-                            'description': f'Potential XSS vulnerability: {match.group()}',
-                            'recommendation': 'Use proper input sanitization and avoid dangerous DOM manipulation'
-                        })
-                
-                # Check for proper escaping
-                if 'textContent' in content or 'innerText' in content:
-                    compliant_items.append({
-                        'type': 'XSS_PROTECTION',
-                        'file': str(file_path.relative_to(self.base_path)),
-                        'description': 'Uses safe DOM text methods'
-                    })
-                    
-            except Exception as e:
-                print(f"  ⚠️ Could not scan {file_path}: {e}")
-        
-        return {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
+    def merge_scan_results(self, plan: List[Tuple[str, bool]], results: Iterator[Tuple[Dict, Dict]]) -> int:
+        """Stream each file's findings to the sink in walk order as results arrive, returning how many were cached"""
+        reused = 0
+        for file, cached in plan:
+            if cached:
+                checks = self.findings_cache.reuse(file)
+                reused += 1
+            else:
+                job, result = next(results)
+                if "error" in result:
+                    print(f"  ⚠️ Could not scan {result['file']}: {result['error']}")
+                    continue
+                if result.get("cached"):
+                    entry = self.findings_cache.entries[job["file"]]
+                    entry.update(size=job["size"], mtime_ns=job["mtime_ns"])
+                    checks = self.findings_cache.reuse(job["file"])
+                    reused += 1
+                else:
+                    checks = result["checks"]
+                    self.findings_cache.record(job["file"], result["hash"], job["size"], job["mtime_ns"], checks)
+            for check, findings in checks.items():
+                self.sink.add_vulnerabilities(CHECK_CATEGORIES[check], findings['vulnerabilities'])
+                self.sink.add_compliant(CHECK_CATEGORIES[check], findings['compliant'])
+        return reused
     
-    def check_csrf_protection(self) -> Dict[str, List]:
-        """Check for CSRF protection measures"""
-        vulnerabilities = []
-        compliant_items = []
-        
-        # Check for CSRF tokens in forms
-        html_files = list(self.base_path.glob("**/*.html"))
+    def files_matching(self, pattern: str) -> List[str]:
+        """Scanned files whose name matches a glob pattern"""
+        return [file for file in self.files if fnmatch.fnmatch(os.path.basename(file), pattern)]
+    
+    def audit_frontend_security(self) -> None:
+        """Audit frontend security vulnerabilities"""
+        # XSS, CSRF, sensitive data exposure and secure communication were checked during the scan
         
-        for file_path in html_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Look for forms without CSRF protection
-                form_matches = re.finditer(r'<form[^>]*>', content, re.IGNORECASE)
-                csrf_tokens = re.findall(r'csrf[_-]?token', content, re.IGNORECASE)
-                
-                if form_matches and not csrf_tokens:
-                    vulnerabilities.append({
-                        'type': 'CSRF',
-                        'severity': 'MEDIUM',
-                        'file': str(file_path.relative_to(self.base_path)),
-                        'description': 'Forms found without CSRF protection',
-                        'recommendation': 'Implement CSRF tokens for all state-changing operations'
-                    })
-                elif csrf_tokens:
-                    compliant_items.append({
-                        'type': 'CSRF_PROTECTION',
-                        'file': str(file_path.relative_to(self.base_path)),
-                        'description': 'CSRF protection implemented'
-                    })
-                    
-            except Exception as e:
-                print(f"  ⚠️ Could not scan {file_path}: {e}")
+        # Check for secure headers
+        header_results = self.check_security_headers()
+        self.sink.add_vulnerabilities('frontend', header_results['vulnerabilities'])
+        self.sink.add_compliant('frontend', header_results['compliant'])
         
-        return {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
+        self.audit_results['categories']['frontend'] = self.category_summary('frontend')
     
     def check_security_headers(self) -> Dict[str, List]:
         """Check for security headers implementation"""
@@ -246,108 +840,13 @@ class NocturneSecurityAuditor:
         
         return {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
     
-    def check_sensitive_data_exposure(self) -> Dict[str, List]:
-        """Check for sensitive data exposure"""
-        vulnerabilities = []
-        compliant_items = []
-        
-        # Patterns for sensitive data
-        sensitive_patterns = [
-            (r'password\s*[:=]\s*["\'][^"\']{1,}["\']', 'Hardcoded password'),
-            (r'api[_-]?key\s*[:=]\s*["\'][^"\']{10,}["\']', 'Hardcoded API key'),
-            (r'secret\s*[:=]\s*["\'][^"\']{10,}["\']', 'Hardcoded secret'),
-            (r'private[_-]?key\s*[:=]\s*["\'][^"\']{20,}["\']', 'Hardcoded private key'),
-            (r'token\s*[:=]\s*["\'][^"\']{20,}["\']', 'Hardcoded token'),
-        ]
-        
-        # Scan all text files
-        text_files = []
-        for ext in ['*.js', '*.html', '*.json', '*.env', '*.config', '*.py']:
-            text_files.extend(list(self.base_path.glob(f"**/{ext}")))
-        
-        for file_path in text_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                for pattern, description in sensitive_patterns:
-                    matches = re.finditer(pattern, content, re.IGNORECASE)
-                    for match in matches:
-                        line_num = content[:match.start()].count('\n') + 1
-                        vulnerabilities.append({
-                            'type': 'SENSITIVE_DATA',
-                            'severity': 'HIGH',
-                            'file': str(file_path.relative_to(self.base_path)),
-                            'line': line_num,
-                            'description': description,
-                            'recommendation': 'Move sensitive data to environment variables'
-                        })
-                
-                # Check for environment variable usage (good practice)
-                if 'process.env' in content or 'process.env.' in content:
-                    compliant_items.append({
-                        'type': 'ENV_VARS',
-                        'file': str(file_path.relative_to(self.base_path)),
-                        'description': 'Uses environment variables for configuration'
-                    })
-                    
-            except Exception as e:
-                print(f"  ⚠️ Could not scan {file_path}: {e}")
-        
-        return {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
-    
-    def check_secure_communication(self) -> Dict[str, List]:
-        """Check for secure communication practices"""
-        vulnerabilities = []
-        compliant_items = []
-        
-        # Scan for HTTP URLs (should be HTTPS)
-        text_files = []
-        for ext in ['*.js', '*.html', '*.json']:
-            text_files.extend(list(self.base_path.glob(f"**/{ext}")))
-        
-        for file_path in text_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Check for insecure HTTP URLs
-                http_matches = re.finditer(r'http://[^\s"\'<>]+', content)
-                for match in matches:
-                    if 'localhost' not in match.group() and '127.0.0.1' not in match.group():
-                        line_num = content[:match.start()].count('\n') + 1
-                        vulnerabilities.append({
-                            'type': 'INSECURE_URL',
-                            'severity': 'MEDIUM',
-                            'file': str(file_path.relative_to(self.base_path)),
-                            'line': line_num,
-                            'description': f'Insecure HTTP URL: {match.group()}',
-                            'recommendation': 'Use HTTPS URLs for external resources'
-                        })
-                
-                # Check for HTTPS usage (good practice)
-                https_count = len(re.findall(r'https://', content))
-                if https_count > 0:
-                    compliant_items.append({
-                        'type': 'HTTPS_USAGE',
-                        'file': str(file_path.relative_to(self.base_path)),
-                        'description': f'Uses HTTPS for {https_count} external resources'
-                    })
-                    
-            except Exception as e:
-                print(f"  ⚠️ Could not scan {file_path}: {e}")
-        
-        return {'vulnerabilities': vulnerabilities, 'compliant': compliant_items}
-    
     def audit_smart_contract_security(self) -> None:
         """Audit smart contract security"""
         vulnerabilities = []
         compliant_items = []
         
         # Find Rust contract files
-        rust_files = list(self.base_path.glob("**/*.rs"))
-        
-        if not rust_files:
+        if not self.files_matching('*.rs'):
             vulnerabilities.append({
                 'type': 'NO_CONTRACTS',
                 'severity': 'INFO',
@@ -355,72 +854,11 @@ class NocturneSecurityAuditor:
                 'recommendation': 'Ensure smart contracts are included in the audit scope'
             })
         
-        for rust_file in rust_files:
-            try:
-                with open(rust_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Check for common Solana/Anchor security issues
-                self.check_anchor_security_patterns(rust_file, content, vulnerabilities, compliant_items)
-                
-            except Exception as e:
-                print(f"  ⚠️ Could not scan {rust_file}: {e}")
+        # Common Solana/Anchor security issues were checked during the scan
+        self.sink.add_vulnerabilities('smart_contracts', vulnerabilities)
+        self.sink.add_compliant('smart_contracts', compliant_items)
         
-        self.audit_results['categories']['smart_contracts'] = {
-            'score': self.calculate_category_score(vulnerabilities, compliant_items),
-            'vulnerabilities': len(vulnerabilities),
-            'compliant_items': len(compliant_items)
-        }
-        
-        self.audit_results['vulnerabilities'].extend(vulnerabilities)
-        self.audit_results['compliant_items'].extend(compliant_items)
-    
-    def check_anchor_security_patterns(self, file_path: Path, content: str, vulnerabilities: List, compliant_items: List) -> None:
-        """Check for Anchor-specific security patterns"""
-        
-        # Check for proper access controls
-        if '#[access_control(' in content:
-            compliant_items.append({
-                'type': 'ACCESS_CONTROL',
-                'file': str(file_path.relative_to(self.base_path)),
-                'description': 'Implements access control checks'
-            })
-        
-        # Check for overflow protection
-        if 'checked_add' in content or 'checked_sub' in content or 'checked_mul' in content:
-            compliant_items.append({
-                'type': 'OVERFLOW_PROTECTION',
-                'file': str(file_path.relative_to(self.base_path)),
-                'description': 'Uses checked arithmetic operations'
-            })
-        
-        # Check for proper error handling
-        if 'Result<' in content and 'Error' in content:
-            compliant_items.append({
-                'type': 'ERROR_HANDLING',
-                'file': str(file_path.relative_to(self.base_path)),
-                'description': 'Implements proper error handling'
-            })
-        
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            (r'unwrap\(\)', 'Use of unwrap() can cause panics'),
-            (r'expect\([^)]*\)', 'Use of expect() can cause panics'),
-            (r'to_account_info\(\)\.try_borrow_mut_data\(\)', 'Direct data borrowing without checks'),
-        ]
-        
-        for pattern, description in dangerous_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                line_num = content[:match.start()].count('\n') + 1
-                vulnerabilities.append({
-                    'type': 'DANGEROUS_PATTERN',
-                    'severity': 'MEDIUM',
-                    'file': str(file_path.relative_to(self.base_path)),
-                    'line': line_num,
-                    'description': description,
-                    'recommendation': 'Use safer alternatives with proper error handling'
-                })
+        self.audit_results['categories']['smart_contracts'] = self.category_summary('smart_contracts')
     
     def audit_infrastructure_security(self) -> None:
         """Audit infrastructure security"""
@@ -460,14 +898,10 @@ class NocturneSecurityAuditor:
                 'recommendation': 'Add .gitignore to prevent committing sensitive files'
             })
         
-        self.audit_results['categories']['infrastructure'] = {
-            'score': self.calculate_category_score(vulnerabilities, compliant_items),
-            'vulnerabilities': len(vulnerabilities),
-            'compliant_items': len(compliant_items)
-        }
+        self.sink.add_vulnerabilities('infrastructure', vulnerabilities)
+        self.sink.add_compliant('infrastructure', compliant_items)
         
-        self.audit_results['vulnerabilities'].extend(vulnerabilities)
-        self.audit_results['compliant_items'].extend(compliant_items)
+        self.audit_results['categories']['infrastructure'] = self.category_summary('infrastructure')
     
     def audit_dependencies(self) -> None:
         """Audit dependency security"""
@@ -475,7 +909,7 @@ class NocturneSecurityAuditor:
         compliant_items = []
         
         # Check package.json for vulnerabilities
-        package_files = list(self.base_path.glob("**/package.json"))
+        package_files = [self.base_path / file for file in self.files_matching('package.json')]
         
         for package_file in package_files:
             try:
@@ -524,14 +958,10 @@ class NocturneSecurityAuditor:
             except Exception as e:
                 print(f"  ⚠️ Could not scan {package_file}: {e}")
         
-        self.audit_results['categories']['dependencies'] = {
-            'score': self.calculate_category_score(vulnerabilities, compliant_items),
-            'vulnerabilities': len(vulnerabilities),
-            'compliant_items': len(compliant_items)
-        }
+        self.sink.add_vulnerabilities('dependencies', vulnerabilities)
+        self.sink.add_compliant('dependencies', compliant_items)
         
-        self.audit_results['vulnerabilities'].extend(vulnerabilities)
-        self.audit_results['compliant_items'].extend(compliant_items)
+        self.audit_results['categories']['dependencies'] = self.category_summary('dependencies')
     
     def audit_configuration_security(self) -> None:
         """Audit configuration security"""
@@ -563,26 +993,30 @@ class NocturneSecurityAuditor:
                 except Exception as e:
                     print(f"  ⚠️ Could not scan {config_file}: {e}")
         
-        self.audit_results['categories']['configuration'] = {
-            'score': self.calculate_category_score(vulnerabilities, compliant_items),
-            'vulnerabilities': len(vulnerabilities),
-            'compliant_items': len(compliant_items)
-        }
+        self.sink.add_vulnerabilities('configuration', vulnerabilities)
+        self.sink.add_compliant('configuration', compliant_items)
         
-        self.audit_results['vulnerabilities'].extend(vulnerabilities)
-        self.audit_results['compliant_items'].extend(compliant_items)
+        self.audit_results['categories']['configuration'] = self.category_summary('configuration')
+    
+    def category_summary(self, category: str) -> Dict[str, int]:
+        """Score and counts of a category from the sink's tallies"""
+        tally = self.sink.tally(category)
+        return {
+            'score': self.calculate_category_score(tally),
+            'vulnerabilities': tally['vulnerabilities'],
+            'compliant_items': tally['compliant_items']
+        }
     
-    def calculate_category_score(self, vulnerabilities: List, compliant_items: List) -> int:
+    def calculate_category_score(self, tally: Dict[str, int]) -> int:
         """Calculate security score for a category"""
-        if not vulnerabilities and not compliant_items:
+        if not tally['vulnerabilities'] and not tally['compliant_items']:
             return 50  # Neutral score if no data
         
-        # Weight vulnerabilities by severity
-        severity_weights = {'HIGH': 10, 'MEDIUM': 5, 'LOW': 2, 'INFO': 1}
-        vulnerability_penalty = sum(severity_weights.get(v.get('severity', 'LOW'), 2) for v in vulnerabilities)
+        # Vulnerabilities were weighted by severity (SEVERITY_WEIGHTS) as they were tallied
+        vulnerability_penalty = tally['penalty']
         
         # Each compliant item adds points
-        compliant_points = len(compliant_items) * 3
+        compliant_points = tally['compliant_items'] * 3
         
         # Calculate score (max 100)
         base_score = 100
@@ -597,35 +1031,47 @@ class NocturneSecurityAuditor:
         category_scores = [cat['score'] for cat in self.audit_results['categories'].values()]
         self.audit_results['overall_score'] = int(sum(category_scores) / len(category_scores)) if category_scores else 0
         
+        self.audit_results['summary'] = {
+            'vulnerabilities': self.sink.vulnerabilities,
+            'compliant_items': self.sink.compliant_items,
+            'severity_counts': self.sink.severity_counts
+        }
+        
         # Generate recommendations
         self.generate_recommendations()
         
         # Save audit report
-        report_path = self.base_path / 'security-audit-report.json'
+        report_path = self.base_path / REPORT_FILE
         with open(report_path, 'w', encoding='utf-8') as f:
             json.dump(self.audit_results, f, indent=2)
         
         # Generate human-readable report
         self.generate_human_readable_report()
         
+        print(f"  🧾 Findings streamed to: {self.sink.path}")
         print(f"  📊 Audit report saved to: {report_path}")
+        
+        # Optional SARIF export, built from the findings stream
+        if self.sarif_path:
+            count = export_sarif(self.sink.path, self.sarif_path, self.base_path, self.audit_results['version'])
+            print(f"  🔎 SARIF log with {count} results saved to: {self.sarif_path}")
     
     def generate_recommendations(self) -> None:
         """Generate security recommendations"""
         recommendations = []
         
         # High-priority recommendations
-        high_vulns = [v for v in self.audit_results['vulnerabilities'] if v.get('severity') == 'HIGH']
+        high_vulns = self.sink.severity_counts.get('HIGH', 0)
         if high_vulns:
             recommendations.append({
                 'priority': 'HIGH',
                 'title': 'Address High-Severity Vulnerabilities',
-                'description': f'Fix {len(high_vulns)} high-severity vulnerabilities immediately',
+                'description': f'Fix {high_vulns} high-severity vulnerabilities immediately',
                 'action': 'Review and fix all HIGH severity issues before deployment'
             })
         
         # Security headers recommendation
-        header_vulns = [v for v in self.audit_results['vulnerabilities'] if v.get('type') == 'MISSING_HEADER']
+        header_vulns = self.sink.type_counts.get('MISSING_HEADER', 0)
         if header_vulns:
             recommendations.append({
                 'priority': 'MEDIUM',
@@ -635,7 +1081,7 @@ class NocturneSecurityAuditor:
             })
         
         # Dependency recommendations
-        dep_vulns = [v for v in self.audit_results['vulnerabilities'] if 'DEPENDENCY' in v.get('type', '')]
+        dep_vulns = sum(count for vuln_type, count in self.sink.type_counts.items() if 'DEPENDENCY' in vuln_type)
         if dep_vulns:
             recommendations.append({
                 'priority': 'MEDIUM',
@@ -663,22 +1109,17 @@ class NocturneSecurityAuditor:
         report_lines.extend([
             "",
             "🚨 VULNERABILITIES SUMMARY:",
-            f"  Total Issues: {len(self.audit_results['vulnerabilities'])}",
+            f"  Total Issues: {self.sink.vulnerabilities}",
         ])
         
         # Group by severity
-        severity_counts = {}
-        for vuln in self.audit_results['vulnerabilities']:
-            severity = vuln.get('severity', 'UNKNOWN')
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-        
-        for severity, count in sorted(severity_counts.items(), key=lambda x: {'HIGH': 4, 'MEDIUM': 3, 'LOW': 2, 'INFO': 1}.get(x[0], 0), reverse=True):
+        for severity, count in sorted(self.sink.severity_counts.items(), key=lambda x: {'HIGH': 4, 'MEDIUM': 3, 'LOW': 2, 'INFO': 1}.get(x[0], 0), reverse=True):
             report_lines.append(f"  {severity}: {count}")
         
         report_lines.extend([
             "",
             "✅ SECURITY STRENGTHS:",
-            f"  Total Compliant Items: {len(self.audit_results['compliant_items'])}",
+            f"  Total Compliant Items: {self.sink.compliant_items}",
             "",
             "🎯 TOP RECOMMENDATIONS:",
         ])
@@ -688,16 +1129,36 @@ class NocturneSecurityAuditor:
             report_lines.append(f"     {rec['description']}")
         
         # Save human-readable report
-        report_path = self.base_path / 'SECURITY_AUDIT_REPORT.md'
+        report_path = self.base_path / READABLE_REPORT_FILE
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write('\n'.join(report_lines))
         
         print(f"  📄 Human-readable report saved to: {report_path}")
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="NocturneSwap security auditor")
+    parser.add_argument("--clean", action="store_true",
+                        help="ignore the findings cache and rescan every file")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="skip paths matching a gitignore-style glob (repeatable)")
+    parser.add_argument("--max-file-size", type=int, default=DEFAULT_MAX_FILE_SIZE, metavar="BYTES",
+                        help="skip files larger than this, 0 for no limit; files over 4 MiB are scanned in streaming windows (default: %(default)s)")
+    parser.add_argument("--max-findings-per-rule", type=int, default=0, metavar="N",
+                        help="list at most N matches of each rule per file and sum up the rest (0 = list all, default: %(default)s)")
+    parser.add_argument("--sarif", metavar="PATH",
+                        help="also export the findings as a SARIF 2.1.0 log")
+    parser.add_argument("-j", "--jobs", type=int, default=0, metavar="N",
+                        help="number of worker processes for the file scan (0 = one per CPU, default: %(default)s)")
+    return parser.parse_args(argv)
+
 def main():
     """Main audit function"""
+    args = parse_args()
     try:
-        auditor = NocturneSecurityAuditor()
+        auditor = NocturneSecurityAuditor(jobs=args.jobs, use_cache=not args.clean,
+                                          excludes=args.exclude, max_file_size=args.max_file_size,
+                                          sarif_path=args.sarif, max_findings_per_rule=args.max_findings_per_rule)
         results = auditor.run_full_audit()
         
         if 'error' not in results:
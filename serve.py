@@ -6,14 +6,342 @@ Works on Android Codespaces and other environments without Node.js
 
 import http.server
 import socketserver
+import argparse
+import gzip
+import io
 import os
+import re
+import selectors
+import socket
 import sys
-from urllib.parse import urlparse
+import time
+import hashlib
+import datetime
+import email.utils
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse, urlsplit
 import mimetypes
 
-class ReactDevServer(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="/workspaces/NocturnePepecult/frontend/public", **kwargs)
+DEFAULT_DIRECTORY = Path(__file__).parent / "frontend" / "public"
+
+# Precompressed siblings written by optimize-performance.py, in order of preference
+PRECOMPRESSED_SUFFIXES = {
+    "br": ".br",
+    "zstd": ".zst",
+    "gzip": ".gz",
+}
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+)
+ON_THE_FLY_MIN_SIZE = 256
+ON_THE_FLY_MAX_SIZE = 8 * 1024 * 1024
+ON_THE_FLY_GZIP_LEVEL = 6
+
+# name.<hash>.ext files from the optimizer's fingerprinting stage never change
+FINGERPRINTED_FILE = re.compile(r'\.[0-9a-f]{10}\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+DEFAULT_CACHE_SIZE_MB = 64
+# Bodies larger than this skip the memory cache and go out with sendfile()
+DEFAULT_SENDFILE_THRESHOLD_KB = 128
+CACHE_CHECK_INTERVAL = 1.0
+
+DEFAULT_WORKERS = 32
+DEFAULT_MAX_CONNECTIONS = 1024
+DEFAULT_KEEP_ALIVE_TIMEOUT = 5
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+class FileStamp(NamedTuple):
+    mtime_ns: int
+    size: int
+    
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+class CachedAsset(NamedTuple):
+    data: bytes
+    etag: str
+    stamp: FileStamp
+
+class AssetCache:
+    """Size-bounded LRU of file bodies, revalidated against file mtimes"""
+    
+    def __init__(self, max_bytes: int, max_entry_bytes: int = DEFAULT_SENDFILE_THRESHOLD_KB * 1024,
+                 check_interval: float = CACHE_CHECK_INTERVAL):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.check_interval = check_interval
+        self.entries: "OrderedDict[tuple, CachedAsset]" = OrderedDict()
+        self.stamps: Dict[str, tuple] = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+    
+    def stat(self, path: str) -> Optional[FileStamp]:
+        """Stat a regular file, at most once per check interval"""
+        now = time.monotonic()
+        with self.lock:
+            checked = self.stamps.get(path)
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        
+        try:
+            st = os.stat(path)
+            stamp = FileStamp(st.st_mtime_ns, st.st_size) if os.path.isfile(path) else None
+        except OSError:
+            stamp = None
+        with self.lock:
+            if len(self.stamps) > 4 * len(self.entries) + 1024:
+                self.stamps.clear()
+            self.stamps[path] = (now, stamp)
+        return stamp
+    
+    def get(self, key: tuple, path: str, loader: Callable[[], bytes]) -> Optional[CachedAsset]:
+        """Return the cached body for key, reloading it when path has changed"""
+        stamp = self.stat(path)
+        if stamp is None:
+            return None
+        with self.lock:
+            asset = self.entries.get(key)
+            if asset is not None and asset.stamp == stamp:
+                self.entries.move_to_end(key)
+                return asset
+        
+        data = loader()
+        asset = CachedAsset(data, f'"{hashlib.blake2b(data, digest_size=12).hexdigest()}"', stamp)
+        if len(data) <= self.max_entry_bytes:
+            with self.lock:
+                previous = self.entries.pop(key, None)
+                if previous is not None:
+                    self.total_bytes -= len(previous.data)
+                self.entries[key] = asset
+                self.total_bytes += len(data)
+                while self.total_bytes > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.total_bytes -= len(evicted.data)
+        return asset
+
+class FileSpan:
+    """An open file and the byte span of it to send"""
+    
+    def __init__(self, file, offset: int, count: int):
+        self.file = file
+        self.offset = offset
+        self.count = count
+    
+    def close(self):
+        self.file.close()
+
+UNSATISFIABLE = object()
+
+class NocturneHTTPServer(socketserver.TCPServer):
+    """TCP server that hands requests to a bounded pool of worker threads.
+    
+    A worker only holds a connection while a request is being served; idle keep-alive
+    connections are parked in a selector until the client sends its next request, so
+    `workers` bounds concurrent requests and `max_connections` bounds open connections.
+    """
+    
+    allow_reuse_address = True
+    request_queue_size = 1024
+    
+    def __init__(self, server_address, handler_class, workers: int = DEFAULT_WORKERS,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.workers = workers
+        self.max_connections = max_connections
+        self.connection_slots = threading.BoundedSemaphore(max_connections)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nocturne-http")
+        # Idle keep-alive handlers, oldest (soonest to expire) first
+        self.parked: "OrderedDict[socket.socket, Tuple[object, float]]" = OrderedDict()
+        self.arriving = []
+        self.parking_lock = threading.Lock()
+        self.parking_closed = False
+        self.parking_selector = selectors.DefaultSelector()
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_reader.setblocking(False)
+        self.parking_selector.register(self.wakeup_reader, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self.parking_thread = threading.Thread(target=self.watch_parked, name="nocturne-keepalive", daemon=True)
+        self.parking_thread.start()
+    
+    def process_request(self, request, client_address):
+        if not self.connection_slots.acquire(blocking=False):
+            # Over the connection limit: shed load instead of queueing without bound
+            self.reject_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        handler = None
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+        self.park_or_close(request, handler)
+    
+    def resume_request_thread(self, handler):
+        """Serve the next request on a parked connection once the client has sent it"""
+        try:
+            handler.handle()
+            handler.finish()
+        except Exception:
+            handler.close_connection = True
+            self.handle_error(handler.request, handler.client_address)
+        self.park_or_close(handler.request, handler)
+    
+    def park_or_close(self, request, handler):
+        """Park a kept-alive connection without holding a worker, or close it and free its slot"""
+        if handler is not None and not getattr(handler, 'close_connection', True):
+            with self.parking_lock:
+                if not self.parking_closed:
+                    self.arriving.append(handler)
+                    self.wakeup_writer.send(b'\0')
+                    return
+        self.shutdown_request(request)
+        self.connection_slots.release()
+    
+    def watch_parked(self):
+        """Selector loop: hand readable parked connections to the pool, close ones idle past their timeout"""
+        while True:
+            timeout = None
+            if self.parked:
+                _, deadline = next(iter(self.parked.values()))
+                timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            for key, _ in self.parking_selector.select(timeout):
+                if key.fileobj is self.wakeup_reader:
+                    continue
+                handler, _ = self.parked.pop(key.fileobj)
+                self.parking_selector.unregister(key.fileobj)
+                try:
+                    self.executor.submit(self.resume_request_thread, handler)
+                except RuntimeError:
+                    # The pool has shut down
+                    self.close_parked(handler)
+            
+            try:
+                while self.wakeup_reader.recv(4096):
+                    pass
+            except BlockingIOError:
+                pass
+            with self.parking_lock:
+                arriving, self.arriving = self.arriving, []
+                closed = self.parking_closed
+            now = time.monotonic()
+            for handler in arriving:
+                deadline = now + handler.timeout if handler.timeout is not None else None
+                self.parked[handler.request] = (handler, deadline)
+                self.parking_selector.register(handler.request, selectors.EVENT_READ)
+            
+            while self.parked:
+                request, (handler, deadline) = next(iter(self.parked.items()))
+                if not closed and (deadline is None or deadline > now):
+                    break
+                del self.parked[request]
+                self.parking_selector.unregister(request)
+                self.close_parked(handler)
+            if closed:
+                self.parking_selector.close()
+                return
+    
+    def close_parked(self, handler):
+        handler.close_connection = True
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+        self.connection_slots.release()
+    
+    def reject_request(self, request):
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Content-Length: 0\r\n"
+                b"Retry-After: 1\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        with self.parking_lock:
+            self.parking_closed = True
+            self.wakeup_writer.send(b'\0')
+        self.parking_thread.join()
+        self.wakeup_reader.close()
+        self.wakeup_writer.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class NocturneStaticHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler that can serve precompressed assets in production mode"""
+    
+    # HTTP/1.1 keep-alive; idle connections are closed after `timeout` seconds
+    protocol_version = "HTTP/1.1"
+    timeout = DEFAULT_KEEP_ALIVE_TIMEOUT
+    disable_nagle_algorithm = True
+    
+    production = False
+    quiet = False
+    asset_cache = AssetCache(DEFAULT_CACHE_SIZE_MB * 1024 * 1024)
+    
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+    
+    def handle(self):
+        """Serve the requests that have already arrived; the server parks the connection in between"""
+        if not isinstance(self.server, NocturneHTTPServer):
+            return super().handle()
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.request_waiting():
+            self.handle_one_request()
+    
+    def request_waiting(self) -> bool:
+        """Whether a pipelined request is already buffered or readable, checked without blocking"""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+    
+    def finish(self):
+        # A kept-alive connection keeps its buffered reader for the next request
+        if self.close_connection:
+            super().finish()
+        else:
+            self.wfile.flush()
     
     def end_headers(self):
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -21,23 +349,277 @@ class ReactDevServer(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         super().end_headers()
     
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and urlsplit(self.path).path.endswith('/'):
+            index = os.path.join(path, 'index.html')
+            if os.path.isfile(index):
+                path = index
+        
+        source = self.asset_cache.stat(path)
+        if source is None:
+            # Directories, redirects and 404s keep the stock behaviour
+            return super().send_head()
+        
+        ctype = self.guess_type(path)
+        negotiate = self.production and ctype.startswith(COMPRESSIBLE_TYPES)
+        encoding, body_path, on_the_fly = None, path, False
+        if negotiate:
+            accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+            encoding = self.choose_encoding(path, source, accepted)
+            if encoding:
+                body_path = path + PRECOMPRESSED_SUFFIXES[encoding]
+            elif self.accepts(accepted, 'gzip') and ON_THE_FLY_MIN_SIZE <= source.size <= ON_THE_FLY_MAX_SIZE:
+                encoding, on_the_fly = 'gzip', True
+        
+        last_modified = int(source.mtime)
+        immutable = FINGERPRINTED_FILE.search(os.path.basename(path)) is not None
+        asset = None
+        body = source if on_the_fly else self.asset_cache.stat(body_path)
+        if body is None:
+            # The variant was removed after negotiation: send the file itself
+            encoding, body_path, body = None, path, source
+        try:
+            if on_the_fly:
+                asset = self.asset_cache.get((path, 'gzip'), path, lambda: self.compress_on_the_fly(path))
+            elif body.size <= self.asset_cache.max_entry_bytes:
+                asset = self.asset_cache.get((body_path, None), body_path, lambda: self.read_file(body_path))
+        except OSError:
+            # Removed since it was stat'ed: send the file itself, or 404 if that went too
+            encoding, body_path = None, path
+        
+        if asset is None:
+            # Too large to hold in memory: stream it from disk
+            return self.send_file_head(body_path, ctype, encoding, last_modified, negotiate, immutable)
+        
+        span = self.send_entity_head(asset.etag, last_modified, ctype, encoding, negotiate,
+                                     len(asset.data), immutable)
+        if span is None:
+            return None
+        start, end = span
+        if end - start + 1 == len(asset.data):
+            return io.BytesIO(asset.data)
+        return io.BytesIO(asset.data[start:end + 1])
+    
+    def choose_encoding(self, path: str, source: FileStamp, accepted: Dict[str, float]) -> Optional[str]:
+        """Pick the best precompressed sibling the client accepts"""
+        best, best_quality = None, 0.0
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality <= best_quality:
+                continue
+            variant = self.asset_cache.stat(path + suffix)
+            # Ignore variants older than the file they were made from
+            if variant is not None and variant.mtime >= source.mtime:
+                best, best_quality = encoding, quality
+        return best
+    
+    @staticmethod
+    def accepts(accepted: Dict[str, float], encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get('*', 0.0)) > 0
+    
+    @staticmethod
+    def read_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def compress_on_the_fly(self, path: str) -> bytes:
+        """gzip files that have no precompressed variant"""
+        # Fixed mtime keeps the bytes identical across recompressions, so ranges stay valid
+        return gzip.compress(self.read_file(path), compresslevel=ON_THE_FLY_GZIP_LEVEL, mtime=0)
+    
+    def is_not_modified(self, etag: str, last_modified: int) -> bool:
+        """Evaluate If-None-Match / If-Modified-Since against the representation"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            candidates = [tag.strip() for tag in if_none_match.split(',')]
+            # If-None-Match uses weak comparison
+            return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            since = self.parse_http_date(if_modified_since)
+            return since is not None and last_modified <= since
+        return False
+    
+    def parse_range(self, length: int, etag: str, last_modified: int):
+        """Resolve a single Range header to (start, end), None for the whole body, or UNSATISFIABLE"""
+        header = self.headers.get('Range')
+        if not header or not header.strip().lower().startswith('bytes='):
+            return None
+        
+        if_range = self.headers.get('If-Range')
+        if if_range is not None:
+            if_range = if_range.strip()
+            if if_range.startswith(('"', 'W/')):
+                if if_range != etag:
+                    return None
+            elif self.parse_http_date(if_range) != last_modified:
+                return None
+        
+        spec = header.strip()[6:].strip()
+        if ',' in spec:
+            # Multipart ranges are not supported; send the whole body
+            return None
+        first, _, last = spec.partition('-')
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix <= 0:
+                    return UNSATISFIABLE
+                return max(0, length - suffix), length - 1
+            start = int(first)
+            end = int(last) if last else length - 1
+        except ValueError:
+            return None
+        if start >= length:
+            return UNSATISFIABLE
+        if end < start:
+            return None
+        return start, min(end, length - 1)
+    
+    @staticmethod
+    def parse_http_date(value: str) -> Optional[int]:
+        try:
+            parsed = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return int(parsed.timestamp())
+    
+    def send_entity_head(self, etag: str, last_modified: int, ctype: str, encoding: Optional[str],
+                         vary: bool, length: int, immutable: bool = False) -> Optional[Tuple[int, int]]:
+        """Send 304/416/206/200 headers; returns the byte span to send, or None for no body"""
+        if self.is_not_modified(etag, last_modified):
+            status, span = 304, None
+        else:
+            span = self.parse_range(length, etag, last_modified)
+            if span is UNSATISFIABLE:
+                status, span = 416, None
+            elif span is None:
+                status, span = 200, (0, length - 1)
+            else:
+                status = 206
+        
+        self.send_response(status)
+        if status == 416:
+            self.send_header("Content-Range", f"bytes */{length}")
+            self.send_header("Content-Length", "0")
+        elif status != 304:
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(span[1] - span[0] + 1))
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {span[0]}-{span[1]}/{length}")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(last_modified))
+        if vary:
+            self.send_header("Vary", "Accept-Encoding")
+        cache_control = self.cache_control(immutable)
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        return span
+    
+    def cache_control(self, immutable: bool) -> Optional[str]:
+        """Cache-Control for a file response: fingerprinted names never change"""
+        return IMMUTABLE_CACHE_CONTROL if immutable else None
+    
+    def send_file_head(self, path: str, ctype: str, encoding: Optional[str], last_modified: int, vary: bool,
+                       immutable: bool = False):
+        """Send headers for a file on disk and return it for a zero-copy send"""
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        try:
+            fs = os.fstat(f.fileno())
+            etag = f'"{fs.st_mtime_ns:x}-{fs.st_size:x}"'
+            span = self.send_entity_head(etag, last_modified, ctype, encoding, vary, fs.st_size, immutable)
+            if span is not None and span[1] >= span[0]:
+                return FileSpan(f, span[0], span[1] - span[0] + 1)
+            f.close()
+            return None
+        except Exception:
+            f.close()
+            raise
+    
+    def copyfile(self, source, outputfile):
+        if isinstance(source, io.BytesIO):
+            # Cached bodies go out in a single write
+            outputfile.write(source.getbuffer())
+        elif isinstance(source, FileSpan):
+            # socket.sendfile() uses os.sendfile() where available and falls back to send()
+            self.connection.sendfile(source.file, source.offset, source.count)
+        else:
+            super().copyfile(source, outputfile)
+
+class ReactDevServer(NocturneStaticHandler):
+    root = DEFAULT_DIRECTORY
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(self.root), **kwargs)
+    
     def do_GET(self):
         # For React Router, serve index.html for all routes except static files
         if not self.path.startswith('/static/') and not '.' in self.path.split('/')[-1]:
             self.path = '/index.html'
         return super().do_GET()
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="NocturneSwap static server")
+    parser.add_argument("--directory", default=str(DEFAULT_DIRECTORY),
+                        help="directory to serve (default: %(default)s)")
+    add_server_arguments(parser)
+    return parser.parse_args(argv)
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by serve.py and dev-server.py"""
+    parser.add_argument("--production", action="store_true",
+                        help="serve precompressed .br/.gz siblings based on Accept-Encoding")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker threads serving requests; idle keep-alive connections do not hold one (default: %(default)s)")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help="open connections before new ones get 503 (default: %(default)s)")
+    parser.add_argument("--keep-alive", type=float, default=DEFAULT_KEEP_ALIVE_TIMEOUT,
+                        help="idle keep-alive timeout in seconds (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="disable per-request access logging")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help="in-memory asset cache size in MB, 0 to disable (default: %(default)s)")
+    parser.add_argument("--sendfile-threshold", type=int, default=DEFAULT_SENDFILE_THRESHOLD_KB,
+                        help="bodies above this many KB are sent with sendfile() instead of cached (default: %(default)s)")
+
+def create_server(port: int, handler_class, args: argparse.Namespace) -> NocturneHTTPServer:
+    """Configure a handler class from the command line and bind a server for it"""
+    handler_class.production = args.production
+    handler_class.timeout = args.keep_alive
+    handler_class.quiet = args.quiet
+    handler_class.asset_cache = AssetCache(args.cache_size * 1024 * 1024, args.sendfile_threshold * 1024)
+    return NocturneHTTPServer(("", port), handler_class,
+                              workers=args.workers, max_connections=args.max_connections)
+
 def main():
+    args = parse_args()
     PORT = int(os.environ.get('PORT', 3000))
     
     # Change to the frontend directory
-    os.chdir('/workspaces/NocturnePepecult/frontend/public')
+    ReactDevServer.root = Path(args.directory).resolve()
+    os.chdir(ReactDevServer.root)
     
     try:
-        with socketserver.TCPServer(("", PORT), ReactDevServer) as httpd:
+        with create_server(PORT, ReactDevServer, args) as httpd:
             print(f"🌙 NocturneSwap Dev Server")
             print(f"🚀 Server starting on http://localhost:{PORT}")
             print(f"📁 Serving files from: {os.getcwd()}")
+            print(f"🧵 {httpd.workers} workers, up to {httpd.max_connections} connections")
+            if args.production:
+                print(f"📦 Production mode: serving precompressed assets")
             print(f"🔄 Press Ctrl+C to stop the server")
             print()
             httpd.serve_forever()
@@ -0,0 +1,29 @@
+"""Shared fixtures for the Python build tool tests"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+def load_script(filename: str):
+    """Import one of the hyphenated tool scripts (optimize-performance.py) as a module"""
+    name = Path(filename).stem.replace('-', '_')
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, REPO_ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="session")
+def optimizer():
+    return load_script("optimize-performance.py")
+
+@pytest.fixture(scope="session")
+def auditor():
+    return load_script("security-audit.py")
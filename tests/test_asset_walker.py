@@ -0,0 +1,67 @@
+"""asset_walker: gitignore glob translation and the shared FileWalker"""
+
+import re
+
+import pytest
+
+from asset_walker import FileWalker, IgnoreRules, translate_gitignore_glob
+
+@pytest.mark.parametrize("glob, path, matches", [
+    ("*.js", "app.js", True),
+    ("*.js", "src/app.js", False),
+    ("src/*.js", "src/app.js", True),
+    ("src/*.js", "src/lib/app.js", False),
+    ("**/app.js", "app.js", True),
+    ("**/app.js", "a/b/app.js", True),
+    ("src/**", "src/a/b.js", True),
+    ("a/**/b", "a/b", True),
+    ("a/**/b", "a/x/y/b", True),
+    ("?.js", "a.js", True),
+    ("?.js", "/.js", False),
+    ("[ab].js", "b.js", True),
+    ("[!ab].js", "c.js", True),
+    ("[!ab].js", "a.js", False),
+    ("[a-c]x", "/x", False),
+    ("\\*.js", "*.js", True),
+    ("\\*.js", "a.js", False),
+    ("[.js", "[.js", True),
+])
+def test_translate_gitignore_glob(glob, path, matches):
+    assert bool(re.fullmatch(translate_gitignore_glob(glob), path, re.DOTALL)) is matches
+
+def test_ignore_rules_anchoring_negation_and_directories():
+    rules = IgnoreRules("", ["build/", "/root.txt", "*.log", "!keep.log", "# comment", ""])
+    assert rules.match("build", True) is True
+    assert rules.match("build", False) is None
+    assert rules.match("root.txt", False) is True
+    assert rules.match("sub/root.txt", False) is None
+    assert rules.match("sub/debug.log", False) is True
+    assert rules.match("sub/keep.log", False) is False
+
+def test_nested_gitignore_overrides_and_walk_order(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.tmp\nignored/\n")
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / "ignored" / "a.js").write_text("x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".gitignore").write_text("!keep.tmp\n")
+    (tmp_path / "sub" / "keep.tmp").write_text("x")
+    (tmp_path / "sub" / "drop.tmp").write_text("x")
+    (tmp_path / "b.js").write_text("x")
+    (tmp_path / "a.tmp").write_text("x")
+    walked = [entry.relative for entry in FileWalker(tmp_path)]
+    assert walked == [".gitignore", "b.js", "sub/.gitignore", "sub/keep.tmp"]
+
+def test_include_filters_names_before_sniffing(tmp_path, monkeypatch):
+    (tmp_path / "app.js").write_text("let x = 1")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\0\0")
+    (tmp_path / "notes.md").write_text("hi")
+    (tmp_path / "blob.js").write_bytes(b"\0\0\0")
+    sniffed = []
+    monkeypatch.setattr(FileWalker, "is_binary", staticmethod(
+        lambda path, original=FileWalker.is_binary: sniffed.append(path) or original(path)))
+    
+    walker = FileWalker(tmp_path, skip_binary=True, include=["*.js"])
+    assert [entry.relative for entry in walker] == ["app.js"]
+    assert walker.skipped == ["blob.js"]
+    assert sorted(path.rsplit("/", 1)[-1] for path in sniffed) == ["app.js", "blob.js"]
+    assert list(FileWalker(tmp_path, include=[])) == []
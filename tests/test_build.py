@@ -0,0 +1,18 @@
+"""build.py: critical CSS extraction"""
+
+import build
+
+def test_selector_lists_split_on_top_level_commas_only():
+    blocks = build.parse_css_blocks(".hero :is(.a, .b) { color: red } .x:not(.y, .z), .missing { margin: 0 }")
+    assert build.select_critical_rules(blocks, {"hero", "x"}) == [
+        ".hero :is(.a, .b){color: red}", ".x:not(.y, .z){margin: 0}"]
+
+def test_critical_css_is_minified():
+    css = """
+    /* first screen */
+    .hero { color: #ff0000; margin: 0px 0px; opacity: 0.50 }
+    .footer { color: blue }
+    @media (max-width: 600px) { .hero { padding: 0.0em } }
+    """
+    critical = build.extract_critical_css(css, '<div class="hero"></div>', "")
+    assert critical == ".hero{color:#f00;margin:0 0;opacity:.5}@media (max-width:600px){.hero{padding:0}}"
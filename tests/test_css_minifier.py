@@ -0,0 +1,55 @@
+"""CSSMinifier: duplicate selector merging and value shortening"""
+
+import pytest
+
+@pytest.mark.parametrize("css", [
+    ".a{color:red}.b{font:12px/1 Arial}.a{line-height:2}",
+    ".a{color:red}.b{inset:0}.a{top:5px}",
+    ".a{color:red}.b{top:5px}.a{inset:0}",
+    ".a{color:red}.b{gap:1px}.a{row-gap:2px}",
+    ".a{color:red}.b{grid-gap:1px}.a{gap:2px}",
+    ".a{color:red}.b{all:unset}.a{margin:0}",
+    ".a{color:red}.b{margin:0}.a{all:unset}",
+    ".a{color:red}.b{place-items:center}.a{align-items:start}",
+    ".a{color:red}.b{margin:0}.a{margin-top:1px}",
+])
+def test_merge_keeps_rules_behind_resetting_shorthands(optimizer, css):
+    assert optimizer.minify_css_content(css) == css
+
+def test_merge_moves_unrelated_rules(optimizer):
+    css = ".a{color:red}.b{font:12px Arial}.a{margin:0}"
+    assert optimizer.minify_css_content(css) == ".a{color:red;margin:0}.b{font:12px Arial}"
+
+@pytest.mark.parametrize("value, expected", [
+    ("0.50em", ".5em"),
+    ("0.0", "0"),
+    ("1.0", "1"),
+    ("10.250%", "10.25%"),
+    ("-0.50px", "-.5px"),
+    ("0.0em", "0"),
+    ("rgba(0,0,0,0.50)", "rgba(0,0,0,.5)"),
+    ("1.5", "1.5"),
+])
+def test_number_shortening(optimizer, value, expected):
+    assert optimizer.minify_css_content(f".a{{opacity:{value}}}") == f".a{{opacity:{expected}}}"
+
+def test_fallback_declarations_are_kept(optimizer):
+    css = (".particle-canvas {\n  display: block;\n  image-rendering: optimizeSpeed;\n"
+           "  image-rendering: crisp-edges;\n  image-rendering: pixelated;\n}\n"
+           ".full { height: 100vh; height: 100dvh; overflow: hidden; overflow: clip; }")
+    assert optimizer.minify_css_content(css) == (
+        ".particle-canvas{display:block;image-rendering:optimizeSpeed;image-rendering:crisp-edges;"
+        "image-rendering:pixelated}.full{height:100vh;height:100dvh;overflow:hidden;overflow:clip}")
+
+def test_repeated_identical_declarations_keep_the_last(optimizer):
+    assert optimizer.minify_css_content(".a{color:red;margin:0;color:red}") == ".a{margin:0;color:red}"
+    assert optimizer.minify_css_content(".a{color:red!important;color:red}") == ".a{color:red!important;color:red}"
+
+@pytest.mark.parametrize("css, expected", [
+    ("a{margin:0/*x*/auto}", "a{margin:0 auto}"),
+    ("a{margin:0 /*x*/ auto}", "a{margin:0 auto}"),
+    ("a{color:/*x*/red/*y*/}", "a{color:red}"),
+    ("/*x*/a/*y*/,b{color:red}", "a,b{color:red}"),
+])
+def test_comments_still_separate_tokens(optimizer, css, expected):
+    assert optimizer.minify_css_content(css) == expected
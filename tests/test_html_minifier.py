@@ -0,0 +1,33 @@
+"""optimize-performance.py: HTML minifier end tag omission"""
+
+import pytest
+
+@pytest.mark.parametrize("source, expected", [
+    ("<ul>\n  <li>One</li>\n  <li>Two</li>\n</ul>", "<ul><li>One<li>Two</ul>"),
+    ("<dl><dt>A</dt><dd>B</dd></dl>", "<dl><dt>A<dd>B</dl>"),
+    ("<table><tr><td>1</td><td>2</td></tr><tr><td>3</td></tr></table>",
+     "<table><tr><td>1<td>2<tr><td>3</table>"),
+    ("<select><option>a</option><option>b</option></select>", "<select><option>a<option>b</select>"),
+    ("<p>One</p>\n<p>Two</p><div></div>", "<p>One<p>Two<div></div>"),
+    ("<html><head><title>T</title></head><body><p>x</p></body></html>",
+     "<html><head><title>T</title><body><p>x"),
+])
+def test_optional_end_tags_are_left_out(optimizer, source, expected):
+    assert optimizer.minify_html_content(source) == expected
+
+@pytest.mark.parametrize("source, expected", [
+    # Only block elements close a paragraph
+    ("<p>Hi</p><span>x</span>", "<p>Hi</p><span>x</span>"),
+    # Text after the end tag would otherwise join the element
+    ("<li>a</li> b", "<li>a</li>b"),
+    # Inside a transparent parent the paragraph would swallow the rest of the link
+    ('<a href="/"><p>Hi</p></a>', '<a href="/"><p>Hi</p></a>'),
+    # A <dt> is never the last child of its list
+    ("<dl><dt>A</dt></dl>", "<dl><dt>A</dt></dl>"),
+    ("<head><title>T</title></head><p>x", "<head><title>T</title></head><p>x"),
+])
+def test_end_tags_are_kept_where_omission_changes_the_tree(optimizer, source, expected):
+    assert optimizer.minify_html_content(source) == expected
+
+def test_preformatted_text_is_left_alone(optimizer):
+    assert optimizer.minify_html_content("<div>\n<pre>  a\n  b</pre>\n</div>") == "<div><pre>  a\n  b</pre></div>"
@@ -0,0 +1,30 @@
+"""JSMinifier: comments, literals and the whitespace that must survive"""
+
+import pytest
+
+@pytest.mark.parametrize("source, expected", [
+    ("var a = 1 // c\nvar b = 2", "var a=1\nvar b=2"),
+    ('s = "a // b" + \'c /* d */\'', 's="a // b"+\'c /* d */\''),
+    ("t = `x ${ a + `y ${b}` } // z`", "t=`x ${a+`y ${b}`} // z`"),
+    ("/*! keep me */\nfoo()", "/*! keep me */foo()"),
+])
+def test_comments_and_literals(optimizer, source, expected):
+    assert optimizer.minify_js_content(source) == expected
+
+@pytest.mark.parametrize("source, expected", [
+    # Division versus regular expression literals
+    ("const re = /\\/\\*x*\\//g; x = a / b / c", "const re=/\\/\\*x*\\//g;x=a/b/c"),
+    ("if (x) /re/.test(y)", "if(x)/re/.test(y)"),
+    # Spaces that keep operators apart
+    ("a = b - -c; d = e + +f; g = h+ ++i", "a=b- -c;d=e+ +f;g=h+ ++i"),
+    # Newlines that automatic semicolon insertion depends on
+    ("a = b\n++c", "a=b\n++c"),
+    ("return\nx", "return\nx"),
+    ("x = y\n(z)", "x=y\n(z)"),
+])
+def test_tokens_keep_their_meaning(optimizer, source, expected):
+    assert optimizer.minify_js_content(source) == expected
+
+def test_unterminated_strings_are_rejected(optimizer):
+    with pytest.raises(optimizer.MinifyError):
+        optimizer.minify_js_content("var x = 'unterminated")
@@ -0,0 +1,75 @@
+"""NocturneOptimizer: incremental builds and stale output pruning"""
+
+import json
+
+import pytest
+
+@pytest.fixture
+def site(tmp_path):
+    frontend = tmp_path / "frontend"
+    (frontend / "src").mkdir(parents=True)
+    (frontend / "index.html").write_text(
+        '<!doctype html><html><head><link rel="stylesheet" href="src/app.css"></head>'
+        '<body><p class="title">Hi</p><script src="src/app.js"></script></body></html>'
+    )
+    (frontend / "src" / "app.css").write_text(".title { color: #ff0000; }\n.unused { margin: 0px; }\n")
+    (frontend / "src" / "app.js").write_text("// greet\nconsole.log( 'hi' );\n")
+    return tmp_path
+
+def optimize(optimizer, site, **settings):
+    nocturne = optimizer.NocturneOptimizer(str(site), settings={"encodings": ["gzip"], **settings})
+    assert nocturne.optimize_all()
+    return nocturne
+
+def shipped(site):
+    return sorted(path.relative_to(site / "optimized").as_posix()
+                  for path in (site / "optimized").rglob("*") if path.is_file())
+
+def test_second_run_reuses_every_output(optimizer, site):
+    optimize(optimizer, site)
+    first = shipped(site)
+    nocturne = optimize(optimizer, site)
+    assert nocturne.metrics["files_processed"] == 0
+    assert nocturne.metrics["files_cached"] == 3
+    assert shipped(site) == first
+
+def test_outputs_of_removed_sources_go_without_a_cache(optimizer, site):
+    optimize(optimizer, site)
+    stale = site / "optimized" / "src" / "old" / "legacy.js"
+    stale.parent.mkdir()
+    stale.write_text("old")
+    (site / "optimized" / "src" / "old" / "legacy.js.gz").write_bytes(b"old")
+    (site / optimizer.CACHE_FILE).unlink()
+    
+    optimize(optimizer, site)
+    assert not (site / "optimized" / "src" / "old").exists()
+    manifest = json.loads((site / "optimized" / optimizer.MANIFEST_FILE).read_text())
+    assert "src/old/legacy.js" not in [entry["path"] for entry in manifest["files"]]
+
+def test_unreachable_pages_from_an_earlier_build_are_removed(optimizer, site):
+    (site / "frontend" / "index-broken-backup.html").write_text("<!doctype html><p>old</p>")
+    optimize(optimizer, site, prune_unreachable=False)
+    assert "index-broken-backup.html" in shipped(site)
+    (site / optimizer.CACHE_FILE).unlink()
+    
+    nocturne = optimize(optimizer, site)
+    assert nocturne.unreachable == ["index-broken-backup.html"]
+    assert "index-broken-backup.html" not in shipped(site)
+    assert optimizer.MANIFEST_FILE in shipped(site)
+    manifest = json.loads((site / "optimized" / optimizer.MANIFEST_FILE).read_text())
+    assert "index-broken-backup.html" not in [entry["path"] for entry in manifest["files"]]
+
+def test_reachability_follows_css_and_js_references(optimizer, site):
+    frontend = site / "frontend"
+    (frontend / "src" / "app.css").write_text('@import "theme.css";\n.title { color: red; }\n')
+    (frontend / "src" / "theme.css").write_text(".title { background: url(../img/bg.png); }\n")
+    (frontend / "src" / "app.js").write_text("import { greet } from './greet';\ngreet();\n")
+    (frontend / "src" / "greet.js").write_text("export function greet() {}\n")
+    (frontend / "src" / "orphan.js").write_text("console.log('never loaded');\n")
+    (frontend / "img").mkdir()
+    (frontend / "img" / "bg.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+    
+    nocturne = optimizer.NocturneOptimizer(str(site), settings={"encodings": []})
+    nocturne.find_reachable()
+    assert sorted(path.relative_to(frontend.resolve()).as_posix() for path in nocturne.reachable) == [
+        "img/bg.png", "index.html", "src/app.css", "src/app.js", "src/greet.js", "src/theme.css"]
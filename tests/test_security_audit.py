@@ -0,0 +1,102 @@
+"""security-audit.py: rule engine, findings cache and SARIF export"""
+
+import json
+
+import pytest
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.js").write_text("const a = 1;\neval(input);\nel.innerHTML = '<b>' + name;\n")
+    (tmp_path / "index.html").write_text('<script src="http://cdn.example.com/x.js"></script>\n')
+    (tmp_path / "notes.md").write_text("eval(nothing)\n")
+    return tmp_path
+
+def audit(auditor, project, **options):
+    nocturne = auditor.NocturneSecurityAuditor(str(project), jobs=1, **options)
+    results = nocturne.run_full_audit()
+    assert 'error' not in results
+    return nocturne
+
+def findings(project, auditor):
+    with open(project / auditor.FINDINGS_FILE, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_rules_report_each_match_once_in_rule_order(auditor):
+    content = "x.innerHTML = a + b;\neval(1); eval(2)\n"
+    rule_findings, markers = auditor.RULE_ENGINE.findings("a.js", [(content, len(content))], ["xss"])
+    assert [(finding["rule"], finding["line"], finding["column"]) for finding in rule_findings["xss"]] == [
+        ("innerhtml-concat", 1, 3), ("eval", 2, 1), ("eval", 2, 10)]
+
+def test_findings_beyond_the_per_rule_limit_are_summed_up(auditor):
+    content = "eval(1)\n" * 5
+    rule_findings, _ = auditor.RULE_ENGINE.findings("a.js", [(content, len(content))], ["xss"])
+    assert [finding.get("line") for finding in rule_findings["xss"]] == [1, 2, 3, 4, 5]
+    
+    rule_findings, _ = auditor.RULE_ENGINE.findings("a.js", [(content, len(content))], ["xss"], max_per_rule=3)
+    assert [finding.get("line") for finding in rule_findings["xss"]] == [1, 2, 3, None]
+    assert rule_findings["xss"][-1]["description"] == "2 more matches of rule eval not listed"
+
+def test_a_changed_findings_limit_invalidates_the_cache(auditor, project):
+    (project / "app.js").write_text("eval(1);\neval(2);\neval(3);\n")
+    audit(auditor, project, max_findings_per_rule=1)
+    assert len([finding for finding in findings(project, auditor) if finding.get("rule") == "eval"]) == 2
+    audit(auditor, project)
+    assert [finding["line"] for finding in findings(project, auditor) if finding.get("rule") == "eval"] == [1, 2, 3]
+
+def test_cached_findings_are_carried_over_unchanged(auditor, project):
+    audit(auditor, project)
+    first = findings(project, auditor)
+    assert {finding["file"] for finding in first if finding.get("rule") == "eval"} == {"app.js"}
+    
+    (project / "index.html").touch()
+    nocturne = audit(auditor, project)
+    assert findings(project, auditor) == first
+    index = json.loads((project / auditor.CACHE_FILE).read_text())
+    assert sorted(index["entries"]) == ["app.js", "index.html"]
+    assert all("checks" not in entry for entry in index["entries"].values())
+    assert index["findings_size"] == (project / auditor.CACHE_FINDINGS_FILE).stat().st_size
+    
+    (project / "app.js").write_text("const a = 1;\n")
+    audit(auditor, project)
+    assert not [finding for finding in findings(project, auditor) if finding.get("file") == "app.js"
+                and finding["kind"] == "vulnerability"]
+
+def test_a_changed_sidecar_invalidates_the_cache(auditor, project):
+    audit(auditor, project)
+    first = findings(project, auditor)
+    (project / auditor.CACHE_FINDINGS_FILE).write_text("{}\n")
+    audit(auditor, project)
+    assert findings(project, auditor) == first
+
+def test_sarif_export(auditor, project):
+    audit(auditor, project, sarif_path=str(project / "audit.sarif"))
+    sarif = json.loads((project / "audit.sarif").read_text())
+    run = sarif["runs"][0]
+    results = {(result["ruleId"], result["locations"][0]["physicalLocation"]["region"]["startLine"])
+               for result in run["results"] if result.get("locations")}
+    assert ("eval", 2) in results
+    assert {"eval", "innerhtml-concat"} <= {rule["id"] for rule in run["tool"]["driver"]["rules"]}
+    assert run["originalUriBaseIds"]["SRCROOT"]["uri"].startswith("file://")
+
+def test_windowed_scan_matches_a_whole_file_scan(auditor, tmp_path):
+    # Short lines, and matches straddling every window boundary, with the overlap cut mid-line
+    content = "".join(f"x{i}.innerHTML = a + b; eval({i})\n" for i in range(200))
+    path = tmp_path / "big.js"
+    path.write_text(content)
+    checks = ["xss", "smart_contracts"]
+    whole = auditor.RULE_ENGINE.findings("big.js", [(content, len(content))], checks)
+    assert len(whole[0]["xss"]) == 400
+    for chunk, overlap in [(64, 16), (97, 40), (500, 7)]:
+        windows = list(auditor.read_windows(str(path), chunk=chunk, overlap=overlap))
+        assert len(windows) > 1
+        assert auditor.RULE_ENGINE.findings("big.js", windows, checks) == whole
+
+def test_files_past_one_window_are_streamed_by_default(auditor, project):
+    lines = auditor.STREAM_CHUNK // 11 + 1000
+    with open(project / "vendor.js", "w") as f:
+        f.write("var a = 1;\n" * lines)
+        f.write("eval(payload);\n")
+    assert (project / "vendor.js").stat().st_size > auditor.STREAM_CHUNK
+    audit(auditor, project)
+    assert ("vendor.js", lines + 1) in [(finding["file"], finding["line"]) for finding in findings(project, auditor)
+                                     if finding.get("rule") == "eval"]
@@ -0,0 +1,197 @@
+"""serve.py: keep-alive connections parked between requests, asset cache, conditional and range requests"""
+
+import http.client
+import os
+import threading
+import time
+
+import pytest
+
+import serve
+from conftest import load_script
+
+def start_server(directory, base=serve.NocturneStaticHandler):
+    class Handler(base):
+        quiet = True
+        timeout = 2
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(directory), **kwargs)
+    
+    httpd = serve.NocturneHTTPServer(("127.0.0.1", 0), Handler, workers=2, max_connections=8)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "index.html").write_text("<!doctype html><p>hi</p>")
+    (tmp_path / "app.js").write_text("console.log(1)")
+    (tmp_path / "app.0123456789.js").write_text("console.log(2)")
+    return tmp_path
+
+@pytest.fixture
+def server(site):
+    httpd = start_server(site)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def connect(httpd):
+    return http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+
+def get(connection, path="/index.html"):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+def test_idle_keep_alive_connections_do_not_hold_workers(server):
+    idle = [connect(server) for _ in range(2)]
+    for connection in idle:
+        assert get(connection)[0] == 200
+    
+    started = time.monotonic()
+    third = connect(server)
+    assert get(third)[0] == 200
+    assert time.monotonic() - started < 1
+    
+    # The parked connections still serve their next request
+    for connection in idle + [third]:
+        assert get(connection, "/app.js") == (200, b"console.log(1)")
+        connection.close()
+
+def test_parked_connections_expire_and_free_their_slot(server):
+    connection = connect(server)
+    assert get(connection)[0] == 200
+    # The server closes the idle connection after the handler timeout
+    assert connection.sock.recv(1) == b""
+    connection.close()
+    deadline = time.monotonic() + 5
+    while server.parked:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    for _ in range(server.max_connections):
+        assert server.connection_slots.acquire(timeout=1)
+
+def test_pipelined_requests_on_one_connection(server):
+    connection = connect(server)
+    connection.connect()
+    connection.sock.sendall(b"GET /app.js HTTP/1.1\r\nHost: x\r\n\r\n" * 2)
+    data = b""
+    deadline = time.monotonic() + 5
+    while data.count(b"console.log(1)") < 2:
+        assert time.monotonic() < deadline
+        data += connection.sock.recv(65536)
+    assert data.count(b"HTTP/1.0 200") + data.count(b"HTTP/1.1 200") == 2
+    connection.close()
+
+@pytest.mark.parametrize("script, expected", [
+    (None, ["public, max-age=31536000, immutable"]),
+    ("dev-server.py", ["no-cache"]),
+])
+def test_fingerprinted_assets_get_exactly_one_cache_control(site, script, expected):
+    httpd = start_server(site, load_script(script).NocturneDevServer if script else serve.NocturneStaticHandler)
+    try:
+        connection = connect(httpd)
+        connection.request("HEAD", "/app.0123456789.js")
+        response = connection.getresponse()
+        response.read()
+        assert response.headers.get_all("Cache-Control") == expected
+        connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def request(httpd, path, headers=None):
+    connection = connect(httpd)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+def test_conditional_requests_get_304(server):
+    response, body = request(server, "/app.js")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert response.status == 200 and body == b"console.log(1)"
+    
+    for headers in ({"If-None-Match": etag}, {"If-None-Match": f'"other", W/{etag}'},
+                    {"If-Modified-Since": last_modified}):
+        response, body = request(server, "/app.js", headers)
+        assert (response.status, body) == (304, b"")
+        assert response.headers["ETag"] == etag
+    
+    # If-None-Match wins over If-Modified-Since
+    response, body = request(server, "/app.js", {"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+    assert (response.status, body) == (200, b"console.log(1)")
+
+def test_asset_cache_reloads_changed_files_and_evicts_least_recent(tmp_path):
+    cache = serve.AssetCache(max_bytes=10, max_entry_bytes=6, check_interval=0)
+    paths = {}
+    for name, data in (("a", b"aaaa"), ("b", b"bbbb"), ("big", b"x" * 8)):
+        paths[name] = str(tmp_path / name)
+        (tmp_path / name).write_bytes(data)
+    read = serve.NocturneStaticHandler.read_file
+    
+    first = cache.get(("a",), paths["a"], lambda: read(paths["a"]))
+    assert cache.get(("a",), paths["a"], lambda: b"never loaded") is first
+    (tmp_path / "a").write_bytes(b"AAAAA")
+    os.utime(paths["a"], ns=(first.stamp.mtime_ns + 10**9,) * 2)
+    changed = cache.get(("a",), paths["a"], lambda: read(paths["a"]))
+    assert changed.data == b"AAAAA" and changed.etag != first.etag
+    
+    # Served but never kept: larger than one entry may be
+    assert cache.get(("big",), paths["big"], lambda: read(paths["big"])).data == b"x" * 8
+    assert ("big",) not in cache.entries
+    cache.get(("b",), paths["b"], lambda: read(paths["b"]))
+    cache.get(("a2",), paths["a"], lambda: read(paths["a"]))
+    assert list(cache.entries) == [("b",), ("a2",)] and cache.total_bytes == 9
+
+@pytest.mark.parametrize("size", [1000, 200 * 1024])
+def test_range_requests(server, site, size):
+    # The larger file is sent from disk rather than the memory cache
+    data = bytes(range(256)) * (size // 256) + b"!" * (size % 256)
+    (site / "blob.bin").write_bytes(data)
+    response, body = request(server, "/blob.bin")
+    etag = response.headers["ETag"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+    
+    for header, status, expected in (("bytes=10-19", 206, data[10:20]), ("bytes=-5", 206, data[-5:]),
+                                     (f"bytes={size - 3}-", 206, data[-3:]), ("bytes=0-99999999", 206, data),
+                                     ("bytes=0-1,5-6", 200, data), ("bytes=9-2", 200, data)):
+        response, body = request(server, "/blob.bin", {"Range": header})
+        assert (header, response.status, body) == (header, status, expected)
+        if status == 206:
+            assert response.headers["Content-Range"].endswith(f"/{size}")
+    
+    response, body = request(server, "/blob.bin", {"Range": f"bytes={size}-"})
+    assert (response.status, body, response.headers["Content-Range"]) == (416, b"", f"bytes */{size}")
+    
+    # A stale If-Range validator gets the whole body
+    response, body = request(server, "/blob.bin", {"Range": "bytes=0-1", "If-Range": etag})
+    assert (response.status, body) == (206, data[:2])
+    response, body = request(server, "/blob.bin", {"Range": "bytes=0-1", "If-Range": '"stale"'})
+    assert (response.status, body) == (200, data)
+
+def test_a_variant_removed_after_negotiation_falls_back_to_the_file(site):
+    (site / "app.js.gz").write_bytes(b"stale")
+    
+    class Handler(serve.NocturneStaticHandler):
+        production = True
+        asset_cache = serve.AssetCache(1024 * 1024, check_interval=60)
+    
+    # Stat'ed while present, then removed before its body is read
+    Handler.asset_cache.stat(str(site / "app.js"))
+    Handler.asset_cache.stat(str(site / "app.js.gz"))
+    (site / "app.js.gz").unlink()
+    httpd = start_server(site, Handler)
+    try:
+        response, body = request(httpd, "/app.js", {"Accept-Encoding": "gzip"})
+        assert (response.status, body, response.headers["Content-Encoding"]) == (200, b"console.log(1)", None)
+        
+        # Negotiated a variant whose stat then finds nothing
+        Handler.choose_encoding = lambda self, path, source, accepted: "br"
+        response, body = request(httpd, "/app.js", {"Accept-Encoding": "br"})
+        assert (response.status, body, response.headers["Content-Encoding"]) == (200, b"console.log(1)", None)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()